@@ -0,0 +1,58 @@
+from PyQt5.QtGui import QPixmap, QPainter
+from PyQt5.QtCore import Qt, QSize, QRect
+
+
+class BackgroundCache:
+    """Кэш готового к отрисовке фона.
+
+    Хранит изображение, уже масштабированное под размер виджета, обрезанное по
+    нему и с применённой прозрачностью, поэтому paintEvent сводится к одному
+    drawPixmap. Пересчитывается только при смене размера или изображения.
+    """
+
+    def __init__(self, opacity=0.7):
+        self.opacity = opacity
+        self.source = None
+        self._smooth = None  # (размер, pixmap) после качественного масштабирования
+        self._fast = None    # (размер, pixmap) быстрого масштабирования во время resize
+
+    def set_source(self, pixmap):
+        self.source = pixmap
+        self.clear()
+
+    def clear(self):
+        self._smooth = None
+        self._fast = None
+
+    def smooth_pixmap(self, size):
+        """Фон с качественным масштабированием для размера size или None, если его ещё нет"""
+        if self._smooth is not None and self._smooth[0] == size:
+            return self._smooth[1]
+        return None
+
+    def pixmap(self, size, smooth):
+        """Фон для размера size: из кэша или после масштабирования (быстрого или качественного)"""
+        cached = self._smooth if smooth else self._fast
+        if cached is not None and cached[0] == size:
+            return cached[1]
+
+        composed = self._compose(QSize(size), Qt.SmoothTransformation if smooth else Qt.FastTransformation)
+        if smooth:
+            self._smooth = (QSize(size), composed)
+            # Быстрый вариант этого размера больше не понадобится
+            self._fast = None
+        else:
+            self._fast = (QSize(size), composed)
+        return composed
+
+    def _compose(self, size, transformation):
+        scaled = self.source.scaled(size, Qt.KeepAspectRatioByExpanding, transformation)
+        composed = QPixmap(size)
+        composed.fill(Qt.transparent)
+        painter = QPainter(composed)
+        painter.setOpacity(self.opacity)
+        # Видна только часть, попадающая в виджет (рисуется от левого верхнего угла)
+        painter.drawPixmap(QRect(0, 0, size.width(), size.height()), scaled,
+                           QRect(0, 0, size.width(), size.height()))
+        painter.end()
+        return composed
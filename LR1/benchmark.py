@@ -0,0 +1,182 @@
+"""Бенчмарк отрисовки фона MainWindow без экрана (платформа offscreen).
+
+Для каждого размера синтетического изображения запускается отдельный процесс
+(чтобы пиковая память относилась только к нему): изображение загружается
+через MainWindow, затем воспроизводятся серия изменений размера окна и серия
+перерисовок. Результат — JSON со временем декодирования, перцентилями времени
+кадра и пиковой памятью.
+
+    python benchmark.py                       # размеры 256, 1024, 4096, 16384
+    python benchmark.py --sizes 512 2048 -o result.json
+"""
+import argparse
+import json
+import os
+import resource
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+DEFAULT_SIZES = [256, 1024, 4096, 16384]
+# Изменений размера окна в серии
+RESIZE_FRAMES = 120
+# Перерисовок без изменения размера
+REPAINT_FRAMES = 300
+
+
+def write_test_image(path, size):
+    """Синтетический RGB PNG size×size: градиенты и диагональные полосы.
+
+    Строки сжимаются и пишутся по одной, поэтому даже 16k² не требует
+    держать изображение в памяти.
+    """
+    def chunk(kind, data):
+        output.write(struct.pack(">I", len(data)) + kind + data)
+        output.write(struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF))
+
+    horizontal = bytes(x * 256 // size for x in range(size))
+    stripes = bytes((x // 8 % 2) * 255 for x in range(size))
+    row = bytearray(3 * size)
+    row[0::3] = horizontal
+    compressor = zlib.compressobj(1)
+    with open(path, "wb") as output:
+        output.write(b"\x89PNG\r\n\x1a\n")
+        chunk(b"IHDR", struct.pack(">IIBBBBB", size, size, 8, 2, 0, 0, 0))
+        pending = []
+        for y in range(size):
+            row[1::3] = bytes([y * 256 // size]) * size
+            shift = y % size
+            row[2::3] = stripes[shift:] + stripes[:shift]
+            pending.append(compressor.compress(b"\x00" + row))
+            if sum(map(len, pending)) >= 1024 * 1024:
+                chunk(b"IDAT", b"".join(pending))
+                pending = []
+        pending.append(compressor.flush())
+        chunk(b"IDAT", b"".join(pending))
+        chunk(b"IEND", b"")
+
+
+def percentiles(times):
+    """Перцентили времени кадра в мс (по рангу)"""
+    ordered = sorted(times)
+
+    def rank(p):
+        return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000, 3)
+
+    return {"frames": len(ordered), "p50_ms": rank(50), "p90_ms": rank(90), "p99_ms": rank(99),
+            "max_ms": round(ordered[-1] * 1000, 3), "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3)}
+
+
+def peak_rss_mb():
+    # ru_maxrss — в КБ в Linux и в байтах в macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_case(path):
+    """Замер для одного файла в текущем процессе"""
+    from PyQt5.QtWidgets import QApplication, QDesktopWidget
+    from PyQt5.QtCore import QEventLoop, QTimer
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    from main import MainWindow, SMOOTH_RESCALE_DELAY_MS
+
+    def spin(ms):
+        loop = QEventLoop()
+        QTimer.singleShot(ms, loop.quit)
+        loop.exec_()
+
+    window = MainWindow()
+    window.show()
+    spin(50)
+    rss_before = peak_rss_mb()
+
+    started = time.perf_counter()
+    window.load_image_file(path)
+    while window.load_task is not None:
+        app.processEvents(QEventLoop.WaitForMoreEvents, 10)
+    decode = time.perf_counter() - started
+    if window.background_pixmap is None:
+        raise RuntimeError(f"Изображение не загрузилось: {path}")
+
+    # Серия изменений размера: кадры с быстрым масштабированием
+    window.showNormal()
+    screen = QDesktopWidget().screenGeometry()
+    resize_times = []
+    for frame in range(RESIZE_FRAMES):
+        fraction = 0.3 + 0.7 * abs((frame % 40) - 20) / 20
+        window.resize(int(screen.width() * fraction), int(screen.height() * fraction))
+        frame_started = time.perf_counter()
+        window.central_widget.repaint()
+        resize_times.append(time.perf_counter() - frame_started)
+
+    # Пауза — качественное масштабирование под итоговый размер
+    smooth_started = time.perf_counter()
+    window.smooth_timer.stop()
+    window.rescale_background()
+    smooth = time.perf_counter() - smooth_started
+    spin(SMOOTH_RESCALE_DELAY_MS)
+
+    # Серия перерисовок без изменения размера: кадры из кэша
+    repaint_times = []
+    for _ in range(REPAINT_FRAMES):
+        frame_started = time.perf_counter()
+        window.central_widget.repaint()
+        repaint_times.append(time.perf_counter() - frame_started)
+
+    window.close()
+    return {
+        "decode_ms": round(decode * 1000, 3),
+        "smooth_rescale_ms": round(smooth * 1000, 3),
+        "resize": percentiles(resize_times),
+        "repaint": percentiles(repaint_times),
+        "rss_before_load_mb": rss_before,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк отрисовки фона LR1")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="стороны синтетических изображений в пикселях")
+    parser.add_argument("-o", "--output", help="файл для JSON (по умолчанию — stdout)")
+    parser.add_argument("--case", help=argparse.SUPPRESS)  # замер одного файла в дочернем процессе
+    args = parser.parse_args()
+
+    if args.case:
+        json.dump(run_case(args.case), sys.stdout)
+        return
+
+    from PyQt5.QtCore import QT_VERSION_STR
+    results = {"platform": os.environ["QT_QPA_PLATFORM"], "qt": QT_VERSION_STR,
+               "python": sys.version.split()[0], "cases": []}
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            path = os.path.join(directory, f"bench_{size}.png")
+            write_test_image(path, size)
+            completed = subprocess.run([sys.executable, os.path.abspath(__file__), "--case", path],
+                                       capture_output=True, text=True,
+                                       cwd=os.path.dirname(os.path.abspath(__file__)))
+            case = {"size": size, "file_bytes": os.path.getsize(path)}
+            if completed.returncode == 0:
+                case.update(json.loads(completed.stdout))
+            else:
+                case["error"] = (completed.stderr.strip().splitlines() or [""])[-1]
+            results["cases"].append(case)
+            os.remove(path)
+
+    text = json.dumps(results, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            output.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
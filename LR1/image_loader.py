@@ -0,0 +1,176 @@
+from PyQt5.QtGui import QImageReader, QPixmap
+from PyQt5.QtCore import Qt, QSize, QFile, QIODevice, QObject, QRunnable, pyqtSignal
+
+# Меньше этого размера (по большей стороне) уровни пирамиды не строятся
+MIN_MIPMAP_SIDE = 256
+
+
+def cover_size(image_size, bounds):
+    """Размер изображения, при котором оно целиком покрывает bounds (как KeepAspectRatioByExpanding).
+
+    Изображение не увеличивается: если оно меньше bounds, возвращается исходный размер.
+    """
+    scale = max(bounds.width() / image_size.width(), bounds.height() / image_size.height())
+    if scale >= 1:
+        return QSize(image_size)
+    return QSize(max(1, round(image_size.width() * scale)), max(1, round(image_size.height() * scale)))
+
+
+class ProgressFile(QFile):
+    """Файл, сообщающий, какая доля прочитана, и прерывающий чтение по отмене.
+
+    Декодер читает файл по мере распаковки, поэтому прочитанная доля файла —
+    это и прогресс декодирования.
+    """
+
+    def __init__(self, file_path, progress=None, is_cancelled=None):
+        super().__init__(file_path)
+        self.progress = progress
+        self.is_cancelled = is_cancelled
+        self.percent = -1
+
+    def readData(self, max_size):
+        if self.is_cancelled is not None and self.is_cancelled():
+            # None — ошибка чтения: декодер прекращает работу
+            return None
+        data = super().readData(max_size)
+        if self.progress is not None and self.size():
+            percent = self.pos() * 100 // self.size()
+            if percent != self.percent:
+                self.percent = percent
+                self.progress(percent)
+        return data
+
+
+def read_scaled_image(file_path, bounds, progress=None, is_cancelled=None):
+    """Читает изображение сразу в размере, достаточном для bounds (обычно — размер экрана).
+
+    QImageReader уменьшает изображение при декодировании (setScaledSize), поэтому
+    пиковая память ограничена размером экрана, а не размером файла.
+    Работает только с QImage, поэтому можно вызывать не из GUI-потока.
+    Возвращает (QImage, исходный размер изображения); при ошибке — ValueError.
+    """
+    device = ProgressFile(file_path, progress, is_cancelled)
+    if not device.open(QIODevice.ReadOnly):
+        raise ValueError(device.errorString())
+    reader = QImageReader(device)
+    reader.setAutoTransform(True)
+    original_size = reader.size()
+    if not original_size.isValid():
+        raise ValueError(reader.errorString())
+
+    target = cover_size(original_size, bounds)
+    if target != original_size:
+        reader.setScaledSize(target)
+    image = reader.read()
+    if image.isNull():
+        raise ValueError(reader.errorString())
+    return image, original_size
+
+
+def mipmap_levels(image, min_side=MIN_MIPMAP_SIDE):
+    """Уровни пирамиды: изображение и его копии, каждая вдвое меньше предыдущей"""
+    levels = [image]
+    while max(levels[-1].width(), levels[-1].height()) // 2 >= min_side:
+        previous = levels[-1]
+        levels.append(previous.scaled(previous.width() // 2, previous.height() // 2,
+                                      Qt.IgnoreAspectRatio, Qt.SmoothTransformation))
+    return levels
+
+
+class MipmapPyramid:
+    """Пирамида уменьшенных копий изображения: каждый уровень вдвое меньше предыдущего.
+
+    Для нужного размера берётся наименьший уровень, который его ещё покрывает,
+    поэтому масштабирование под маленькое окно не проходит по всем пикселям
+    исходника. Уменьшенные уровни вместе занимают не больше трети первого.
+    Поддерживает scaled(), как QPixmap, и подставляется вместо него.
+    """
+
+    def __init__(self, levels):
+        """levels — QPixmap уровней от самого большого к самому маленькому"""
+        self.levels = list(levels)
+
+    def level_for(self, size):
+        """Наименьший уровень, покрывающий size (или самый большой, если не покрывает ни один)"""
+        for level in reversed(self.levels):
+            # Уровень подходит, если при KeepAspectRatioByExpanding его не нужно увеличивать
+            if max(size.width() / level.width(), size.height() / level.height()) <= 1:
+                return level
+        return self.levels[0]
+
+    def scaled(self, size, aspect_mode, transformation):
+        return self.level_for(size).scaled(size, aspect_mode, transformation)
+
+    def width(self):
+        return self.levels[0].width()
+
+    def height(self):
+        return self.levels[0].height()
+
+    def isNull(self):
+        return self.levels[0].isNull()
+
+
+def make_background(images):
+    """Фон для окна из уровней-QImage: QPixmap или MipmapPyramid.
+
+    QPixmap можно создавать только в GUI-потоке, поэтому пирамида собирается
+    здесь, а уменьшенные копии строятся заранее (mipmap_levels) в фоне.
+    """
+    pixmaps = [QPixmap.fromImage(image) for image in images]
+    if len(pixmaps) == 1:
+        return pixmaps[0]
+    return MipmapPyramid(pixmaps)
+
+
+class ImageLoadSignals(QObject):
+    progress = pyqtSignal(int)  # проценты
+    finished = pyqtSignal(list, QSize)  # уровни-QImage, исходный размер
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+
+class ImageLoadTask(QRunnable):
+    """Декодирование изображения (и построение уровней пирамиды) в пуле потоков.
+
+    Результат — список QImage; QPixmap из него делает GUI-поток (make_background).
+    Отмена прерывает чтение файла на следующей порции.
+    """
+
+    def __init__(self, file_path, bounds, mipmaps=True):
+        super().__init__()
+        self.file_path = file_path
+        self.bounds = QSize(bounds)
+        self.mipmaps = mipmaps
+        self.signals = ImageLoadSignals()
+        self._cancelled = False
+        # Объект задачи принадлежит Python, а не пулу: владелец хранит ссылку на него,
+        # пока не придёт finished, failed или cancelled — даже после cancel(), ведь
+        # отменённая задача ещё может ждать в очереди пула
+        self.setAutoDelete(False)
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def run(self):
+        try:
+            image, original_size = read_scaled_image(self.file_path, self.bounds,
+                                                     self.signals.progress.emit, self.is_cancelled)
+            if self._cancelled:
+                self.signals.cancelled.emit()
+                return
+            levels = mipmap_levels(image) if self.mipmaps else [image]
+        except ValueError as error:
+            if self._cancelled:
+                self.signals.cancelled.emit()
+            else:
+                self.signals.failed.emit(str(error))
+            return
+        except Exception as error:
+            self.signals.failed.emit(str(error))
+            return
+        self.signals.finished.emit(levels, original_size)
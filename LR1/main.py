@@ -1,10 +1,19 @@
 import sys
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QLabel, QPushButton, QFileDialog, QMessageBox, QDesktopWidget
+    QLabel, QPushButton, QFileDialog, QMessageBox, QDesktopWidget, QProgressBar, QShortcut
 )
-from PyQt5.QtGui import QPixmap, QPainter, QColor
-from PyQt5.QtCore import Qt, QSize
+from PyQt5.QtGui import QPainter, QColor, QKeySequence
+from PyQt5.QtCore import Qt, QSize, QTimer, QThreadPool
+
+from background_cache import BackgroundCache
+from image_loader import ImageLoadTask, make_background
+from slideshow import Slideshow
+
+# Через сколько мс после последнего изменения размера фон масштабируется качественно
+SMOOTH_RESCALE_DELAY_MS = 150
+# Строить пирамиду уменьшенных копий фона для окон меньше экрана
+USE_MIPMAPS = True
 
 
 class MainWindow(QMainWindow):
@@ -41,8 +50,42 @@ class MainWindow(QMainWindow):
         self.button2.clicked.connect(self.load_transparent_image)
         buttons_layout.addWidget(self.button2)
 
+        # Свой пул для декодирования: глобальный Qt использует сам, например при
+        # качественном масштабировании, и занятые загрузкой потоки его бы блокировали
+        self.image_pool = QThreadPool(self)
+
+        # Слайд-шоу фонов из каталога: смена по таймеру или стрелками влево/вправо
+        self.slideshow_btn = QPushButton("Слайд-шоу...")
+        self.slideshow_btn.clicked.connect(self.start_slideshow)
+        buttons_layout.addWidget(self.slideshow_btn)
+        self.slideshow = Slideshow(QDesktopWidget().screenGeometry().size(), self.image_pool,
+                                   mipmaps=USE_MIPMAPS, parent=self)
+        self.slideshow.image_changed.connect(self.show_slideshow_image)
+        QShortcut(QKeySequence(Qt.Key_Right), self, activated=self.slideshow.next)
+        QShortcut(QKeySequence(Qt.Key_Left), self, activated=self.slideshow.previous)
+
+        # Индикатор фоновой загрузки изображения и её отмена (видны только во время загрузки)
+        self.load_task = None
+        self.image_tasks = set()  # запущенные загрузки, включая отменённые, — до их завершения в пуле
+        self.load_progress = QProgressBar()
+        self.load_progress.setRange(0, 100)
+        self.load_progress.hide()
+        buttons_layout.addWidget(self.load_progress)
+        self.cancel_load_btn = QPushButton("Отмена")
+        self.cancel_load_btn.clicked.connect(self.cancel_image_loading)
+        self.cancel_load_btn.hide()
+        buttons_layout.addWidget(self.cancel_load_btn)
+
         # Хранение изображения
         self.background_pixmap = None
+        # Фон, уже масштабированный под окно и с применённой прозрачностью
+        self.background_cache = BackgroundCache(opacity=0.7)
+
+        # Во время изменения размера фон масштабируется быстро, а качественно — после паузы
+        self.smooth_timer = QTimer(self)
+        self.smooth_timer.setSingleShot(True)
+        self.smooth_timer.setInterval(SMOOTH_RESCALE_DELAY_MS)
+        self.smooth_timer.timeout.connect(self.rescale_background)
 
         # Устанавливаем прозрачный фон
         self.central_widget.setAttribute(Qt.WA_TranslucentBackground)
@@ -54,19 +97,16 @@ class MainWindow(QMainWindow):
     def paint_background(self, event):
         """Рисует полупрозрачный фон поверх всего окна"""
         if self.background_pixmap:
+            size = self.central_widget.size()
+            pixmap = self.background_cache.smooth_pixmap(size)
+            if pixmap is None:
+                # Размер меняется: пока быстрое масштабирование, качественное — после паузы
+                pixmap = self.background_cache.pixmap(size, smooth=False)
+                self.smooth_timer.start()
+
+            # Прозрачность уже применена в кэше — рисуем одним копированием
             painter = QPainter(self.central_widget)
-            painter.setRenderHint(QPainter.Antialiasing)
-
-            # Масштабируем изображение под размер центрального виджета
-            scaled_pixmap = self.background_pixmap.scaled(
-                self.central_widget.size(),
-                Qt.KeepAspectRatioByExpanding,
-                Qt.SmoothTransformation
-            )
-
-            # Рисуем с полупрозрачностью
-            painter.setOpacity(0.7)
-            painter.drawPixmap(0, 0, scaled_pixmap)
+            painter.drawPixmap(0, 0, pixmap)
             painter.end()
         else:
             # Стандартный фон, если нет изображения
@@ -74,6 +114,12 @@ class MainWindow(QMainWindow):
             painter.fillRect(self.central_widget.rect(), QColor(240, 240, 240))
             painter.end()
 
+    def rescale_background(self):
+        """Качественно масштабирует фон под окно, когда его размер перестал меняться"""
+        if self.background_pixmap:
+            self.background_cache.pixmap(self.central_widget.size(), smooth=True)
+            self.central_widget.update()
+
     def change_label_text(self):
         """Изменяет текст надписи при нажатии кнопки 1"""
         current_text = self.label.text()
@@ -83,7 +129,7 @@ class MainWindow(QMainWindow):
             self.label.setText("Надпись")
 
     def load_transparent_image(self):
-        """Загружает PNG-изображение и подгоняет окно под его размер или максимизирует"""
+        """Выбирает PNG-изображение и запускает его загрузку в фоновом потоке"""
         file_path, _ = QFileDialog.getOpenFileName(
             self,
             "Выберите PNG файл",
@@ -91,21 +137,67 @@ class MainWindow(QMainWindow):
             "PNG Files (*.png);;All Files (*)"
         )
 
-        if not file_path:
+        if file_path:
+            self.load_image_file(file_path)
+
+    def load_image_file(self, file_path):
+        """Запускает загрузку изображения file_path в фоновом потоке"""
+        # Предыдущая загрузка и слайд-шоу больше не нужны
+        self.cancel_image_loading()
+        self.slideshow.stop()
+
+        # Декодируем сразу в размере экрана: больше фон никогда не показывается
+        screen = QDesktopWidget().screenGeometry()
+        task = ImageLoadTask(file_path, screen.size(), mipmaps=USE_MIPMAPS)
+        task.signals.progress.connect(self.load_progress.setValue)
+        task.signals.finished.connect(lambda levels, size: self.apply_loaded_image(task, levels, size))
+        task.signals.failed.connect(lambda error: self.image_loading_failed(task, error))
+        task.signals.cancelled.connect(lambda: self.finish_image_loading(task))
+        for signal in (task.signals.finished, task.signals.failed, task.signals.cancelled):
+            signal.connect(lambda *args: self.image_tasks.discard(task))
+        self.load_task = task
+        self.image_tasks.add(task)
+
+        self.load_progress.setValue(0)
+        self.load_progress.show()
+        self.cancel_load_btn.show()
+        self.image_pool.start(task)
+
+    def cancel_image_loading(self):
+        """Отменяет текущую загрузку; её результат будет отброшен"""
+        if self.load_task is not None:
+            self.load_task.cancel()
+            self.finish_image_loading(self.load_task)
+
+    def finish_image_loading(self, task):
+        """Убирает индикатор, если task — текущая загрузка"""
+        if task is not self.load_task:
+            return False
+        self.load_task = None
+        self.load_progress.hide()
+        self.cancel_load_btn.hide()
+        return True
+
+    def image_loading_failed(self, task, error):
+        if self.finish_image_loading(task):
+            QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить изображение.\n{error}")
+
+    def apply_loaded_image(self, task, levels, original_size):
+        """Устанавливает загруженное изображение фоном и подгоняет окно под его размер или максимизирует"""
+        # Результат отменённой или заменённой загрузки не нужен
+        if not self.finish_image_loading(task):
             return
 
         try:
-            pixmap = QPixmap(file_path)
-            if pixmap.isNull():
-                QMessageBox.critical(self, "Ошибка", "Не удалось загрузить изображение.")
-                return
+            pixmap = make_background(levels)
 
             # Сохраняем изображение
             self.background_pixmap = pixmap
+            self.background_cache.set_source(pixmap)
 
-            # Получаем размер изображения
-            img_width = pixmap.width()
-            img_height = pixmap.height()
+            # Получаем размер изображения (исходный, до уменьшения при чтении)
+            img_width = original_size.width()
+            img_height = original_size.height()
 
             # Получаем размер экрана
             screen = QDesktopWidget().screenGeometry()
@@ -125,6 +217,28 @@ class MainWindow(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Произошла ошибка:\n{str(e)}")
 
+    def start_slideshow(self):
+        """Выбирает каталог и показывает его изображения фоном по очереди"""
+        directory = QFileDialog.getExistingDirectory(self, "Выберите каталог с изображениями")
+        if not directory:
+            return
+
+        self.cancel_image_loading()
+        if not self.slideshow.start(directory):
+            QMessageBox.information(self, "Слайд-шоу", "В каталоге нет изображений.")
+
+    def show_slideshow_image(self, background, original_size, file_path):
+        """Очередное изображение слайд-шоу; размер окна при этом не меняется"""
+        self.background_pixmap = background
+        self.background_cache.set_source(background)
+        self.central_widget.update()
+
+    def closeEvent(self, event):
+        # Незавершённое декодирование не должно задерживать выход
+        self.cancel_image_loading()
+        self.slideshow.stop()
+        super().closeEvent(event)
+
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
@@ -0,0 +1,209 @@
+import os
+from collections import OrderedDict
+
+from PyQt5.QtGui import QImageReader
+from PyQt5.QtCore import QObject, QSize, QTimer, pyqtSignal
+
+from image_loader import ImageLoadTask, make_background
+
+# Смена изображения по таймеру, мс
+SLIDESHOW_INTERVAL_MS = 5000
+# Сколько следующих изображений декодируется заранее
+PREFETCH_COUNT = 3
+# Сколько памяти могут занимать декодированные изображения, МБ
+CACHE_BUDGET_MB = 256
+
+
+def image_files(directory):
+    """Изображения каталога (форматы, которые умеет читать Qt), по имени"""
+    extensions = {"." + bytes(fmt).decode().lower() for fmt in QImageReader.supportedImageFormats()}
+    files = [os.path.join(directory, name) for name in sorted(os.listdir(directory), key=str.lower)
+             if os.path.splitext(name)[1].lower() in extensions]
+    return [path for path in files if os.path.isfile(path)]
+
+
+class ImageCache:
+    """LRU-кэш декодированных изображений с ограничением по памяти.
+
+    Размер записи — байты её уровней-QImage. При нехватке места вытесняются
+    давно не показанные записи, кроме защищённых (текущая и следующие).
+    """
+
+    def __init__(self, budget):
+        self.budget = budget  # байт
+        self.used = 0
+        self.entries = OrderedDict()  # путь -> (фон, исходный размер, байт)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, background, original_size, size, protected=(), force=False):
+        """Добавляет запись; False, если места нет даже после вытеснения незащищённых.
+
+        force — добавить в любом случае (показываемое изображение)
+        """
+        if key in self.entries:
+            self.used -= self.entries.pop(key)[2]
+        for old_key in list(self.entries):
+            if self.used + size <= self.budget:
+                break
+            if old_key not in protected:
+                self.used -= self.entries.pop(old_key)[2]
+        if self.used + size > self.budget and not force:
+            return False
+        self.entries[key] = (background, original_size, size)
+        self.used += size
+        return True
+
+    def clear(self):
+        self.entries.clear()
+        self.used = 0
+
+
+class Slideshow(QObject):
+    """Слайд-шоу фонов из каталога.
+
+    Следующие PREFETCH_COUNT изображений (по направлению листания) декодируются
+    в пуле потоков заранее и хранятся в ImageCache, поэтому переключение обычно
+    мгновенное, а память ограничена бюджетом кэша при любом размере каталога.
+    """
+
+    image_changed = pyqtSignal(object, QSize, str)  # фон (QPixmap или MipmapPyramid), исходный размер, путь
+    failed = pyqtSignal(str, str)  # путь, ошибка
+
+    def __init__(self, bounds, pool, interval=SLIDESHOW_INTERVAL_MS, prefetch=PREFETCH_COUNT,
+                 budget_mb=CACHE_BUDGET_MB, mipmaps=True, parent=None):
+        """pool — QThreadPool для декодирования"""
+        super().__init__(parent)
+        self.bounds = QSize(bounds)
+        self.pool = pool
+        self.prefetch = prefetch
+        self.mipmaps = mipmaps
+        self.cache = ImageCache(budget_mb * 1024 * 1024)
+        self.files = []
+        self.index = -1
+        self.step = 1  # направление листания
+        self.pending = None  # путь, который нужно показать, как только он декодируется
+        self.tasks = {}  # путь -> ImageLoadTask
+        # Все запущенные задачи, включая отменённые, — до их завершения в пуле:
+        # отменённая задача может ещё ждать в очереди, и без ссылки её удалил бы сборщик мусора
+        self.running = set()
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.next)
+
+    def start(self, directory):
+        """Начинает показ изображений каталога; возвращает их количество"""
+        self.stop()
+        self.files = image_files(directory)
+        if self.files:
+            self.show(0)
+        return len(self.files)
+
+    def stop(self):
+        self.timer.stop()
+        for task in self.tasks.values():
+            task.cancel()
+        self.tasks.clear()
+        self.cache.clear()
+        self.files = []
+        self.index = -1
+        self.pending = None
+
+    def next(self):
+        if self.files:
+            self.step = 1
+            self.show((self.index + 1) % len(self.files))
+
+    def previous(self):
+        if self.files:
+            self.step = -1
+            self.show((self.index - 1) % len(self.files))
+
+    def show(self, index):
+        self.index = index
+        path = self.files[index]
+        # Пользователь листает сам — отсчёт до автоматической смены начинается заново
+        self.timer.start()
+
+        entry = self.cache.get(path)
+        if entry is not None:
+            self.pending = None
+            self.image_changed.emit(entry[0], entry[1], path)
+        else:
+            self.pending = path
+            self.load(path)
+        self.prefetch_next()
+
+    def wanted(self):
+        """Текущий путь и следующие по направлению листания"""
+        count = min(self.prefetch, len(self.files) - 1)
+        return [self.files[(self.index + self.step * i) % len(self.files)] for i in range(count + 1)]
+
+    def prefetch_next(self):
+        wanted = self.wanted()
+        # Загрузки, ушедшие из окна предвыборки, больше не нужны
+        for path in list(self.tasks):
+            if path not in wanted:
+                self.tasks.pop(path).cancel()
+        for path in wanted:
+            if path not in self.cache:
+                self.load(path)
+
+    def load(self, path):
+        if path in self.tasks:
+            return
+        task = ImageLoadTask(path, self.bounds, mipmaps=self.mipmaps)
+        task.signals.finished.connect(lambda levels, size: self.loaded(task, levels, size))
+        task.signals.failed.connect(lambda error: self.load_failed(task, error))
+        for signal in (task.signals.finished, task.signals.failed, task.signals.cancelled):
+            signal.connect(lambda *args: self.running.discard(task))
+        self.tasks[path] = task
+        self.running.add(task)
+        self.pool.start(task)
+
+    def loaded(self, task, levels, original_size):
+        path = task.file_path
+        if self.tasks.get(path) is not task:
+            return
+        del self.tasks[path]
+
+        size = sum(image.sizeInBytes() for image in levels)
+        wanted = self.wanted()
+        stored = self.cache.put(path, make_background(levels), original_size, size,
+                                protected=wanted, force=path == self.pending)
+        if not stored:
+            # Бюджет исчерпан следующими изображениями — этот декодируется, когда до него дойдёт очередь
+            return
+        if path == self.pending:
+            self.pending = None
+            entry = self.cache.get(path)
+            self.image_changed.emit(entry[0], entry[1], path)
+
+    def load_failed(self, task, error):
+        path = task.file_path
+        if self.tasks.get(path) is not task:
+            return
+        del self.tasks[path]
+        self.failed.emit(path, error)
+
+        # Нечитаемый файл исключается из показа
+        position = self.files.index(path)
+        self.files.remove(path)
+        if not self.files:
+            self.stop()
+            return
+        if position < self.index or (position == self.index and self.step < 0):
+            self.index -= 1
+        self.index %= len(self.files)
+        if path == self.pending:
+            self.show(self.index)
+        else:
+            self.prefetch_next()
@@ -0,0 +1,341 @@
+"""Пакетная конвертация сумм без интерфейса.
+
+Читает CSV или JSONL с записями (сумма, из валюты, в валюту) порциями,
+пересчитывает каждую порцию одним векторным умножением (RateVector) и пишет
+записи с добавленным столбцом результата. В памяти одновременно только одна
+порция, поэтому размер файла не ограничен. Курсы — те же, что показывает
+конвертер (rates_cache.json), из файла --rates или из истории курсов: на одну
+дату (--as-of) или на дату каждой записи (--date-column).
+
+    python batch_convert.py ledger.csv -o converted.csv
+    python batch_convert.py ledger.jsonl -o converted.jsonl --from-column currency --to-column target
+    python batch_convert.py ledger.csv -o revalued.csv --date-column date
+"""
+import argparse
+import csv
+import io
+import itertools
+import json
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+from conversion import RATES_CACHE_PATH, loadRateVector
+from rate_history import RATES_HISTORY_PATH, RateHistory
+
+try:
+    import pyarrow
+    import pyarrow.compute
+    import pyarrow.csv
+except ImportError:  # без pyarrow CSV читается модулем csv — медленнее, но так же порциями
+    pyarrow = None
+
+# Записей в порции
+CHUNK_SIZE = 50_000
+# Примерный размер записи CSV, байт — для размера блока чтения pyarrow
+CSV_ROW_BYTES = 32
+
+
+def parseAmounts(values):
+    """Суммы из строк или чисел; пустые — NaN, нечисловые — ValueError (как при чтении через pyarrow)"""
+    try:
+        return np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        result = np.empty(len(values), dtype=np.float64)
+        for i, value in enumerate(values):
+            if value is None or value == '':
+                result[i] = np.nan
+                continue
+            try:
+                result[i] = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"Некорректная сумма: {value!r}") from None
+        return result
+
+
+def parseDays(values):
+    """Номера дней из дат ('ГГГГ-ММ-ДД', можно со временем); пустые — NaT (курсов на них нет)"""
+    try:
+        dates = np.array(values, dtype='datetime64')
+    except ValueError as error:
+        raise ValueError(f"Некорректная дата: {error}") from None
+    return dates.astype('datetime64[D]').astype(np.int64)
+
+
+def binaryStream(file):
+    """Двоичный поток открытого файла (для текстового — его буфер)"""
+    return file.buffer if isinstance(file, io.TextIOBase) else file
+
+
+def formatResults(results, decimals):
+    """Результаты строками; NaN (неизвестная валюта или сумма) — пустая строка"""
+    text = np.char.mod(f'%.{decimals}f', results)
+    text[np.isnan(results)] = ''
+    return text.tolist()
+
+
+class BatchConverter:
+    """Пересчёт потока записей порциями; считает обработанные и непересчитанные записи.
+
+    С date_column каждая запись пересчитывается по курсам из history на свою
+    дату, иначе все — по rate_vector.
+    """
+
+    def __init__(self, rate_vector, amount_column='amount', from_column='from', to_column='to',
+                 result_column='converted', decimals=2, chunk_size=CHUNK_SIZE, history=None, date_column=None):
+        self.rate_vector = rate_vector
+        self.history = history
+        self.date_column = date_column
+        # Откуда берутся позиции валют: из истории (по датам) или из вектора курсов
+        self.lookup = history if date_column else rate_vector
+        self.amount_column = amount_column
+        self.from_column = from_column
+        self.to_column = to_column
+        self.result_column = result_column
+        self.decimals = decimals
+        self.chunk_size = chunk_size
+        self.rows = 0
+        self.failed = 0
+
+    def columns(self):
+        columns = [self.amount_column, self.from_column, self.to_column]
+        return columns + [self.date_column] if self.date_column else columns
+
+    def convertChunk(self, amounts, from_indices, to_indices, days=None):
+        if days is not None:
+            rows = self.history.rowsAsOf(days)
+            results = self.history.convertIndexed(amounts, rows, from_indices, to_indices)
+        else:
+            results = self.rate_vector.convertIndexed(amounts, from_indices, to_indices)
+        # + 0.0 — чтобы -0.0 после округления писался как 0.00
+        results = np.round(results, self.decimals) + 0.0
+        self.rows += len(results)
+        self.failed += int(np.isnan(results).sum())
+        return results
+
+    def convertCsv(self, input_file, output_file):
+        """CSV из input_file в output_file: пути или открытые файлы (двоичные или текстовые с newline='').
+
+        С pyarrow и без него принимает одно и то же и пишет одинаковый результат.
+        """
+        if isinstance(input_file, (str, os.PathLike)):
+            with open(input_file, 'rb') as input_stream:
+                self.convertCsv(input_stream, output_file)
+            return
+        if isinstance(output_file, (str, os.PathLike)):
+            with open(output_file, 'wb') as output_stream:
+                self.convertCsv(input_file, output_stream)
+            return
+        # Обе реализации работают с двоичными потоками
+        input_stream, output_stream = binaryStream(input_file), binaryStream(output_file)
+        if isinstance(output_file, io.TextIOBase):
+            output_file.flush()
+        if pyarrow is not None:
+            self.convertCsvArrow(input_stream, output_stream)
+            return
+
+        input_text = io.TextIOWrapper(input_stream, encoding='utf-8', newline='')
+        output_text = io.TextIOWrapper(output_stream, encoding='utf-8', newline='')
+        try:
+            self.convertCsvText(input_text, output_text)
+        finally:
+            # Потоки закрывает тот, кто их открыл
+            output_text.flush()
+            output_text.detach()
+            input_text.detach()
+
+    def convertCsvText(self, input_file, output_file):
+        """CSV модулем csv (без pyarrow); файлы — текстовые"""
+        reader = csv.reader(input_file)
+        writer = csv.writer(output_file, lineterminator='\n')
+        header = next(reader, None)
+        if header is None:
+            raise ValueError("Пустой файл")
+        try:
+            positions = [header.index(name) for name in self.columns()]
+        except ValueError as error:
+            raise ValueError(f"Нет столбца: {error}") from None
+        writer.writerow(header + [self.result_column])
+        amount_position, from_position, to_position = positions[:3]
+
+        while True:
+            rows = list(itertools.islice(reader, self.chunk_size))
+            if not rows:
+                return
+            results = self.convertChunk(
+                parseAmounts([row[amount_position] for row in rows]),
+                self.lookup.indicesOf([row[from_position] for row in rows]),
+                self.lookup.indicesOf([row[to_position] for row in rows]),
+                parseDays([row[positions[3]] for row in rows]) if self.date_column else None,
+            )
+            writer.writerows(row + [result] for row, result in zip(rows, formatResults(results, self.decimals)))
+
+    def fitsDecimal(self, results):
+        """Помещаются ли результаты в decimal128(38, decimals): inf и слишком большие — нет"""
+        known = results[~np.isnan(results)]
+        if not np.isfinite(known).all():
+            return False
+        return self.decimals <= 38 and np.abs(known).max(initial=0) < 10.0 ** (38 - self.decimals)
+
+    def convertCsvArrow(self, input_stream, output_stream):
+        """CSV через pyarrow: разбор и запись в C++, в Python — только вызовы на порцию.
+
+        Все столбцы читаются строками, поэтому переносятся в результат без
+        изменений ("007" не становится 7), а запись совпадает с модулем csv.
+        Потоки — двоичные.
+        """
+        # Заголовок разбираем сами: по нему все столбцы объявляются строковыми
+        header_line = input_stream.readline()
+        if not header_line:
+            raise ValueError("Пустой файл")
+        header = next(csv.reader([header_line.decode('utf-8')]))
+        for name in self.columns():
+            if name not in header:
+                raise ValueError(f"Нет столбца: {name}")
+        # Заголовок пишется и для файла без записей
+        text = io.StringIO()
+        csv_writer = csv.writer(text, lineterminator='\n')
+        csv_writer.writerow(header + [self.result_column])
+        output_stream.write(text.getvalue().encode('utf-8'))
+        if input_stream.seekable():
+            # pyarrow не читает CSV без строк данных («Empty CSV file»)
+            position = input_stream.tell()
+            if not input_stream.read(1):
+                return
+            input_stream.seek(position)
+
+        reader = pyarrow.csv.open_csv(
+            input_stream,
+            read_options=pyarrow.csv.ReadOptions(column_names=header,
+                                                 block_size=max(1 << 20, self.chunk_size * CSV_ROW_BYTES)),
+            convert_options=pyarrow.csv.ConvertOptions(column_types={name: pyarrow.string() for name in header}),
+        )
+        codes = pyarrow.array(self.lookup.codes)
+
+        def indices(column):
+            found = pyarrow.compute.index_in(column, value_set=codes)
+            return pyarrow.compute.fill_null(found, -1).to_numpy().astype(np.int64)
+
+        def amounts(column):
+            # Пустая сумма — NaN, как в parseAmounts
+            empty = pyarrow.compute.equal(column, '')
+            column = pyarrow.compute.if_else(empty, pyarrow.scalar(None, pyarrow.string()), column)
+            return pyarrow.compute.cast(column, pyarrow.float64()).to_numpy(zero_copy_only=False)
+
+        # Порция без запятых, кавычек и переводов строк пишется pyarrow без кавычек — как
+        # csv.writer; иначе (редко) — самим csv.writer, который закавычит только такие значения.
+        # Им же — порции с результатами, не представимыми в decimal (inf, очень большие)
+        special = '[,"\r\n]'
+        write_options = pyarrow.csv.WriteOptions(include_header=False, quoting_style='none')
+
+        for batch in reader:
+            if batch.num_rows == 0:
+                continue
+            days = None
+            if self.date_column:
+                days = parseDays(batch.column(self.date_column).to_numpy(zero_copy_only=False))
+            results = self.convertChunk(amounts(batch.column(self.amount_column)),
+                                        indices(batch.column(self.from_column)),
+                                        indices(batch.column(self.to_column)), days)
+            if not self.fitsDecimal(results) or any(
+                    pyarrow.compute.any(pyarrow.compute.match_substring_regex(column, special)).as_py()
+                    for column in batch.columns):
+                text.seek(0)
+                text.truncate()
+                csv_writer.writerows(row + (result,) for row, result in zip(
+                    zip(*(column.to_pylist() for column in batch.columns)),
+                    formatResults(results, self.decimals)))
+                output_stream.write(text.getvalue().encode('utf-8'))
+                continue
+            # NaN -> пустое значение; decimal — чтобы знаков после запятой было ровно decimals
+            converted = pyarrow.array(results, from_pandas=True).cast(pyarrow.decimal128(38, self.decimals))
+            output = pyarrow.RecordBatch.from_arrays(batch.columns + [converted],
+                                                     names=header + [self.result_column])
+            pyarrow.csv.write_csv(output, output_stream, write_options)
+
+    def convertJsonl(self, input_file, output_file):
+        lines = (line for line in input_file if line.strip())
+        while True:
+            records = [json.loads(line) for line in itertools.islice(lines, self.chunk_size)]
+            if not records:
+                return
+            results = self.convertChunk(
+                parseAmounts([record.get(self.amount_column) for record in records]),
+                self.lookup.indicesOf([record.get(self.from_column) for record in records]),
+                self.lookup.indicesOf([record.get(self.to_column) for record in records]),
+                parseDays([record.get(self.date_column) for record in records]) if self.date_column else None,
+            )
+            for record, result in zip(records, results.tolist()):
+                record[self.result_column] = None if math.isnan(result) else result
+            output_file.write('\n'.join(json.dumps(record, ensure_ascii=False) for record in records) + '\n')
+
+
+def detectFormat(path, fmt):
+    if fmt:
+        return fmt
+    return 'jsonl' if path.lower().endswith(('.jsonl', '.ndjson')) else 'csv'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Пакетная конвертация сумм из CSV или JSONL')
+    parser.add_argument('input', help='файл с записями (сумма, из валюты, в валюту)')
+    parser.add_argument('-o', '--output', required=True, help='файл результата')
+    parser.add_argument('--format', choices=['csv', 'jsonl'], help='формат (по умолчанию — по расширению)')
+    parser.add_argument('--rates', default=RATES_CACHE_PATH,
+                        help='файл курсов (по умолчанию — сохранённые конвертером)')
+    parser.add_argument('--history', default=RATES_HISTORY_PATH,
+                        help='история курсов (по умолчанию — сохранённая конвертером)')
+    dates = parser.add_mutually_exclusive_group()
+    dates.add_argument('--as-of', metavar='ГГГГ-ММ-ДД', help='пересчитать по курсам на дату из истории')
+    dates.add_argument('--date-column', help='пересчитать каждую запись по курсам на её дату из истории')
+    parser.add_argument('--amount-column', default='amount')
+    parser.add_argument('--from-column', default='from')
+    parser.add_argument('--to-column', default='to')
+    parser.add_argument('--result-column', default='converted')
+    parser.add_argument('--decimals', type=int, default=2, help='знаков после запятой в результате')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='записей в порции')
+    args = parser.parse_args()
+
+    rate_vector = history = None
+    if args.as_of or args.date_column:
+        history = RateHistory(args.history)
+        if not len(history):
+            sys.exit(f"История курсов {args.history} пуста: её пополняет конвертер (main.py)")
+        if args.as_of:
+            try:
+                snapshot_date, rate_vector = history.asOf(args.as_of)
+            except (LookupError, ValueError) as error:
+                sys.exit(f"Не удалось взять курсы на дату: {error}")
+            print(f"Курсы на {snapshot_date}", file=sys.stderr)
+    else:
+        try:
+            rate_vector = loadRateVector(args.rates)
+        except (OSError, ValueError) as error:
+            sys.exit(f"Не удалось загрузить курсы: {error}\n"
+                     "Запустите конвертер (main.py), чтобы сохранить курсы, или укажите файл --rates")
+
+    converter = BatchConverter(rate_vector, args.amount_column, args.from_column, args.to_column,
+                               args.result_column, args.decimals, args.chunk_size,
+                               history=history, date_column=args.date_column)
+    fmt = detectFormat(args.input, args.format)
+    started = time.perf_counter()
+    try:
+        if fmt == 'csv':
+            converter.convertCsv(args.input, args.output)
+        else:
+            with open(args.input, encoding='utf-8') as input_file, \
+                    open(args.output, 'w', encoding='utf-8') as output_file:
+                converter.convertJsonl(input_file, output_file)
+    except (OSError, ValueError) as error:  # ошибки pyarrow — их подклассы
+        sys.exit(f"Ошибка: {error}")
+
+    elapsed = time.perf_counter() - started
+    print(f"Записей: {converter.rows}, не пересчитано: {converter.failed}, "
+          f"{elapsed:.2f} с ({converter.rows / max(elapsed, 1e-9):,.0f} записей/с)", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,6 @@
 from PyQt5.QtCore import QObject, pyqtSignal
 
 class CommonSignals(QObject):
+    amount_changed = pyqtSignal(str, float)  # код валюты, сумма
     clear_all = pyqtSignal()
-    rates_updated = pyqtSignal(dict)
\ No newline at end of file
+    rates_updated = pyqtSignal(object)  # RateVector
\ No newline at end of file
@@ -0,0 +1,78 @@
+import json
+import os
+
+import numpy as np
+
+# Базовая валюта API: курсы — сколько единиц валюты стоит 1 USD
+BASE_CURRENCY = 'USD'
+# Файл с последними полученными курсами (его пишет RateStore, читают GUI и batch_convert.py)
+RATES_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rates_cache.json')
+
+
+def codeIndices(index, codes):
+    """Позиции кодов валют по словарю index (код -> позиция); -1 — неизвестная валюта"""
+    return np.fromiter((index.get(code, -1) for code in codes), dtype=np.int64, count=len(codes))
+
+
+def loadRateVector(path=RATES_CACHE_PATH):
+    """Курсы из файла: сохранённые RateStore или ответ API (ключ 'rates')"""
+    with open(path, encoding='utf-8') as file:
+        data = json.load(file)
+    if not isinstance(data, dict) or not isinstance(data.get('rates'), dict):
+        raise ValueError(f"В {path} нет курсов")
+    return RateVector.fromRates(data['rates'], data.get('base', BASE_CURRENCY))
+
+
+class RateVector:
+    """Курсы всех валют одним массивом: values[i] — единиц валюты codes[i] за 1 единицу базовой.
+
+    Сумма в одной валюте пересчитывается во все остальные одним векторным
+    умножением, поэтому добавление валют не требует кода и стоит O(N).
+    """
+
+    def __init__(self, codes, values):
+        self.codes = list(codes)
+        self.values = np.asarray(values, dtype=np.float64)
+        self.index = {code: i for i, code in enumerate(self.codes)}
+
+    @classmethod
+    def fromRates(cls, rates, base=BASE_CURRENCY):
+        """Из словаря курсов API ({'EUR': 0.92, ...}); нулевые и нечисловые курсы отбрасываются"""
+        clean = {base: 1.0}
+        for code, value in rates.items():
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                continue
+            if value > 0 and np.isfinite(value):
+                clean[code] = value
+        return cls(clean.keys(), list(clean.values()))
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __contains__(self, code):
+        return code in self.index
+
+    def rate(self, from_code, to_code):
+        """Сколько единиц to_code стоит 1 единица from_code"""
+        return self.values[self.index[to_code]] / self.values[self.index[from_code]]
+
+    def convert(self, code, amount):
+        """Сумма amount в валюте code во всех валютах (массив в порядке codes)"""
+        return self.values * (amount / self.values[self.index[code]])
+
+    def indicesOf(self, codes):
+        """Позиции валют в массиве курсов; -1 — неизвестная валюта"""
+        return codeIndices(self.index, codes)
+
+    def convertIndexed(self, amounts, from_indices, to_indices):
+        """Пересчёт массива сумм: amounts[k] из валюты from_indices[k] в to_indices[k].
+
+        Для неизвестных валют (индекс -1) результат — NaN.
+        """
+        amounts = np.asarray(amounts, dtype=np.float64)
+        unknown = (from_indices < 0) | (to_indices < 0)
+        result = amounts * self.values[to_indices] / self.values[from_indices]
+        result[unknown] = np.nan
+        return result
@@ -1,164 +1,181 @@
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton
-from PyQt5.QtNetwork import QNetworkAccessManager, QNetworkRequest
-from PyQt5.QtCore import QUrl
-import json
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QFormLayout, QScrollArea, QLabel, QLineEdit, QPushButton,
+    QCheckBox, QDateEdit
+)
+from PyQt5.QtCore import QDate
+import time
+
+import numpy as np
+
+from conversion import RateVector
+
+# Эти валюты показываются первыми, остальные — по алфавиту
+PINNED_CURRENCIES = ['USD', 'EUR', 'RUB']
+CURRENCY_NAMES = {'USD': 'Доллары', 'EUR': 'Евро', 'RUB': 'Рубли'}
 
 
 class CurrencyConverterWidget(QWidget):
-    def __init__(self, usd_signals, eur_signals, rub_signals, common_signals):
+    def __init__(self, common_signals, rate_store):
         super().__init__()
-        self.usd_signals = usd_signals
-        self.eur_signals = eur_signals
-        self.rub_signals = rub_signals
         self.common_signals = common_signals
-        self.rates = {}
+        self.rate_store = rate_store
+        self.rate_vector = None
+        self.inputs = {}  # код валюты -> QLineEdit
+        self.order = []  # поля ввода в порядке массива курсов
+        self.last_edit = None  # (код, сумма) последнего ввода — пересчитывается при новых курсах
         self.updating = False
-        self.network_manager = QNetworkAccessManager()
         self.initUI()
         self.setupSignals()
-        self.updateRatesFromAPI()  # Автоматическая загрузка при запуске
+        # Сохранённые курсы доступны сразу, из сети они обновляются в фоне
+        self.rate_store.start()
 
     def initUI(self):
         self.setWindowTitle('Конвертер валют')
 
         layout = QVBoxLayout()
 
-        self.usd_label = QLabel('Доллары (USD):')
-        self.usd_input = QLineEdit()
-
-        self.eur_label = QLabel('Евро (EUR):')
-        self.eur_input = QLineEdit()
-
-        self.rub_label = QLabel('Рубли (RUB):')
-        self.rub_input = QLineEdit()
+        # Пересчёт по курсам на прошедшую дату из истории курсов
+        as_of_layout = QHBoxLayout()
+        self.as_of_checkbox = QCheckBox('Курсы на дату:')
+        self.as_of_edit = QDateEdit(QDate.currentDate())
+        self.as_of_edit.setCalendarPopup(True)
+        self.as_of_edit.setDisplayFormat('dd.MM.yyyy')
+        self.as_of_edit.setEnabled(False)
+        as_of_layout.addWidget(self.as_of_checkbox)
+        as_of_layout.addWidget(self.as_of_edit, 1)
+        layout.addLayout(as_of_layout)
+        self.updateHistoryRange()
+
+        # Поля валют строятся по списку курсов (buildInputs)
+        self.fields_widget = QWidget()
+        self.fields_layout = QFormLayout(self.fields_widget)
+        self.scroll_area = QScrollArea()
+        self.scroll_area.setWidgetResizable(True)
+        self.scroll_area.setWidget(self.fields_widget)
 
         self.clear_button = QPushButton('Очистить все поля')
 
-        layout.addWidget(self.usd_label)
-        layout.addWidget(self.usd_input)
-        layout.addWidget(self.eur_label)
-        layout.addWidget(self.eur_input)
-        layout.addWidget(self.rub_label)
-        layout.addWidget(self.rub_input)
+        self.rates_label = QLabel('Курсы загружаются...')
+
+        layout.addWidget(self.scroll_area)
         layout.addWidget(self.clear_button)
+        layout.addWidget(self.rates_label)
 
         self.setLayout(layout)
+        self.buildInputs(PINNED_CURRENCIES)
+
+    def buildInputs(self, codes):
+        """Создаёт по полю ввода на валюту: сначала PINNED_CURRENCIES, затем по алфавиту"""
+        while self.fields_layout.rowCount():
+            self.fields_layout.removeRow(0)
+        self.inputs = {}
+
+        ordered = [code for code in PINNED_CURRENCIES if code in codes]
+        ordered += sorted(code for code in codes if code not in PINNED_CURRENCIES)
+        for code in ordered:
+            name = CURRENCY_NAMES.get(code)
+            line_edit = QLineEdit()
+            line_edit.textChanged.connect(lambda text, code=code: self.onAmountEdited(code, text))
+            self.fields_layout.addRow(f'{name} ({code}):' if name else f'{code}:', line_edit)
+            self.inputs[code] = line_edit
 
     def setupSignals(self):
-        self.usd_signals.usd_changed.connect(self.updateEurRub)
-        self.eur_signals.eur_changed.connect(self.updateUsdRub)
-        self.rub_signals.rub_changed.connect(self.updateUsdEur)
+        self.common_signals.amount_changed.connect(self.updateAmounts)
         self.common_signals.clear_all.connect(self.onClearAll)
         self.common_signals.rates_updated.connect(self.onRatesUpdated)
 
-        self.usd_input.textChanged.connect(self.onUsdChanged)
-        self.eur_input.textChanged.connect(self.onEurChanged)
-        self.rub_input.textChanged.connect(self.onRubChanged)
-
         self.clear_button.clicked.connect(self.onClearClicked)
 
-    def updateRatesFromAPI(self):
-        url = "https://api.exchangerate-api.com/v4/latest/USD"
-        request = QNetworkRequest(QUrl(url))
-        self.network_manager.get(request)
-        self.network_manager.finished.connect(self.onAPIResponse)
-
-    def onAPIResponse(self, reply):
-        error = reply.error()
-        if error == reply.NoError:
-            data = json.loads(reply.readAll().data())
-            rates = data.get('rates', {})
-
-            # База — USD, курсы к нему
-            usd_to_eur = rates.get('EUR', 0)
-            usd_to_rub = rates.get('RUB', 0)
-
-            # Обратные курсы
-            eur_to_usd = 1 / usd_to_eur if usd_to_eur else 0
-            rub_to_usd = 1 / usd_to_rub if usd_to_rub else 0
-
-            # Курсы "евро к рублю" и "рубль к евро"
-            eur_to_rub = usd_to_rub / usd_to_eur if usd_to_eur else 0
-            rub_to_eur = 1 / eur_to_rub if eur_to_rub else 0
-
-            self.rates = {
-                'usd_to_eur': usd_to_eur,
-                'usd_to_rub': usd_to_rub,
-                'eur_to_usd': eur_to_usd,
-                'eur_to_rub': eur_to_rub,
-                'rub_to_usd': rub_to_usd,
-                'rub_to_eur': rub_to_eur
-            }
-            self.common_signals.rates_updated.emit(self.rates)
-        else:
-            print("Ошибка при загрузке курсов:", reply.errorString())
+        self.as_of_checkbox.toggled.connect(self.onAsOfToggled)
+        self.as_of_edit.dateChanged.connect(self.applyAsOfRates)
 
-    def onRatesUpdated(self, new_rates):
-        self.rates = new_rates
+        self.rate_store.rates_changed.connect(self.applyRates)
+        self.rate_store.refresh_failed.connect(self.onRatesError)
 
-    def onUsdChanged(self, text):
-        if self.updating or not self.rates:
-            return
-        try:
-            value = float(text)
-        except ValueError:
+    def applyRates(self, rates, fetched_at):
+        # Новый снимок мог попасть в историю — расширяем диапазон дат
+        self.updateHistoryRange()
+        if self.as_of_checkbox.isChecked():
             return
-        self.usd_signals.usd_changed.emit(value)
-
-    def onEurChanged(self, text):
-        if self.updating or not self.rates:
+        self.common_signals.rates_updated.emit(RateVector.fromRates(rates))
+        self.rates_label.setText('Курсы от ' + time.strftime('%d.%m.%Y %H:%M', time.localtime(fetched_at)))
+
+    def updateHistoryRange(self):
+        history = self.rate_store.history
+        date_range = history.dateRange() if history is not None else None
+        self.as_of_checkbox.setEnabled(date_range is not None)
+        if date_range is not None:
+            # До первого снимка курсов нет, после последнего действует последний
+            self.as_of_edit.setMinimumDate(QDate(date_range[0]))
+
+    def onAsOfToggled(self, checked):
+        self.as_of_edit.setEnabled(checked)
+        if checked:
+            self.applyAsOfRates()
+        elif self.rate_store.rates:
+            self.applyRates(self.rate_store.rates, self.rate_store.fetched_at)
+
+    def applyAsOfRates(self):
+        if not self.as_of_checkbox.isChecked():
             return
         try:
-            value = float(text)
-        except ValueError:
+            snapshot_date, rate_vector = self.rate_store.history.asOf(self.as_of_edit.date().toPyDate())
+        except LookupError as error:
+            self.rates_label.setText(str(error))
             return
-        self.eur_signals.eur_changed.emit(value)
+        self.common_signals.rates_updated.emit(rate_vector)
+        self.rates_label.setText('Курсы на ' + snapshot_date.strftime('%d.%m.%Y'))
 
-    def onRubChanged(self, text):
-        if self.updating or not self.rates:
+    def onRatesError(self, message):
+        print("Ошибка при загрузке курсов:", message)
+        if self.rate_vector is not None:
+            self.rates_label.setText(self.rates_label.text() + ' (обновить не удалось)')
+        else:
+            self.rates_label.setText('Не удалось загрузить курсы')
+
+    def onRatesUpdated(self, rate_vector):
+        codes_changed = self.rate_vector is None or self.rate_vector.codes != rate_vector.codes
+        self.rate_vector = rate_vector
+        if codes_changed:
+            self.buildInputs(rate_vector.codes)
+            # Поля для QLineEdit в порядке массива курсов — для пересчёта без поиска по словарю
+            self.order = [self.inputs[code] for code in rate_vector.codes]
+        if self.last_edit is not None and self.last_edit[0] in rate_vector:
+            code, value = self.last_edit
+            if codes_changed:
+                self.updating = True
+                self.inputs[code].setText(f"{value:g}")
+                self.updating = False
+            self.updateAmounts(code, value)
+
+    def onAmountEdited(self, code, text):
+        if self.updating or self.rate_vector is None:
             return
         try:
             value = float(text)
         except ValueError:
             return
-        self.rub_signals.rub_changed.emit(value)
-
-    def updateEurRub(self, usd_value):
-        if self.updating or not self.rates:
-            return
-        self.updating = True
-        eur = usd_value * self.rates['usd_to_eur']
-        rub = usd_value * self.rates['usd_to_rub']
-        self.eur_input.setText(f"{eur:.2f}")
-        self.rub_input.setText(f"{rub:.2f}")
-        self.updating = False
-
-    def updateUsdRub(self, eur_value):
-        if self.updating or not self.rates:
-            return
-        self.updating = True
-        usd = eur_value * self.rates['eur_to_usd']
-        rub = eur_value * self.rates['eur_to_rub']
-        self.usd_input.setText(f"{usd:.2f}")
-        self.rub_input.setText(f"{rub:.2f}")
-        self.updating = False
+        self.last_edit = (code, value)
+        self.common_signals.amount_changed.emit(code, value)
 
-    def updateUsdEur(self, rub_value):
-        if self.updating or not self.rates:
+    def updateAmounts(self, code, value):
+        """Пересчитывает сумму из валюты code во все остальные одним векторным умножением"""
+        if self.updating or self.rate_vector is None:
             return
         self.updating = True
-        usd = rub_value * self.rates['rub_to_usd']
-        eur = rub_value * self.rates['rub_to_eur']
-        self.usd_input.setText(f"{usd:.2f}")
-        self.eur_input.setText(f"{eur:.2f}")
+        amounts = np.char.mod('%.2f', self.rate_vector.convert(code, value))
+        source = self.rate_vector.index[code]
+        for i, line_edit in enumerate(self.order):
+            if i != source:
+                line_edit.setText(amounts[i])
         self.updating = False
 
     def onClearAll(self):
         self.updating = True
-        self.usd_input.clear()
-        self.eur_input.clear()
-        self.rub_input.clear()
+        for line_edit in self.inputs.values():
+            line_edit.clear()
+        self.last_edit = None
         self.updating = False
 
     def onClearClicked(self):
-        self.common_signals.clear_all.emit()
\ No newline at end of file
+        self.common_signals.clear_all.emit()
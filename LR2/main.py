@@ -2,24 +2,24 @@ import sys
 from PyQt5.QtWidgets import QApplication
 
 # Импортируем все сигналы в main.py
-from usd_signals import UsdSignals
-from eur_signals import EurSignals
-from rub_signals import RubSignals
 from common_signals import CommonSignals
 from currency_converter import CurrencyConverterWidget
+from rate_store import RateStore
+from rate_history import RateHistory
 
 
 def main():
     app = QApplication(sys.argv)
 
-    # Создаём экземпляры сигналов
-    usd_signals = UsdSignals()
-    eur_signals = EurSignals()
-    rub_signals = RubSignals()
+    # Создаём экземпляр сигналов
     common_signals = CommonSignals()
 
-    # Создаём виджет и передаём ему все сигналы
-    converter = CurrencyConverterWidget(usd_signals, eur_signals, rub_signals, common_signals)
+    # Хранилище курсов: сохранённые в файле курсы + обновление из сети по истечении срока;
+    # каждый полученный снимок дописывается в историю курсов
+    rate_store = RateStore(history=RateHistory())
+
+    # Создаём виджет и передаём ему сигналы и хранилище курсов
+    converter = CurrencyConverterWidget(common_signals, rate_store)
 
     converter.show()
 
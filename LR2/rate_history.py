@@ -0,0 +1,173 @@
+import datetime
+import json
+import os
+
+import numpy as np
+
+from conversion import BASE_CURRENCY, RateVector, codeIndices
+
+# Файлы истории курсов: <путь>.json (валюты), <путь>.dates (даты), <путь>.rates (курсы)
+RATES_HISTORY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rates_history')
+
+
+def toDay(date):
+    """Номер дня (от 1970-01-01) из datetime.date или строки 'ГГГГ-ММ-ДД'"""
+    return int(np.datetime64(date, 'D').astype(np.int64))
+
+
+def fromDay(day):
+    return datetime.date(1970, 1, 1) + datetime.timedelta(days=int(day))
+
+
+class RateHistory:
+    """История курсов на диске: по строке курсов фиксированной ширины на дату.
+
+    Даты (int64, номера дней по возрастанию) и курсы (float64, строка — дата,
+    столбец — валюта из codes) лежат в отдельных файлах и читаются через
+    memmap, поэтому в памяти не держатся, а курс на дату ищется бинарным
+    поиском за O(log n). Валюты, которых не было в снимке, — NaN.
+    """
+
+    def __init__(self, path=RATES_HISTORY_PATH):
+        self.path = path
+        self.codes = []
+        self.index = {}
+        self.base = BASE_CURRENCY
+        self._dates = None
+        self._matrix = None
+        try:
+            with open(path + '.json', encoding='utf-8') as file:
+                meta = json.load(file)
+            self.codes = list(meta['codes'])
+            self.base = meta.get('base', BASE_CURRENCY)
+        except (OSError, ValueError, KeyError):
+            pass
+        self.index = {code: i for i, code in enumerate(self.codes)}
+
+    def __len__(self):
+        return len(self.dates)
+
+    @property
+    def dates(self):
+        if self._dates is None:
+            self.openArrays()
+        return self._dates
+
+    @property
+    def matrix(self):
+        if self._matrix is None:
+            self.openArrays()
+        return self._matrix
+
+    def openArrays(self):
+        width = len(self.codes)
+        count = 0
+        if width:
+            try:
+                count = min(os.path.getsize(self.path + '.dates') // 8,
+                            os.path.getsize(self.path + '.rates') // (8 * width))
+            except OSError:
+                count = 0
+        if count == 0:
+            self._dates = np.empty(0, dtype='<i8')
+            self._matrix = np.empty((0, width), dtype='<f8')
+            return
+        # Строк — по меньшему из файлов: запись, прерванная между ними, не читается
+        self._dates = np.memmap(self.path + '.dates', dtype='<i8', mode='r', shape=(count,))
+        self._matrix = np.memmap(self.path + '.rates', dtype='<f8', mode='r', shape=(count, width))
+
+    def closeArrays(self):
+        self._dates = None
+        self._matrix = None
+
+    def dateRange(self):
+        """(первая, последняя) дата истории или None, если она пуста"""
+        if not len(self):
+            return None
+        return fromDay(self.dates[0]), fromDay(self.dates[-1])
+
+    def append(self, date, rates):
+        """Добавляет снимок курсов ({'EUR': 0.92, ...}) на дату; снимок той же даты заменяется"""
+        vector = RateVector.fromRates(rates, self.base)
+        day = toDay(date)
+        new_codes = [code for code in vector.codes if code not in self.index]
+        if new_codes:
+            self.widen(new_codes)
+
+        row = np.full(len(self.codes), np.nan, dtype='<f8')
+        row[[self.index[code] for code in vector.codes]] = vector.values
+
+        dates = self.dates
+        position = int(np.searchsorted(dates, day))
+        if position < len(dates) and dates[position] == day:
+            # Снимок этой даты уже есть — перезаписываем строку на месте
+            self.closeArrays()
+            with open(self.path + '.rates', 'r+b') as file:
+                file.seek(position * row.nbytes)
+                file.write(row.tobytes())
+        elif position == len(dates):
+            # Обычный случай — новая дата позже всех: дописываем в конец
+            self.closeArrays()
+            with open(self.path + '.rates', 'ab') as file:
+                file.write(row.tobytes())
+            with open(self.path + '.dates', 'ab') as file:
+                file.write(np.array([day], dtype='<i8').tobytes())
+        else:
+            # Снимок задним числом — вставка с перезаписью файлов
+            self.rewrite(np.insert(np.asarray(dates), position, day),
+                         np.insert(np.asarray(self.matrix), position, row, axis=0))
+
+    def widen(self, new_codes):
+        """Добавляет столбцы новых валют (NaN в старых строках)"""
+        matrix = np.asarray(self.matrix)
+        dates = np.asarray(self.dates)
+        self.codes = self.codes + new_codes
+        self.index = {code: i for i, code in enumerate(self.codes)}
+        wider = np.full((len(dates), len(self.codes)), np.nan, dtype='<f8')
+        wider[:, :matrix.shape[1]] = matrix
+        self.rewrite(dates, wider)
+
+    def rewrite(self, dates, matrix):
+        self.closeArrays()
+        for suffix, data in (('.rates', matrix), ('.dates', dates)):
+            with open(self.path + suffix + '.tmp', 'wb') as file:
+                file.write(np.ascontiguousarray(data, dtype='<f8' if suffix == '.rates' else '<i8').tobytes())
+            os.replace(self.path + suffix + '.tmp', self.path + suffix)
+        with open(self.path + '.json.tmp', 'w', encoding='utf-8') as file:
+            json.dump({'base': self.base, 'codes': self.codes}, file)
+        os.replace(self.path + '.json.tmp', self.path + '.json')
+
+    def rowsAsOf(self, days):
+        """Строки с последним снимком не позже каждой из дат (массив номеров дней); -1 — раньше истории"""
+        return np.searchsorted(self.dates, days, side='right') - 1
+
+    def asOf(self, date):
+        """(дата снимка, RateVector) — курсы на дату date по последнему снимку не позже неё"""
+        row = int(self.rowsAsOf(toDay(date)))
+        if row < 0:
+            raise LookupError(f"Нет курсов на {date}")
+        values = np.asarray(self.matrix[row])
+        known = ~np.isnan(values)
+        codes = [code for code, ok in zip(self.codes, known) if ok]
+        return fromDay(self.dates[row]), RateVector(codes, values[known])
+
+    def indicesOf(self, codes):
+        """Столбцы валют в истории; -1 — неизвестная валюта"""
+        return codeIndices(self.index, codes)
+
+    def convertIndexed(self, amounts, rows, from_indices, to_indices):
+        """Пересчёт массива сумм, каждой — по курсам своей строки rows (см. rowsAsOf).
+
+        NaN — если валюта неизвестна, дата раньше истории или курса в снимке не было.
+        """
+        amounts = np.asarray(amounts, dtype=np.float64)
+        unknown = (rows < 0) | (from_indices < 0) | (to_indices < 0)
+        rows = np.where(unknown, 0, rows)
+        from_indices = np.where(unknown, 0, from_indices)
+        to_indices = np.where(unknown, 0, to_indices)
+        if not len(self):
+            return np.full(len(amounts), np.nan)
+        matrix = self.matrix
+        result = amounts * matrix[rows, to_indices] / matrix[rows, from_indices]
+        result[unknown] = np.nan
+        return result
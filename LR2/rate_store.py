@@ -0,0 +1,139 @@
+import datetime
+import json
+import os
+import time
+
+from PyQt5.QtNetwork import QNetworkAccessManager, QNetworkRequest, QNetworkReply
+from PyQt5.QtCore import QObject, QUrl, pyqtSignal
+
+from conversion import RATES_CACHE_PATH
+
+# Источник курсов; для проверки можно подставить локальный сервер (rates_server.py)
+RATES_URL = os.environ.get('RATES_URL', 'https://api.exchangerate-api.com/v4/latest/USD')
+# Сколько секунд сохранённые курсы считаются свежими
+RATES_TTL = 6 * 60 * 60
+
+
+class RateStore(QObject):
+    """Хранилище курсов: последние курсы сохраняются в файл вместе со временем получения.
+
+    При запуске курсы читаются из файла сразу, а из сети обновляются в фоне
+    только по истечении TTL — условным запросом (If-None-Match / If-Modified-Since),
+    поэтому неизменившиеся курсы не скачиваются заново (ответ 304).
+    Каждый полученный снимок дописывается в историю курсов (RateHistory), если она задана.
+    """
+
+    rates_changed = pyqtSignal(dict, float)  # курсы к базовой валюте, время получения
+    refresh_failed = pyqtSignal(str)
+
+    def __init__(self, path=RATES_CACHE_PATH, url=RATES_URL, ttl=RATES_TTL, history=None, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.history = history
+        self.url = url
+        self.ttl = ttl
+        self.rates = {}
+        self.fetched_at = 0.0
+        self.etag = None
+        self.last_modified = None
+        self.reply = None
+        self.network_manager = QNetworkAccessManager(self)
+
+    def start(self):
+        """Отдаёт сохранённые курсы (если есть) и при необходимости обновляет их из сети"""
+        if self.loadCached():
+            # История начинается с уже сохранённого снимка
+            if self.history is not None and not len(self.history):
+                self.addToHistory(datetime.date.fromtimestamp(self.fetched_at))
+            self.rates_changed.emit(self.rates, self.fetched_at)
+        if self.isExpired():
+            self.refresh()
+
+    def loadCached(self):
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return False
+        # Курсы из другого источника не подходят
+        if data.get('url') != self.url or not data.get('rates'):
+            return False
+        self.rates = data['rates']
+        self.fetched_at = data.get('fetched_at', 0.0)
+        self.etag = data.get('etag')
+        self.last_modified = data.get('last_modified')
+        return True
+
+    def save(self):
+        data = {
+            'url': self.url,
+            'rates': self.rates,
+            'fetched_at': self.fetched_at,
+            'etag': self.etag,
+            'last_modified': self.last_modified,
+        }
+        # Через временный файл, чтобы прерванная запись не испортила сохранённые курсы
+        temp_path = self.path + '.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump(data, file)
+            os.replace(temp_path, self.path)
+        except OSError as error:
+            print("Не удалось сохранить курсы:", error)
+
+    def isExpired(self):
+        return not self.rates or time.time() - self.fetched_at >= self.ttl
+
+    def refresh(self):
+        if self.reply is not None:
+            return
+        request = QNetworkRequest(QUrl(self.url))
+        # Условный запрос имеет смысл, только если есть что не скачивать заново
+        if self.rates:
+            if self.etag:
+                request.setRawHeader(b'If-None-Match', self.etag.encode())
+            if self.last_modified:
+                request.setRawHeader(b'If-Modified-Since', self.last_modified.encode())
+        self.reply = self.network_manager.get(request)
+        self.reply.finished.connect(self.onReplyFinished)
+
+    def onReplyFinished(self):
+        reply = self.reply
+        self.reply = None
+        reply.deleteLater()
+
+        if reply.error() != QNetworkReply.NoError:
+            self.refresh_failed.emit(reply.errorString())
+            return
+
+        status = reply.attribute(QNetworkRequest.HttpStatusCodeAttribute)
+        if status == 304:
+            # Курсы не изменились — продлеваем срок сохранённых
+            self.fetched_at = time.time()
+            self.save()
+            self.rates_changed.emit(self.rates, self.fetched_at)
+            return
+
+        try:
+            data = json.loads(reply.readAll().data())
+            rates = data['rates']
+        except (ValueError, KeyError, TypeError) as error:
+            self.refresh_failed.emit(f"Некорректный ответ: {error}")
+            return
+
+        self.rates = rates
+        self.fetched_at = time.time()
+        self.etag = bytes(reply.rawHeader(b'ETag')).decode() or None
+        self.last_modified = bytes(reply.rawHeader(b'Last-Modified')).decode() or None
+        self.save()
+        # Дата снимка — из ответа API, иначе — день получения
+        self.addToHistory(data.get('date') or datetime.date.fromtimestamp(self.fetched_at))
+        self.rates_changed.emit(self.rates, self.fetched_at)
+
+    def addToHistory(self, date):
+        if self.history is None:
+            return
+        try:
+            self.history.append(date, self.rates)
+        except (OSError, ValueError) as error:
+            print("Не удалось сохранить курсы в историю:", error)
@@ -0,0 +1,76 @@
+"""Локальный сервер курсов для проверки конвертера без доступа к API.
+
+Отдаёт документ в формате ExchangeRate-API с ETag и Last-Modified и отвечает
+304 на условные запросы, если курсы не изменились.
+
+    python rates_server.py --port 8000
+    RATES_URL=http://127.0.0.1:8000/v4/latest/USD python main.py
+"""
+import argparse
+import json
+import time
+import zlib
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RATES = {'USD': 1, 'EUR': 0.92, 'RUB': 91.5}
+
+
+class RatesHandler(BaseHTTPRequestHandler):
+    rates = RATES
+    updated = time.time()
+    # Задержка ответа в секундах — имитация медленной сети
+    delay = 0.0
+
+    def do_GET(self):
+        time.sleep(self.delay)
+        etag = '"%08x"' % zlib.crc32(json.dumps(self.rates, sort_keys=True).encode())
+        last_modified = formatdate(self.updated, usegmt=True)
+
+        if self.notModified(etag):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        body = json.dumps({
+            'base': 'USD',
+            'date': time.strftime('%Y-%m-%d', time.gmtime(self.updated)),
+            'time_last_updated': int(self.updated),
+            'rates': self.rates,
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', last_modified)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def notModified(self, etag):
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            return etag in [tag.strip() for tag in if_none_match.split(',')]
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since is not None:
+            try:
+                return parsedate_to_datetime(if_modified_since).timestamp() >= int(self.updated)
+            except (TypeError, ValueError):
+                return False
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Локальный сервер курсов валют')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--delay', type=float, default=0.0, help='задержка ответа, с')
+    args = parser.parse_args()
+
+    RatesHandler.delay = args.delay
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), RatesHandler)
+    print(f'Курсы: http://127.0.0.1:{args.port}/v4/latest/USD')
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+"""Бенчмарк окна LR3 без дисплея (Qt offscreen) на БД разного размера.
+
+Каждый масштаб измеряется в отдельном процессе, чтобы пиковый RSS относился
+только к нему. Результаты пишутся в JSON.
+
+    python benchmark.py --scales 1e2 1e4 1e5 --output bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+# Платформа должна быть задана до создания QApplication
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+BENCH_DIR = "bench_data"
+
+
+def current_rss_kb():
+    """Текущий RSS процесса в КБ (Linux: /proc/self/statm)"""
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError):
+        return None
+
+
+def peak_rss_kb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS отдаёт байты, Linux — килобайты
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def rate(rows, seconds):
+    return round(rows / seconds, 1) if seconds > 0 else None
+
+
+def wait_until(app, predicate, timeout):
+    """Обрабатывает события Qt, пока predicate() не станет истинным"""
+    from PyQt5.QtCore import QEventLoop
+
+    deadline = time.perf_counter() + timeout
+    while not predicate():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("превышено время ожидания результата запроса")
+        app.processEvents(QEventLoop.AllEvents, 50)
+        time.sleep(0.0005)
+
+
+def measure_tab(app, window, tab_index, action, max_rows, timeout):
+    """Замеряет выполнение запроса, догрузку строк и подгонку ширины столбцов"""
+    table_view = window.tabs[tab_index]
+    rss_before = current_rss_kb()
+
+    started = time.perf_counter()
+    action()
+    model = table_view.model()
+    wait_until(app, lambda: not model.is_loading(), timeout)
+    executed = time.perf_counter()
+    first_rows = model.loaded_row_count()
+
+    # Догружаем результат так же, как это делает прокрутка до конца
+    while model.canFetchMore() and model.loaded_row_count() < max_rows:
+        model.fetchMore()
+        wait_until(app, lambda: not model.is_loading(), timeout)
+    populated = time.perf_counter()
+    total_rows = model.loaded_row_count()
+
+    table_view.resizeColumnsToContents()
+    resized = time.perf_counter()
+
+    return {
+        "execute_s": round(executed - started, 6),
+        "execute_rows": first_rows,
+        "execute_rows_per_s": rate(first_rows, executed - started),
+        "populate_s": round(populated - executed, 6),
+        "populate_rows": total_rows - first_rows,
+        "populate_rows_per_s": rate(total_rows - first_rows, populated - executed),
+        "resize_s": round(resized - populated, 6),
+        "total_rows": total_rows,
+        "complete": model.is_complete(),
+        "rss_delta_kb": (current_rss_kb() - rss_before) if rss_before is not None else None,
+    }
+
+
+def select_column(window, table, column):
+    window.tables_combo.setCurrentIndex(window.catalog.table_names().index(table) + 1)
+    window.columns_combo.setCurrentIndex(window.catalog.columns(table).index(column) + 1)
+
+
+def check_database(database_path):
+    """Проверяет, что файл открывается как БД; иначе завершает процесс с ошибкой.
+
+    Окно сообщает об ошибке подключения модальным диалогом, который без
+    дисплея некому закрыть, — поэтому проверяем до открытия.
+    """
+    import sqlite3
+
+    if not os.path.isfile(database_path):
+        sys.exit(f"Нет файла БД: {database_path}")
+    try:
+        connection = sqlite3.connect(f"file:{database_path}?mode=ro", uri=True)
+        try:
+            connection.execute("PRAGMA schema_version").fetchone()
+        finally:
+            connection.close()
+    except sqlite3.Error as error:
+        sys.exit(f"Не удалось открыть БД {database_path}: {error}")
+
+
+def run_single(database_path, max_rows, timeout):
+    """Замеры для одной БД (выполняется в дочернем процессе)"""
+    from PyQt5.QtWidgets import QApplication
+
+    check_database(database_path)
+
+    app = QApplication([sys.argv[0]])
+
+    import main
+    from result_cache import ResultCache
+
+    window = main.MainWindow()
+    # Кэш выключен: измеряем холодный путь запроса
+    window.result_cache = ResultCache(0)
+    window.show()
+
+    results = {}
+
+    started = time.perf_counter()
+    if not window.open_database(database_path):
+        sys.exit(f"Не удалось открыть БД {database_path}")
+    connected = time.perf_counter()
+    tab1_model = window.tabs[0].model()
+    wait_until(app, lambda: not tab1_model.is_loading(), timeout)
+    results["connect"] = {
+        "open_s": round(connected - started, 6),
+        "first_tab_s": round(time.perf_counter() - started, 6),
+    }
+
+    window.catalog.clear()
+    started = time.perf_counter()
+    window.load_columns_list()
+    results["load_columns_list"] = {
+        "seconds": round(time.perf_counter() - started, 6),
+        "tables": len(window.catalog.tables),
+    }
+
+    scenarios = [
+        ("setup_tab1", 0, window.setup_tab1),
+        ("b1", 1, window.execute_b1_query),
+        ("column_select", 2, lambda: select_column(window, "orders", "total")),
+        ("b2", 3, window.execute_b2_query),
+        ("b3", 4, window.execute_b3_query),
+        ("scan_orders", 1, lambda: window.display_query_results("SELECT * FROM orders", 1)),
+        ("scan_users", 3, lambda: window.display_query_results("SELECT * FROM users", 3)),
+    ]
+    for name, tab_index, action in scenarios:
+        results[name] = measure_tab(app, window, tab_index, action, max_rows, timeout)
+
+    window.close()
+    results["peak_rss_kb"] = peak_rss_kb()
+    return results
+
+
+def ensure_database(data_dir, scale, seed):
+    """Генерирует БД нужного масштаба (или берёт уже сгенерированную)"""
+    import fill_db
+
+    os.makedirs(data_dir, exist_ok=True)
+    # Абсолютный путь: дочерний процесс работает в каталоге LR3, а не в текущем
+    path = os.path.abspath(os.path.join(data_dir, f"bench_{scale:g}_{seed}.sqlite"))
+    if not os.path.exists(path):
+        print(f"Генерация {path}...", file=sys.stderr)
+        fill_db.generate_database(path, scale, seed)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарк LR3 SQL App (Qt offscreen)")
+    parser.add_argument("--scales", type=float, nargs="+", default=[1e2, 1e3, 1e4],
+                        help="коэффициенты масштаба fill_db.py (1 ≈ 70 строк)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", default=BENCH_DIR, help="каталог для сгенерированных БД")
+    parser.add_argument("--max-rows", type=int, default=1_000_000,
+                        help="сколько строк догружать в сценариях с полным сканированием")
+    parser.add_argument("--timeout", type=float, default=600.0, help="таймаут одного запроса, с")
+    parser.add_argument("-o", "--output", default="bench_results.json")
+    parser.add_argument("--child", metavar="DB", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        json.dump(run_single(args.child, args.max_rows, args.timeout), sys.stdout)
+        return 0
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "max_rows": args.max_rows,
+        "runs": [],
+    }
+    for scale in args.scales:
+        path = ensure_database(args.data_dir, scale, args.seed)
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", path,
+             "--max-rows", str(args.max_rows), "--timeout", str(args.timeout)],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stdout=subprocess.PIPE, text=True,
+        )
+        if completed.returncode != 0:
+            # Причину дочерний процесс уже вывел в stderr
+            print(f"scale={scale:g}: замер не удался (код {completed.returncode})", file=sys.stderr)
+            return 1
+        results = json.loads(completed.stdout)
+        report["runs"].append({"scale": scale, "database": path, "results": results})
+
+        scan = results["scan_orders"]
+        print(f"scale={scale:g}: scan_orders {scan['total_rows']} строк, "
+              f"execute {scan['execute_s']:.3f} с, populate {scan['populate_rows_per_s']} строк/с, "
+              f"resize {scan['resize_s']:.3f} с, peak RSS {results['peak_rss_kb']} КБ")
+
+    with open(args.output, "w", encoding="utf-8") as output:
+        json.dump(report, output, ensure_ascii=False, indent=2)
+    print(f"Результаты записаны в {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
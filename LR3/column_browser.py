@@ -0,0 +1,254 @@
+from PyQt5.QtWidgets import QWidget, QHBoxLayout, QPushButton, QLineEdit, QLabel, QComboBox
+from PyQt5.QtCore import pyqtSignal
+
+from large_values import LargeValuePreview
+from schema_catalog import quote_identifier
+
+# Размер страницы не больше порции исполнителя: страница приходит одним пакетом
+PAGE_SIZES = (50, 100, 200)
+
+
+class ColumnBrowser(QWidget):
+    """Панель постраничного просмотра колонки (Tab3).
+
+    Страницы выбираются по ключу (rowid или одностолбцовый первичный ключ):
+    WHERE key > ? ORDER BY key LIMIT ? — поиск по B-дереву, поэтому любая
+    страница загружается за одно и то же время независимо от её номера.
+    Для представлений и составных ключей используется LIMIT/OFFSET.
+    """
+
+    page_requested = pyqtSignal(str, object)      # запрос страницы, параметры
+    prefetch_requested = pyqtSignal(str, object)  # соседняя страница для кэша (ответ — prefetch_loaded)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.table = None
+        self.column = None
+        self.key = None  # None — режим OFFSET
+        self.first_key = None
+        self.last_key = None
+        self.has_prev = False
+        self.has_next = False
+        self._request = None  # (направление, ключ) запрошенной страницы
+        # (направление, ключ) соседних страниц: обычно от границ текущей, а у пустой — от её ключа
+        self._prev_request = None
+        self._next_request = None
+
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.prev_btn = QPushButton("◀ Назад")
+        self.prev_btn.clicked.connect(self.prev_page)
+        layout.addWidget(self.prev_btn)
+
+        self.next_btn = QPushButton("Вперёд ▶")
+        self.next_btn.clicked.connect(self.next_page)
+        layout.addWidget(self.next_btn)
+
+        self.key_edit = QLineEdit()
+        self.key_edit.setPlaceholderText("Ключ...")
+        self.key_edit.returnPressed.connect(self.jump_to_key)
+        layout.addWidget(self.key_edit)
+
+        self.jump_btn = QPushButton("Перейти")
+        self.jump_btn.clicked.connect(self.jump_to_key)
+        layout.addWidget(self.jump_btn)
+
+        self.page_size_combo = QComboBox()
+        self.page_size_combo.addItems([str(size) for size in PAGE_SIZES])
+        self.page_size_combo.setCurrentIndex(1)
+        self.page_size_combo.currentIndexChanged.connect(self.reload)
+        layout.addWidget(self.page_size_combo)
+
+        self.info_label = QLabel()
+        layout.addWidget(self.info_label, 1)
+
+        self.update_controls()
+
+    @property
+    def page_size(self):
+        return PAGE_SIZES[self.page_size_combo.currentIndex()]
+
+    def set_column(self, table_info, column):
+        """Начать просмотр колонки column таблицы table_info с первой страницы"""
+        self.table = table_info.name
+        self.column = column
+        self.key = None
+        if table_info.has_rowid:
+            self.key = "rowid"
+        else:
+            pk_columns = [info.name for info in table_info.columns if info.pk]
+            if len(pk_columns) == 1:
+                self.key = pk_columns[0]
+        self.show_first_page()
+
+    def clear(self):
+        self.table = None
+        self.column = None
+        self._request = None
+        self.has_prev = self.has_next = False
+        self.update_controls()
+
+    def show_first_page(self):
+        self._load("first", None)
+
+    def reload(self):
+        if self.table is not None:
+            self.show_first_page()
+
+    def refresh(self):
+        """Перечитать текущую страницу (например, после изменения БД)"""
+        if self.table is not None and self._request is not None:
+            self._load(*self._request)
+
+    def next_page(self):
+        if self.has_next:
+            self._load(*self._next_request)
+
+    def prev_page(self):
+        if self.has_prev:
+            self._load(*self._prev_request)
+
+    def jump_to_key(self):
+        """Перейти к странице, начинающейся с введённого ключа (или номера строки для OFFSET)"""
+        text = self.key_edit.text().strip()
+        if self.table is None or not text:
+            return
+        try:
+            key = int(text)
+        except ValueError:
+            if self.key is None:
+                return
+            key = text
+        if self.key is None:
+            key = max(key - 1, 0)
+        self._load("from", key)
+
+    def page_query(self, direction, key):
+        """SQL и параметры страницы: direction — first, after, from, before или upto (ключ включительно)"""
+        table = quote_identifier(self.table)
+        column = quote_identifier(self.column)
+        limit = self.page_size
+
+        if self.key is None:
+            if direction == "first":
+                offset = 0
+            elif direction == "after":
+                offset = key + 1
+            elif direction == "before":
+                offset = max(key - limit, 0)
+            elif direction == "upto":
+                offset = max(key + 1 - limit, 0)
+            else:
+                offset = key
+            return f"SELECT {column} FROM {table} LIMIT ? OFFSET ?", (limit, offset)
+
+        key_column = quote_identifier(self.key) if self.key != "rowid" else "rowid"
+        select = f"SELECT {key_column}, {column} FROM {table}"
+        if direction == "first":
+            return f"{select} ORDER BY {key_column} LIMIT ?", (limit,)
+        if direction == "after":
+            return f"{select} WHERE {key_column} > ? ORDER BY {key_column} LIMIT ?", (key, limit)
+        if direction == "from":
+            return f"{select} WHERE {key_column} >= ? ORDER BY {key_column} LIMIT ?", (key, limit)
+        # Предыдущая страница: читаем назад от первого ключа и разворачиваем
+        operator = "<=" if direction == "upto" else "<"
+        return (f"SELECT * FROM ({select} WHERE {key_column} {operator} ? "
+                f"ORDER BY {key_column} DESC LIMIT ?) ORDER BY 1", (key, limit))
+
+    def preview(self):
+        """Превью больших значений колонки: полное значение читается по ключу строки"""
+        if self.key is None:
+            return LargeValuePreview(self.table, [self.column], [0])
+        return LargeValuePreview(self.table, [self.key, self.column], [1], self.key, 0)
+
+    def page_loaded(self, model):
+        """Вызывается, когда страница прочитана целиком: обновить границы и запросить соседей"""
+        if self._request is None:
+            return
+        direction, key = self._request
+        count = model.loaded_row_count()
+        full = count >= self.page_size
+
+        if self.key is None:
+            offset = self.page_query(direction, key)[1][1]
+            self.first_key, self.last_key = offset, offset + max(count - 1, 0)
+            self.has_prev, self.has_next = offset > 0, full
+            self._prev_request = ("before", self.first_key)
+            self._next_request = ("after", self.last_key)
+        elif count:
+            self.first_key, self.last_key = model.row_values(0)[0], model.row_values(count - 1)[0]
+            self.has_prev = direction != "first" and (full or direction not in ("before", "upto"))
+            self.has_next = full or direction in ("before", "upto")
+            self._prev_request = ("before", self.first_key)
+            self._next_request = ("after", self.last_key)
+        else:
+            # Пустая страница (за последней строкой или перед первой): назад или вперёд —
+            # к строкам рядом с запрошенным ключом, иначе панель осталась бы без выхода
+            self.has_prev = direction in ("after", "from")
+            self.has_next = direction in ("before", "upto")
+            self._prev_request = ("upto" if direction == "after" else "before", key)
+            self._next_request = ("after" if direction == "upto" else "from", key)
+        self.update_controls()
+
+        # Соседние страницы читаем заранее — переход по кнопке берёт их из кэша,
+        # а пустой ответ выключает кнопку (страница ровно до конца таблицы)
+        if self.has_next:
+            self.prefetch_requested.emit(*self.page_query(*self._next_request))
+        if self.has_prev:
+            self.prefetch_requested.emit(*self.page_query(*self._prev_request))
+
+    def prefetch_loaded(self, sql, params, count):
+        """Соседняя страница прочитана заранее: если в ней нет строк, туда не переходим"""
+        if self._request is None or count:
+            return
+        if self.has_next and (sql, params) == self.page_query(*self._next_request):
+            self.has_next = False
+        elif self.has_prev and (sql, params) == self.page_query(*self._prev_request):
+            self.has_prev = False
+        else:
+            return
+        self.update_controls()
+
+    def tail_query(self):
+        """Запрос строк, добавленных после последней страницы, или None, если страницу надо перечитать.
+
+        Дописывать можно только последнюю страницу в режиме ключа: новые строки
+        append-only таблицы имеют ключ больше последнего показанного.
+        """
+        if self.table is None or self.key is None or self.has_next or self.last_key is None:
+            return None
+        key_column = quote_identifier(self.key) if self.key != "rowid" else "rowid"
+        return (f"SELECT {key_column}, {quote_identifier(self.column)} FROM {quote_identifier(self.table)} "
+                f"WHERE {key_column} > ? ORDER BY {key_column}", (self.last_key,))
+
+    def rows_appended(self, model):
+        """Новые строки дописаны в конец последней страницы: сдвигаем её последний ключ"""
+        count = model.loaded_row_count()
+        if count:
+            self.last_key = model.row_values(count - 1)[0]
+            self._next_request = ("after", self.last_key)
+        self.update_controls()
+
+    def update_controls(self):
+        active = self.table is not None
+        self.prev_btn.setEnabled(active and self.has_prev)
+        self.next_btn.setEnabled(active and self.has_next)
+        self.key_edit.setEnabled(active)
+        self.jump_btn.setEnabled(active)
+        if not active:
+            self.info_label.setText("")
+        elif self.key is None:
+            self.info_label.setText(f"{self.table}.{self.column}: строки {self.first_key + 1}–{self.last_key + 1}"
+                                    if self.first_key is not None else f"{self.table}.{self.column}")
+        else:
+            self.info_label.setText(f"{self.table}.{self.column}: {self.key} {self.first_key}…{self.last_key}"
+                                    if self.first_key is not None else f"{self.table}.{self.column}")
+
+    def _load(self, direction, key):
+        self._request = (direction, key)
+        self.first_key = self.last_key = None
+        self.has_prev = self.has_next = False
+        self._prev_request = self._next_request = None
+        self.update_controls()
+        self.page_requested.emit(*self.page_query(direction, key))
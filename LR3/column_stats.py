@@ -0,0 +1,311 @@
+import heapq
+import math
+import random
+import sqlite3
+import threading
+from collections import Counter
+
+from PyQt5.QtCore import Qt, QObject, QThread, pyqtSignal, pyqtSlot
+
+from schema_catalog import quote_identifier
+
+# Строк в одной порции сканирования
+SCAN_BATCH_SIZE = 10000
+# Точность HyperLogLog: 2**14 регистров, стандартная ошибка ~0.8%
+HLL_PRECISION = 14
+TOP_K = 10
+# Счётчиков Misra-Gries: ошибка частоты не больше N / (TOP_K_CAPACITY + 1)
+TOP_K_CAPACITY = 1000
+RESERVOIR_SIZE = 10000
+HISTOGRAM_BINS = 10
+
+_MASK64 = (1 << 64) - 1
+
+
+def _mix64(value):
+    """Перемешивание битов hash() (finalizer splitmix64): hash(int) — это само число"""
+    value = (value + 0x9E3779B97F4A7C15) & _MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return value ^ (value >> 31)
+
+
+class HyperLogLog:
+    """Оценка числа различных значений в фиксированной памяти (2**precision байт).
+
+    hash() строк зависит от PYTHONHASHSEED, поэтому оценка может немного
+    отличаться между запусками приложения.
+    """
+
+    def __init__(self, precision=HLL_PRECISION):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(self.size)
+
+    def add_many(self, values):
+        registers = self.registers
+        precision = self.precision
+        mask = self.size - 1
+        width = 64 - precision
+        for value in values:
+            x = _mix64(hash(value) & _MASK64)
+            index = x & mask
+            rank = width - (x >> precision).bit_length() + 1
+            if rank > registers[index]:
+                registers[index] = rank
+
+    def estimate(self):
+        m = self.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Малые мощности: линейный подсчёт по пустым регистрам
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+class FrequentValues:
+    """Частые значения по алгоритму Misra-Gries, пополняемому порциями"""
+
+    def __init__(self, capacity=TOP_K_CAPACITY):
+        self.capacity = capacity
+        self.counters = Counter()
+
+    def add_counts(self, counts):
+        self.counters.update(counts)
+        if len(self.counters) > self.capacity:
+            # Вычитаем (capacity+1)-ю по величине частоту: остаётся не больше capacity счётчиков
+            threshold = heapq.nlargest(self.capacity + 1, self.counters.values())[-1]
+            self.counters = Counter({value: count - threshold
+                                     for value, count in self.counters.items() if count > threshold})
+
+    def top(self, k=TOP_K):
+        return self.counters.most_common(k)
+
+
+class Reservoir:
+    """Равномерная выборка фиксированного размера из потока (алгоритм L)"""
+
+    def __init__(self, size=RESERVOIR_SIZE, seed=None):
+        self.size = size
+        self.items = []
+        self.seen = 0
+        self.random = random.Random(seed)
+        self.weight = 1.0
+        self.next_index = None
+
+    def add_many(self, values):
+        size = self.size
+        items = self.items
+        start = self.seen
+        self.seen += len(values)
+        if len(items) < size:
+            taken = values[:size - len(items)]
+            items.extend(taken)
+            start += len(taken)
+            if len(items) < size:
+                return
+            if self.next_index is None:
+                self._skip(start - 1)
+        # Пропускаем значения, не попадающие в выборку, не обращаясь к каждому
+        while self.next_index < self.seen:
+            items[self.random.randrange(size)] = values[self.next_index - (self.seen - len(values))]
+            self._skip(self.next_index)
+
+    def _skip(self, index):
+        self.weight *= math.exp(math.log(self.random.random()) / self.size)
+        self.next_index = index + int(math.log(self.random.random()) / math.log(1 - self.weight)) + 1
+
+
+class ColumnStats:
+    """Статистика колонки, собранная за один проход курсора"""
+
+    def __init__(self, table, column, sample_fraction=None):
+        self.table = table
+        self.column = column
+        self.sample_fraction = sample_fraction  # None — сканируется вся колонка
+        self.rows = 0
+        self.nulls = 0
+        self.type_counts = Counter()
+        self.numeric_count = 0
+        self.numeric_sum = 0.0
+        self.numeric_min = None
+        self.numeric_max = None
+        self.text_min = None
+        self.text_max = None
+        self.distinct = HyperLogLog()
+        self.frequent = FrequentValues()
+        self.sample = Reservoir(seed=0)
+
+    def add_batch(self, values):
+        self.rows += len(values)
+        counts = Counter(values)
+        self.nulls += counts.pop(None, 0)
+        # Одинаковые значения порции хэшируются один раз
+        self.distinct.add_many(counts)
+        self.frequent.add_counts(counts)
+        for value, count in counts.items():
+            self.type_counts[type(value).__name__] += count
+
+        numbers = [value for value in values if type(value) in (int, float)]
+        if numbers:
+            self.numeric_count += len(numbers)
+            self.numeric_sum += math.fsum(numbers)
+            low, high = min(numbers), max(numbers)
+            self.numeric_min = low if self.numeric_min is None else min(self.numeric_min, low)
+            self.numeric_max = high if self.numeric_max is None else max(self.numeric_max, high)
+            self.sample.add_many(numbers)
+        texts = [value for value in counts if type(value) is str]
+        if texts:
+            low, high = min(texts), max(texts)
+            self.text_min = low if self.text_min is None else min(self.text_min, low)
+            self.text_max = high if self.text_max is None else max(self.text_max, high)
+
+    def mean(self):
+        return self.numeric_sum / self.numeric_count if self.numeric_count else None
+
+    def histogram(self, bins=HISTOGRAM_BINS):
+        """Гистограмма числовых значений по выборке: [(от, до, оценка числа значений)]"""
+        if not self.sample.items or self.numeric_min == self.numeric_max:
+            return []
+        low, high = self.numeric_min, self.numeric_max
+        width = (high - low) / bins
+        counts = [0] * bins
+        for value in self.sample.items:
+            counts[min(int((value - low) / width), bins - 1)] += 1
+        scale = self.numeric_count / len(self.sample.items)
+        return [(low + i * width, low + (i + 1) * width, round(count * scale))
+                for i, count in enumerate(counts)]
+
+    def to_text(self):
+        scale = 1 / self.sample_fraction if self.sample_fraction else 1
+        approx = "≈" if self.sample_fraction else ""
+        lines = [f"{self.table}.{self.column}"]
+        if self.sample_fraction:
+            lines.append(f"Выборка {self.sample_fraction:.2%} строк, числа оценены")
+        lines.append("")
+        lines.append(f"{'Строк:':<16}{approx}{round(self.rows * scale)}")
+        lines.append(f"{'NULL:':<16}{approx}{round(self.nulls * scale)}")
+        lines.append(f"{'Различных:':<16}≈{self.distinct.estimate()}"
+                     + (" (в выборке)" if self.sample_fraction else ""))
+        types = ", ".join(f"{name} {count}" for name, count in self.type_counts.most_common())
+        lines.append(f"{'Типы:':<16}{types or '—'}")
+        if self.numeric_count:
+            lines.append(f"{'Мин. (число):':<16}{self.numeric_min}")
+            lines.append(f"{'Макс. (число):':<16}{self.numeric_max}")
+            lines.append(f"{'Среднее:':<16}{self.mean():.6g}")
+        if self.text_min is not None:
+            lines.append(f"{'Мин. (текст):':<16}{self.text_min!r}")
+            lines.append(f"{'Макс. (текст):':<16}{self.text_max!r}")
+
+        lines.append("")
+        lines.append(f"Частые значения (top-{TOP_K}):")
+        for value, count in self.frequent.top():
+            lines.append(f"  {value!r:<30} ≥{round(count * scale)}")
+
+        histogram = self.histogram()
+        if histogram:
+            lines.append("")
+            lines.append("Гистограмма (по выборке значений):")
+            largest = max(count for _, _, count in histogram) or 1
+            for low, high, count in histogram:
+                bar = "█" * round(20 * count / largest)
+                lines.append(f"  {low:>12.6g} – {high:<12.6g} {bar} {approx}{round(count * scale)}")
+        return "\n".join(lines)
+
+
+class _ProfileWorker(QObject):
+    """Читает колонку курсором порциями и копит статистику"""
+
+    progress = pyqtSignal(int)  # строк просмотрено
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, connect, table, column, sample_fraction):
+        super().__init__()
+        self.connect = connect
+        self.table = table
+        self.column = column
+        self.sample_fraction = sample_fraction
+        self.lock = threading.Lock()
+        self.connection = None
+        self.cancel_requested = False
+
+    def cancel(self):
+        """Вызывается из GUI-потока"""
+        with self.lock:
+            self.cancel_requested = True
+            if self.connection is not None:
+                self.connection.interrupt()
+
+    def query(self):
+        sql = f"SELECT {quote_identifier(self.column)} FROM {quote_identifier(self.table)}"
+        if not self.sample_fraction:
+            return sql, ()
+        # Строки отбираются внутри SQLite: в Python приходит только выборка
+        return f"{sql} WHERE abs(random() % 1000000) < ?", (round(self.sample_fraction * 1000000),)
+
+    @pyqtSlot()
+    def run(self):
+        stats = ColumnStats(self.table, self.column, self.sample_fraction)
+        try:
+            connection = self.connect()
+            with self.lock:
+                self.connection = connection
+            try:
+                cursor = connection.execute(*self.query())
+                while not self.cancel_requested:
+                    rows = cursor.fetchmany(SCAN_BATCH_SIZE)
+                    if not rows:
+                        break
+                    stats.add_batch([row[0] for row in rows])
+                    self.progress.emit(stats.rows)
+            finally:
+                with self.lock:
+                    self.connection = None
+                connection.close()
+        except sqlite3.Error as error:
+            if self.cancel_requested:
+                self.cancelled.emit()
+            else:
+                self.failed.emit(str(error))
+            return
+        if self.cancel_requested:
+            self.cancelled.emit()
+        else:
+            self.finished.emit(stats)
+
+
+class ColumnProfiler(QObject):
+    """Сбор статистики колонки в отдельном потоке"""
+
+    progress = pyqtSignal(int)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, connect, table, column, sample_fraction=None, parent=None):
+        """connect — функция, возвращающая новое соединение с БД для рабочего потока"""
+        super().__init__(parent)
+        self.thread = QThread()
+        self.worker = _ProfileWorker(connect, table, column, sample_fraction)
+        self.worker.moveToThread(self.thread)
+        self.thread.started.connect(self.worker.run)
+
+        self.worker.progress.connect(self.progress)
+        self.worker.finished.connect(self.finished)
+        self.worker.failed.connect(self.failed)
+        self.worker.cancelled.connect(self.cancelled)
+        for signal in (self.worker.finished, self.worker.failed, self.worker.cancelled):
+            signal.connect(self.thread.quit, Qt.DirectConnection)
+
+    def start(self):
+        self.thread.start()
+
+    def cancel(self):
+        self.worker.cancel()
+
+    def wait(self):
+        self.thread.wait()
@@ -0,0 +1,143 @@
+import sqlite3
+import threading
+from pathlib import Path
+
+# Подготовленных операторов в LRU-кэше каждого соединения (sqlite3 cached_statements):
+# повторный запрос с тем же текстом не разбирается и не планируется заново
+STATEMENT_CACHE_SIZE = 256
+
+
+class OpenOptions:
+    """Параметры открытия БД.
+
+    read_only  — URI mode=ro: запись запрещена, файл не блокируется на запись
+    immutable  — URI immutable=1: SQLite не проверяет изменения файла и не берёт
+                 блокировки (только для снимков, которые никто не пишет)
+    wal        — перевести БД в режим журнала WAL (читатели не мешают писателю)
+    mmap_size  — размер отображения файла в память, байт (0 — не использовать)
+    cache_size_kb — размер кэша страниц на соединение, КБ (None — по умолчанию)
+    """
+
+    def __init__(self, read_only=False, immutable=False, wal=False, mmap_size=0, cache_size_kb=None):
+        self.read_only = read_only or immutable
+        self.immutable = immutable
+        self.wal = wal
+        self.mmap_size = mmap_size
+        self.cache_size_kb = cache_size_kb
+
+    def uri(self, path):
+        uri = Path(path).absolute().as_uri()
+        query = []
+        if self.read_only:
+            query.append("mode=ro")
+        if self.immutable:
+            query.append("immutable=1")
+        return uri + ("?" + "&".join(query) if query else "")
+
+    def describe(self):
+        parts = []
+        if self.immutable:
+            parts.append("immutable")
+        elif self.read_only:
+            parts.append("read-only")
+        if self.wal:
+            parts.append("WAL")
+        if self.mmap_size:
+            parts.append(f"mmap {self.mmap_size // (1024 * 1024)} МБ")
+        if self.cache_size_kb:
+            parts.append(f"cache {self.cache_size_kb // 1024} МБ")
+        return ", ".join(parts) or "read-write"
+
+
+class ConnectionManager:
+    """Несколько именованных БД, открытых одновременно.
+
+    Каждый поток получает собственное соединение с БД (connection), поэтому
+    фоновые исполнители читают параллельно, не разделяя один курсор SQLite.
+    """
+
+    def __init__(self):
+        self._databases = {}  # имя -> (путь, OpenOptions)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def names(self):
+        with self._lock:
+            return list(self._databases)
+
+    def path(self, name):
+        with self._lock:
+            return self._databases[name][0]
+
+    def options(self, name):
+        with self._lock:
+            return self._databases[name][1]
+
+    def unique_name(self, path):
+        """Имя для нового подключения: имя файла, при совпадении — с номером"""
+        base = Path(path).name
+        name, number = base, 2
+        with self._lock:
+            while name in self._databases:
+                name = f"{base} ({number})"
+                number += 1
+        return name
+
+    def open(self, name, path, options=None):
+        """Зарегистрировать БД под именем name и проверить, что файл открывается"""
+        options = options or OpenOptions()
+        connection = self._create(path, options)
+        try:
+            # Файл, не являющийся БД SQLite, даст ошибку уже здесь
+            connection.execute("PRAGMA schema_version").fetchone()
+            if options.wal and not options.read_only:
+                connection.execute("PRAGMA journal_mode = WAL")
+        finally:
+            connection.close()
+        with self._lock:
+            self._databases[name] = (path, options)
+
+    def close(self, name):
+        """Забыть БД. Соединения рабочих потоков закрываются ими самими (release)"""
+        self.release(name)
+        with self._lock:
+            self._databases.pop(name, None)
+
+    def close_all(self):
+        for name in self.names():
+            self.close(name)
+
+    def connect(self, name):
+        """Новое соединение с БД (вызывающий сам закрывает его)"""
+        with self._lock:
+            path, options = self._databases[name]
+        return self._create(path, options)
+
+    def connection(self, name):
+        """Соединение с БД для текущего потока (создаётся при первом обращении)"""
+        connections = self._thread_connections()
+        connection = connections.get(name)
+        if connection is None:
+            connection = self.connect(name)
+            connections[name] = connection
+        return connection
+
+    def release(self, name):
+        """Закрыть соединение текущего потока с БД name"""
+        connection = self._thread_connections().pop(name, None)
+        if connection is not None:
+            connection.close()
+
+    def _thread_connections(self):
+        if not hasattr(self._local, "connections"):
+            self._local.connections = {}
+        return self._local.connections
+
+    def _create(self, path, options):
+        connection = sqlite3.connect(options.uri(path), uri=True, isolation_level=None,
+                                     cached_statements=STATEMENT_CACHE_SIZE)
+        if options.mmap_size:
+            connection.execute(f"PRAGMA mmap_size = {int(options.mmap_size)}")
+        if options.cache_size_kb:
+            connection.execute(f"PRAGMA cache_size = -{int(options.cache_size_kb)}")
+        return connection
@@ -0,0 +1,94 @@
+import os
+import re
+import sqlite3
+
+from PyQt5.QtCore import QObject, QTimer, QFileSystemWatcher, pyqtSignal
+
+from result_cache import database_version
+
+# Интервал опроса PRAGMA data_version, мс (запасной путь, если файловые события не пришли)
+POLL_INTERVAL_MS = 1000
+# Пачка файловых событий при одной записи сводится к одной проверке
+DEBOUNCE_MS = 100
+
+SCHEMA_TABLES = {"sqlite_master", "sqlite_schema"}
+_SOURCE_RE = re.compile(r"\b(?:from|join)\s+([^\s,;()]+)", re.IGNORECASE)
+
+
+def reads_only_schema(sql):
+    """Читает ли запрос только sqlite_master (его результат меняется лишь вместе со схемой)"""
+    sources = {name.strip('"`[]').lower() for name in _SOURCE_RE.findall(sql)}
+    return bool(sources) and sources <= SCHEMA_TABLES
+
+
+class DatabaseWatcher(QObject):
+    """Следит за изменениями БД другими соединениями и процессами.
+
+    Изменение определяется по PRAGMA data_version соединения connection — это
+    один вызов без чтения страниц. Проверка запускается по таймеру и сразу по
+    событию QFileSystemWatcher для файла БД и её журнала WAL.
+    """
+
+    # Новая версия (data_version, schema_version) и изменилась ли схема
+    changed = pyqtSignal(object, bool)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.connection = None
+        self.path = None
+        self.version = None
+
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setInterval(POLL_INTERVAL_MS)
+        self.poll_timer.timeout.connect(self.check)
+
+        self.debounce_timer = QTimer(self)
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.setInterval(DEBOUNCE_MS)
+        self.debounce_timer.timeout.connect(self.check)
+
+        self.file_watcher = QFileSystemWatcher(self)
+        self.file_watcher.fileChanged.connect(lambda path: self.debounce_timer.start())
+
+    def start(self, connection, path):
+        """Начать наблюдение за БД path через соединение connection (GUI-потока)"""
+        self.stop()
+        self.connection = connection
+        self.path = path
+        self.version = database_version(connection)
+        self._watch_files()
+        self.poll_timer.start()
+
+    def stop(self):
+        self.poll_timer.stop()
+        self.debounce_timer.stop()
+        files = self.file_watcher.files()
+        if files:
+            self.file_watcher.removePaths(files)
+        self.connection = None
+        self.path = None
+        self.version = None
+
+    def is_active(self):
+        return self.connection is not None
+
+    def check(self):
+        if self.connection is None:
+            return
+        # Журнал WAL создаётся при первой записи — подхватываем его, когда появится
+        self._watch_files()
+        try:
+            version = database_version(self.connection)
+        except sqlite3.Error:
+            return
+        if version == self.version:
+            return
+        schema_changed = version[1] != self.version[1]
+        self.version = version
+        self.changed.emit(version, schema_changed)
+
+    def _watch_files(self):
+        watched = set(self.file_watcher.files())
+        for path in (self.path, self.path + "-wal"):
+            if path not in watched and os.path.exists(path):
+                self.file_watcher.addPath(path)
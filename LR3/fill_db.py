@@ -1,37 +1,50 @@
-import sqlite3
-from datetime import datetime, timedelta
+import argparse
+import os
 import random
+import sqlite3
+import sys
+import time
+from datetime import date, timedelta
+from itertools import islice
 
-# Имя файла базы данных
+# Имя файла базы данных по умолчанию
 DB_NAME = "db.sqlite"
 
-# Подключение к БД (создаёт файл, если не существует)
-conn = sqlite3.connect(DB_NAME)
-cursor = conn.cursor()
+# Количество строк при scale = 1 (как в исходном тестовом наборе)
+BASE_COUNTS = {
+    "users": 10,
+    "departments": 5,
+    "employees": 15,
+    "products": 10,
+    "orders": 30,
+}
+
+# Даты отсчитываются от фиксированного дня, чтобы результат зависел только от seed
+BASE_DATE = date(2025, 1, 1)
+DATES = [(BASE_DATE - timedelta(days=days)).isoformat() for days in range(365 * 5 + 1)]
 
-# 1. Таблица users
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS users (
+SCHEMA = [
+    # 1. Таблица users (уникальный индекс по email создаётся после загрузки)
+    '''
+    CREATE TABLE users (
         id INTEGER PRIMARY KEY,
         name TEXT NOT NULL,
-        email TEXT UNIQUE NOT NULL,
+        email TEXT NOT NULL,
         age INTEGER,
         registration_date DATE
     )
-''')
-
-# 2. Таблица departments
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS departments (
+    ''',
+    # 2. Таблица departments
+    '''
+    CREATE TABLE departments (
         id INTEGER PRIMARY KEY,
         name TEXT NOT NULL,
         location TEXT
     )
-''')
-
-# 3. Таблица employees
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS employees (
+    ''',
+    # 3. Таблица employees
+    '''
+    CREATE TABLE employees (
         id INTEGER PRIMARY KEY,
         name TEXT NOT NULL,
         department_id INTEGER,
@@ -39,21 +52,19 @@ cursor.execute('''
         hire_date DATE,
         FOREIGN KEY (department_id) REFERENCES departments (id)
     )
-''')
-
-# 4. Таблица products
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS products (
+    ''',
+    # 4. Таблица products
+    '''
+    CREATE TABLE products (
         id INTEGER PRIMARY KEY,
         name TEXT NOT NULL,
         price REAL,
         category TEXT
     )
-''')
-
-# 5. Таблица orders
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS orders (
+    ''',
+    # 5. Таблица orders
+    '''
+    CREATE TABLE orders (
         id INTEGER PRIMARY KEY,
         user_id INTEGER,
         product_id INTEGER,
@@ -63,11 +74,28 @@ cursor.execute('''
         FOREIGN KEY (user_id) REFERENCES users (id),
         FOREIGN KEY (product_id) REFERENCES products (id)
     )
-''')
+    ''',
+]
+
+# Индексы строятся одним проходом после загрузки данных
+INDEXES = [
+    "CREATE UNIQUE INDEX users_email ON users (email)",
+    "CREATE INDEX employees_department_id ON employees (department_id)",
+    "CREATE INDEX orders_user_id ON orders (user_id)",
+    "CREATE INDEX orders_product_id ON orders (product_id)",
+]
+
+# Прагмы массовой загрузки: без журнала и fsync, большой кэш страниц
+BULK_LOAD_PRAGMAS = [
+    "PRAGMA journal_mode = OFF",
+    "PRAGMA synchronous = OFF",
+    "PRAGMA locking_mode = EXCLUSIVE",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -262144",
+]
 
 # Тестовые данные
 names = ["Иван Иванов", "Мария Смирнова", "Алексей Попов", "Елена Кузнецова", "Дмитрий Волков", "Ольга Морозова", "Андрей Новиков", "Татьяна Лебедева", "Сергей Зайцев", "Наталья Власова"]
-emails = [f"user{i}@example.com" for i in range(1, 11)]
 departments = [("IT", "Москва"), ("Продажи", "СПб"), ("HR", "ЕКб"), ("Финансы", "НН"), ("Маркетинг", "Казань")]
 products = [
     ("Ноутбук", 50000.0, "Электроника"),
@@ -82,44 +110,159 @@ products = [
     ("Тостер", 2000.0, "Бытовая техника")
 ]
 
-# Вставка данных в users
-for i in range(10):
-    name = names[i]
-    email = emails[i]
-    age = random.randint(20, 60)
-    reg_date = (datetime.now() - timedelta(days=random.randint(1, 365*3))).strftime('%Y-%m-%d')
-    cursor.execute("INSERT OR IGNORE INTO users (name, email, age, registration_date) VALUES (?, ?, ?, ?)",
-                   (name, email, age, reg_date))
-
-# Вставка данных в departments
-for dept in departments:
-    cursor.execute("INSERT OR IGNORE INTO departments (name, location) VALUES (?, ?)", dept)
-
-# Вставка данных в products
-for prod in products:
-    cursor.execute("INSERT OR IGNORE INTO products (name, price, category) VALUES (?, ?, ?)", prod)
-
-# Вставка данных в employees
-for i in range(15):
-    name = f"Сотрудник {i+1}"
-    dept_id = random.randint(1, len(departments))
-    salary = round(random.uniform(30000, 150000), 2)
-    hire_date = (datetime.now() - timedelta(days=random.randint(1, 365*5))).strftime('%Y-%m-%d')
-    cursor.execute("INSERT OR IGNORE INTO employees (name, department_id, salary, hire_date) VALUES (?, ?, ?, ?)",
-                   (name, dept_id, salary, hire_date))
-
-# Вставка данных в orders
-for i in range(30):
-    user_id = random.randint(1, 10)
-    product_id = random.randint(1, len(products))
-    quantity = random.randint(1, 5)
-    order_date = (datetime.now() - timedelta(days=random.randint(0, 365))).strftime('%Y-%m-%d')
-    total = round(products[product_id - 1][1] * quantity, 2)
-    cursor.execute("INSERT OR IGNORE INTO orders (user_id, product_id, quantity, order_date, total) VALUES (?, ?, ?, ?, ?)",
-                   (user_id, product_id, quantity, order_date, total))
-
-# Сохранение изменений и закрытие
-conn.commit()
-conn.close()
-
-print(f"База данных '{DB_NAME}' успешно создана и заполнена тестовыми данными.")
\ No newline at end of file
+
+def table_counts(scale):
+    """Количество строк каждой таблицы для коэффициента масштаба"""
+    return {table: max(1, round(count * scale)) for table, count in BASE_COUNTS.items()}
+
+
+def product_price(product_id):
+    """Цена товара — чистая функция id, чтобы заказы не держали товары в памяти"""
+    base_price = products[(product_id - 1) % len(products)][1]
+    if product_id <= len(products):
+        return base_price
+    # Детерминированная надбавка 0..99% для «моделей» товара
+    markup = (product_id * 2654435761) % 100
+    return round(base_price * (1 + markup / 100), 2)
+
+
+def numbered(value, number, base_count):
+    """Исходное значение для первых строк, дальше — с порядковым номером"""
+    return value if number <= base_count else f"{value} {number}"
+
+
+def generate_users(rng, count):
+    rand = rng.random
+    dates = DATES
+    for user_id in range(1, count + 1):
+        yield (
+            user_id,
+            numbered(names[(user_id - 1) % len(names)], user_id, len(names)),
+            f"user{user_id}@example.com",
+            20 + int(rand() * 41),
+            dates[1 + int(rand() * 365 * 3)],
+        )
+
+
+def generate_departments(rng, count):
+    for dept_id in range(1, count + 1):
+        name, location = departments[(dept_id - 1) % len(departments)]
+        yield dept_id, numbered(name, dept_id, len(departments)), location
+
+
+def generate_employees(rng, count, department_count):
+    rand = rng.random
+    dates = DATES
+    for employee_id in range(1, count + 1):
+        yield (
+            employee_id,
+            f"Сотрудник {employee_id}",
+            1 + int(rand() * department_count),
+            round(30000 + rand() * 120000, 2),
+            dates[1 + int(rand() * 365 * 5)],
+        )
+
+
+def generate_products(rng, count):
+    for product_id in range(1, count + 1):
+        name, _, category = products[(product_id - 1) % len(products)]
+        yield product_id, numbered(name, product_id, len(products)), product_price(product_id), category
+
+
+def generate_orders(rng, count, user_count, product_count):
+    rand = rng.random
+    dates = DATES
+    for order_id in range(1, count + 1):
+        product_id = 1 + int(rand() * product_count)
+        quantity = 1 + int(rand() * 5)
+        yield (
+            order_id,
+            1 + int(rand() * user_count),
+            product_id,
+            quantity,
+            dates[int(rand() * 366)],
+            round(product_price(product_id) * quantity, 2),
+        )
+
+
+def insert_rows(connection, table, column_count, rows, total, batch_size):
+    """Вставляет строки пакетами executemany, одна транзакция на таблицу"""
+    sql = f"INSERT INTO {table} VALUES ({', '.join('?' * column_count)})"
+    started = time.perf_counter()
+    inserted = 0
+    connection.execute("BEGIN")
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        connection.executemany(sql, batch)
+        inserted += len(batch)
+        if total > batch_size:
+            print(f"\r  {table}: {inserted}/{total}", end="", flush=True)
+    connection.execute("COMMIT")
+    elapsed = time.perf_counter() - started
+    rate = inserted / elapsed if elapsed > 0 else float("inf")
+    print(f"\r  {table}: {inserted} строк за {elapsed:.1f} с ({rate:,.0f} строк/с)")
+
+
+def generate_database(path, scale=1.0, seed=0, batch_size=50000):
+    """Создаёт БД из пяти таблиц; одинаковые scale и seed дают одинаковые данные"""
+    counts = table_counts(scale)
+    connection = sqlite3.connect(path, isolation_level=None)
+    try:
+        for pragma in BULK_LOAD_PRAGMAS:
+            connection.execute(pragma)
+        for statement in SCHEMA:
+            connection.execute(statement)
+
+        # У каждой таблицы свой генератор: её данные не зависят от размеров остальных
+        generators = {
+            "users": (5, generate_users(random.Random(f"{seed}:users"), counts["users"])),
+            "departments": (3, generate_departments(random.Random(f"{seed}:departments"), counts["departments"])),
+            "employees": (5, generate_employees(random.Random(f"{seed}:employees"), counts["employees"],
+                                                counts["departments"])),
+            "products": (4, generate_products(random.Random(f"{seed}:products"), counts["products"])),
+            "orders": (6, generate_orders(random.Random(f"{seed}:orders"), counts["orders"],
+                                          counts["users"], counts["products"])),
+        }
+        for table, (column_count, rows) in generators.items():
+            insert_rows(connection, table, column_count, rows, counts[table], batch_size)
+
+        started = time.perf_counter()
+        for statement in INDEXES:
+            connection.execute(statement)
+        print(f"  индексы: {time.perf_counter() - started:.1f} с")
+
+        # Статистика для планировщика по выборке, а не по всей таблице
+        connection.execute("PRAGMA analysis_limit = 1000")
+        connection.execute("ANALYZE")
+        connection.execute("PRAGMA journal_mode = DELETE")
+    finally:
+        connection.close()
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Генератор тестовой БД из пяти таблиц")
+    parser.add_argument("-o", "--output", default=DB_NAME, help="файл БД (по умолчанию db.sqlite)")
+    parser.add_argument("-s", "--scale", type=float, default=1.0,
+                        help="коэффициент масштаба: 1 — 70 строк, 1e6 — 70 млн строк")
+    parser.add_argument("--seed", type=int, default=0, help="зерно генератора случайных чисел")
+    parser.add_argument("--batch-size", type=int, default=50000, help="строк в одном executemany")
+    parser.add_argument("-f", "--force", action="store_true", help="перезаписать существующий файл")
+    args = parser.parse_args(argv)
+
+    if os.path.exists(args.output):
+        if not args.force:
+            parser.error(f"файл '{args.output}' уже существует (используйте --force)")
+        os.remove(args.output)
+
+    started = time.perf_counter()
+    counts = generate_database(args.output, args.scale, args.seed, args.batch_size)
+    print(f"База данных '{args.output}' успешно создана и заполнена тестовыми данными: "
+          f"{sum(counts.values())} строк за {time.perf_counter() - started:.1f} с.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
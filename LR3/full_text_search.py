@@ -0,0 +1,241 @@
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+
+from PyQt5.QtCore import Qt, QObject, QThread, pyqtSignal, pyqtSlot
+
+from schema_catalog import quote_identifier
+
+# Строк исходной таблицы в одной порции индексации
+INDEX_BATCH_SIZE = 5000
+# Сколько совпадений возвращает поиск
+SEARCH_LIMIT = 200
+
+# Признаки текстового сродства столбца (правила SQLite); столбцы без типа тоже
+# могут хранить текст
+TEXT_AFFINITY_MARKERS = ("CHAR", "CLOB", "TEXT")
+
+INDEX_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS documents USING fts5(
+    content, table_name UNINDEXED, row_id UNINDEXED, tokenize = 'unicode61'
+);
+CREATE TABLE IF NOT EXISTS indexed_tables (
+    table_name TEXT PRIMARY KEY,
+    columns TEXT NOT NULL,      -- проиндексированные столбцы через \\n
+    last_rowid INTEGER NOT NULL -- строки с большим rowid ещё не в индексе
+);
+"""
+
+
+def index_path(database_path):
+    """Файл индекса рядом с БД, а если каталог недоступен для записи — во временном каталоге"""
+    directory = os.path.dirname(os.path.abspath(database_path))
+    if os.access(directory, os.W_OK):
+        return database_path + ".fts.sqlite"
+    digest = hashlib.sha1(os.path.abspath(database_path).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(tempfile.gettempdir(), f"lr3-{digest}.fts.sqlite")
+
+
+def text_columns(table_info):
+    """Столбцы таблицы, в которых может храниться текст"""
+    columns = []
+    for column in table_info.columns:
+        type_name = (column.type_name or "").upper()
+        if not type_name or any(marker in type_name for marker in TEXT_AFFINITY_MARKERS):
+            columns.append(column.name)
+    return columns
+
+
+def indexable_tables(catalog):
+    """[(таблица, текстовые столбцы)] для всех rowid-таблиц каталога"""
+    tables = []
+    for name in catalog.table_names():
+        table_info = catalog.table(name)
+        if not table_info.has_rowid or table_info.sql.upper().startswith("CREATE VIRTUAL"):
+            continue
+        columns = text_columns(table_info)
+        if columns:
+            tables.append((name, columns))
+    return tables
+
+
+def match_query(text):
+    """Поисковая строка -> выражение FTS5: все слова как префиксы, спецсимволы экранированы"""
+    terms = ['"' + term.replace('"', '""') + '"*' for term in text.split()]
+    return " ".join(terms)
+
+
+def open_index(path):
+    connection = sqlite3.connect(path, isolation_level=None)
+    # WAL: поиск из GUI-потока не ждёт окончания порции индексатора
+    connection.execute("PRAGMA journal_mode = WAL")
+    connection.execute("PRAGMA busy_timeout = 5000")
+    try:
+        connection.executescript(INDEX_SCHEMA)
+    except sqlite3.OperationalError as error:
+        connection.close()
+        raise RuntimeError(f"SQLite собран без FTS5: {error}") from error
+    return connection
+
+
+def search(connection, text, limit=SEARCH_LIMIT):
+    """Совпадения по индексу: [(таблица, rowid, фрагмент)] в порядке релевантности"""
+    query = match_query(text)
+    if not query:
+        return []
+    return connection.execute(
+        "SELECT table_name, row_id, snippet(documents, 0, '[', ']', '…', 10) "
+        "FROM documents WHERE documents MATCH ? ORDER BY rank LIMIT ?",
+        (query, limit),
+    ).fetchall()
+
+
+class _IndexWorker(QObject):
+    """Дописывает в индекс строки, появившиеся после прошлой индексации"""
+
+    progress = pyqtSignal(str, int)  # таблица, строк проиндексировано
+    finished = pyqtSignal(int)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, connect, path, tables, rebuild):
+        super().__init__()
+        self.connect = connect
+        self.path = path
+        self.tables = tables
+        self.rebuild = rebuild
+        self.lock = threading.Lock()
+        self.source = None
+        self.cancel_requested = False
+
+    def cancel(self):
+        """Вызывается из GUI-потока"""
+        with self.lock:
+            self.cancel_requested = True
+            if self.source is not None:
+                self.source.interrupt()
+
+    @pyqtSlot()
+    def run(self):
+        total = 0
+        try:
+            index = open_index(self.path)
+            try:
+                source = self.connect()
+                with self.lock:
+                    self.source = source
+                try:
+                    self._drop_missing(index)
+                    for table, columns in self.tables:
+                        if self.cancel_requested:
+                            break
+                        total += self._index_table(index, source, table, columns)
+                finally:
+                    with self.lock:
+                        self.source = None
+                    source.close()
+            finally:
+                index.close()
+        except (sqlite3.Error, OSError, RuntimeError) as error:
+            if self.cancel_requested:
+                self.cancelled.emit()
+            else:
+                self.failed.emit(str(error))
+            return
+        if self.cancel_requested:
+            self.cancelled.emit()
+        else:
+            self.finished.emit(total)
+
+    def _drop_missing(self, index):
+        """Удаляет из индекса таблицы, которых больше нет в БД"""
+        names = {table for table, _ in self.tables}
+        for (table,) in index.execute("SELECT table_name FROM indexed_tables").fetchall():
+            if self.rebuild or table not in names:
+                self._drop_table(index, table)
+
+    def _drop_table(self, index, table):
+        index.execute("BEGIN")
+        index.execute("DELETE FROM documents WHERE table_name = ?", (table,))
+        index.execute("DELETE FROM indexed_tables WHERE table_name = ?", (table,))
+        index.execute("COMMIT")
+
+    def _index_table(self, index, source, table, columns):
+        state = index.execute(
+            "SELECT columns, last_rowid FROM indexed_tables WHERE table_name = ?", (table,)
+        ).fetchone()
+        quoted = quote_identifier(table)
+        max_rowid = source.execute(f"SELECT max(rowid) FROM {quoted}").fetchone()[0] or 0
+        # Изменился набор столбцов или строки в конце удалены — индексируем заново
+        if state is not None and (state[0] != "\n".join(columns) or max_rowid < state[1]):
+            self._drop_table(index, table)
+            state = None
+        last_rowid = state[1] if state is not None else 0
+        if state is None:
+            index.execute("INSERT INTO indexed_tables VALUES (?, ?, 0)", (table, "\n".join(columns)))
+
+        select = ", ".join(quote_identifier(column) for column in columns)
+        cursor = source.execute(
+            f"SELECT rowid, {select} FROM {quoted} WHERE rowid > ? ORDER BY rowid", (last_rowid,)
+        )
+        indexed = 0
+        while not self.cancel_requested:
+            rows = cursor.fetchmany(INDEX_BATCH_SIZE)
+            if not rows:
+                break
+            documents = []
+            for row in rows:
+                text = "\n".join(value for value in row[1:] if isinstance(value, str))
+                if text:
+                    documents.append((text, table, row[0]))
+            # Порция и отметка о ней пишутся одной транзакцией: прерванная
+            # индексация продолжится с того же места
+            index.execute("BEGIN")
+            index.executemany("INSERT INTO documents (content, table_name, row_id) VALUES (?, ?, ?)", documents)
+            index.execute("UPDATE indexed_tables SET last_rowid = ? WHERE table_name = ?", (rows[-1][0], table))
+            index.execute("COMMIT")
+            indexed += len(rows)
+            self.progress.emit(table, indexed)
+        cursor.close()
+        return indexed
+
+
+class FullTextIndexer(QObject):
+    """Обновление индекса полнотекстового поиска в отдельном потоке.
+
+    Индекс хранится в отдельном файле (index_path) и пополняется по rowid:
+    при каждом запуске дописываются только строки с rowid больше
+    проиндексированного. Изменённые и удалённые строки в середине таблицы
+    подхватываются полной перестройкой (rebuild=True).
+    """
+
+    progress = pyqtSignal(str, int)
+    finished = pyqtSignal(int)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, connect, path, tables, rebuild=False, parent=None):
+        """connect — функция, возвращающая новое соединение с исходной БД"""
+        super().__init__(parent)
+        self.thread = QThread()
+        self.worker = _IndexWorker(connect, path, tables, rebuild)
+        self.worker.moveToThread(self.thread)
+        self.thread.started.connect(self.worker.run)
+
+        self.worker.progress.connect(self.progress)
+        self.worker.finished.connect(self.finished)
+        self.worker.failed.connect(self.failed)
+        self.worker.cancelled.connect(self.cancelled)
+        for signal in (self.worker.finished, self.worker.failed, self.worker.cancelled):
+            signal.connect(self.thread.quit, Qt.DirectConnection)
+
+    def start(self):
+        self.thread.start()
+
+    def cancel(self):
+        self.worker.cancel()
+
+    def wait(self):
+        self.thread.wait()
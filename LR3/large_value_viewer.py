@@ -0,0 +1,159 @@
+import os
+import sqlite3
+
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QPlainTextEdit, QLabel, QPushButton, QFileDialog, QMessageBox
+)
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QFontDatabase
+
+from large_values import format_size
+
+# Сколько символов (байт для BLOB) показывается в окне; остальное — только в файл
+VIEW_LIMIT = 1024 * 1024
+
+
+def hex_dump(data, offset):
+    """Строки вида «смещение  16 байт в hex  ASCII»"""
+    lines = []
+    for start in range(0, len(data), 16):
+        chunk = data[start:start + 16]
+        text = "".join(chr(byte) if 32 <= byte < 127 else "." for byte in chunk)
+        lines.append(f"{offset + start:08x}  {chunk.hex(' '):<47}  {text}")
+    return "\n".join(lines)
+
+
+class LargeValueViewer(QDialog):
+    """Окно просмотра большого значения.
+
+    Значение читается порциями (инкрементальное чтение BLOB или substr) по
+    одной порции за такт цикла событий, поэтому окно не зависает, а в памяти
+    находится только показанная часть.
+    """
+
+    def __init__(self, value, connect, parent=None):
+        """connect — функция, возвращающая новое соединение с БД"""
+        super().__init__(parent)
+        self.value = value
+        self.connect = connect
+        self.connection = None
+        self.chunks = None
+        self.loaded = 0
+        self.output = None  # файл при сохранении значения целиком
+
+        kind = "BLOB" if value.kind == "blob" else "TEXT"
+        size = format_size(value.size) if value.kind == "blob" else f"{value.size} символов"
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        self.setWindowTitle(f"{value.table}.{value.column} [{value.key_column} = {value.key}]")
+        self.resize(720, 480)
+
+        layout = QVBoxLayout(self)
+        self.info_label = QLabel(f"{kind}, {size}")
+        layout.addWidget(self.info_label)
+
+        self.text_view = QPlainTextEdit()
+        self.text_view.setReadOnly(True)
+        if value.kind == "blob":
+            self.text_view.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        layout.addWidget(self.text_view)
+
+        buttons = QHBoxLayout()
+        self.save_btn = QPushButton("Сохранить в файл...")
+        self.save_btn.clicked.connect(self.save_to_file)
+        buttons.addWidget(self.save_btn)
+        buttons.addStretch(1)
+        close_btn = QPushButton("Закрыть")
+        close_btn.clicked.connect(self.close)
+        buttons.addWidget(close_btn)
+        layout.addLayout(buttons)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.read_next_chunk)
+        self.start_reading()
+
+    def start_reading(self, output=None):
+        self.stop_reading()
+        # Сразу — чтобы при ошибке файл был закрыт и удалён в stop_reading
+        self.output = output
+        try:
+            self.connection = self.connect()
+            self.chunks = self.value.read_chunks(self.connection)
+        except sqlite3.Error as error:
+            self.info_label.setText(f"Ошибка чтения: {error}")
+            self.stop_reading(discard=True)
+            return
+        self.loaded = 0
+        if output is None:
+            self.text_view.clear()
+        self.save_btn.setEnabled(output is None)
+        self.timer.start(0)
+
+    def stop_reading(self, discard=False):
+        """discard — удалить файл незавершённого сохранения"""
+        self.timer.stop()
+        self.chunks = None
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+        if self.output is not None:
+            self.output.close()
+            if discard:
+                try:
+                    os.remove(self.output.name)
+                except OSError:
+                    pass
+            self.output = None
+        self.save_btn.setEnabled(True)
+
+    def read_next_chunk(self):
+        try:
+            chunk = next(self.chunks, None)
+        except sqlite3.Error as error:
+            self.info_label.setText(f"Ошибка чтения: {error}")
+            self.stop_reading(discard=True)
+            return
+        if chunk is None:
+            if self.output is not None:
+                self.info_label.setText(f"Сохранено: {format_size(self.loaded)}")
+            self.stop_reading()
+            return
+
+        offset = self.loaded
+        self.loaded += len(chunk)
+        if self.output is not None:
+            self.output.write(chunk.encode("utf-8") if isinstance(chunk, str) else chunk)
+            self.info_label.setText(f"Сохранение... {self.loaded * 100 // max(self.value.size, 1)}%")
+            return
+
+        if offset >= VIEW_LIMIT:
+            self.info_label.setText(self.info_label.text() + f" — показаны первые {format_size(VIEW_LIMIT)}, "
+                                    "целиком — через «Сохранить в файл»")
+            self.stop_reading()
+            return
+        text = hex_dump(chunk, offset) if self.value.kind == "blob" else chunk
+        # appendPlainText добавил бы перевод строки внутрь текста
+        cursor = self.text_view.textCursor()
+        cursor.movePosition(cursor.End)
+        cursor.insertText(text if offset == 0 or self.value.kind != "blob" else "\n" + text)
+
+    def save_to_file(self):
+        file_path, _ = QFileDialog.getSaveFileName(self, "Сохранить значение", "",
+                                                   "Все файлы (*)")
+        if not file_path:
+            return
+        try:
+            output = open(file_path, "wb")
+        except OSError as error:
+            QMessageBox.critical(self, "Ошибка", f"Не удалось открыть файл:\n{error}")
+            return
+        self.start_reading(output)
+
+    def closeEvent(self, event):
+        # Сохранение, прерванное закрытием окна, оставило бы обрезанный файл
+        self.stop_reading(discard=True)
+        super().closeEvent(event)
+
+    def done(self, result):
+        # Esc закрывает диалог через reject()/done(), минуя closeEvent
+        self.stop_reading(discard=True)
+        super().done(result)
@@ -0,0 +1,136 @@
+from schema_catalog import quote_identifier
+
+# Больше стольких символов (байт для BLOB) значение заменяется превью
+PREVIEW_LIMIT = 256
+# Порция чтения полного значения
+CHUNK_SIZE = 64 * 1024
+
+
+def format_size(size):
+    for unit in ("Б", "КБ", "МБ"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "Б" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} ГБ"
+
+
+def format_value(value):
+    """Текст ячейки: длинные строки и BLOB обрезаются, чтобы отрисовка не копировала их целиком"""
+    if value is None:
+        return "NULL"
+    if isinstance(value, LargeValue):
+        return str(value)
+    if isinstance(value, bytes) and len(value) > PREVIEW_LIMIT:
+        return f"<BLOB {format_size(len(value))}> {value[:PREVIEW_LIMIT // 8].hex(' ')}…"
+    text = str(value)
+    if len(text) > PREVIEW_LIMIT:
+        return text[:PREVIEW_LIMIT] + "…"
+    return text
+
+
+class LargeValue:
+    """Большое значение, из которого прочитано только начало.
+
+    Полное значение читается по запросу (read_chunks) по таблице, столбцу и
+    ключу строки; без ключа (представления) доступно только превью.
+    """
+
+    def __init__(self, kind, size, preview, table=None, column=None, key_column=None, key=None):
+        self.kind = kind  # 'text' или 'blob'
+        self.size = size  # символов для текста, байт для BLOB
+        self.preview = preview
+        self.table = table
+        self.column = column
+        self.key_column = key_column
+        self.key = key
+
+    def can_load(self):
+        return self.table is not None and self.key_column is not None
+
+    def __str__(self):
+        if self.kind == "blob":
+            return f"<BLOB {format_size(self.size)}> {self.preview[:PREVIEW_LIMIT // 8].hex(' ')}…"
+        return f"{self.preview}… ({self.size} символов)"
+
+    def read_chunks(self, connection, chunk_size=CHUNK_SIZE):
+        """Полное значение порциями: bytes для BLOB, str для текста"""
+        table = quote_identifier(self.table)
+        column = quote_identifier(self.column)
+        if self.kind == "blob" and self.key_column == "rowid" and hasattr(connection, "blobopen"):
+            # Инкрементальное чтение BLOB (sqlite3_blob_read, Python 3.11+)
+            with connection.blobopen(self.table, self.column, self.key, readonly=True) as blob:
+                while True:
+                    chunk = blob.read(chunk_size)
+                    if not chunk:
+                        return
+                    yield chunk
+
+        key_column = "rowid" if self.key_column == "rowid" else quote_identifier(self.key_column)
+        sql = f"SELECT substr({column}, ?, ?) FROM {table} WHERE {key_column} = ?"
+        start = 1
+        while start <= self.size:
+            row = connection.execute(sql, (start, chunk_size, self.key)).fetchone()
+            if row is None or not row[0]:
+                return
+            yield row[0]
+            start += chunk_size
+
+
+class LargeValuePreview:
+    """Обёртка запроса: большие значения столбцов читаются как превью.
+
+    Запрос оборачивается в CTE с известными именами столбцов, и для каждого
+    столбца из columns вместо значения выбираются substr(), length() и typeof().
+    typeof() и length() BLOB не читают значение целиком, и в любом случае в
+    Python копируются только первые PREVIEW_LIMIT символов (байт).
+    """
+
+    def __init__(self, table, headers, columns, key_column=None, key_index=None):
+        """headers — имена столбцов исходного запроса по порядку;
+        columns — их позиции, которые могут содержать большие значения;
+        key_column/key_index — ключ строки в таблице и его позиция в результате"""
+        self.table = table
+        self._headers = list(headers)
+        self.columns = set(columns)
+        self.key_column = key_column
+        self.key_index = key_index
+
+    def wrap(self, sql):
+        names = [f"c{i}" for i in range(len(self._headers))]
+        select = []
+        for i, name in enumerate(names):
+            if i in self.columns:
+                select.append(f"CASE WHEN length({name}) > {PREVIEW_LIMIT} "
+                              f"THEN substr({name}, 1, {PREVIEW_LIMIT}) ELSE {name} END, "
+                              f"length({name}), typeof({name})")
+            else:
+                select.append(name)
+        return f"WITH preview({', '.join(names)}) AS ({sql}) SELECT {', '.join(select)} FROM preview"
+
+    def headers(self, headers):
+        return list(self._headers)
+
+    def rows(self, rows):
+        converted = []
+        for row in rows:
+            values = []
+            position = 0
+            key = row[self._position(self.key_index)] if self.key_index is not None else None
+            for i in range(len(self._headers)):
+                if i not in self.columns:
+                    values.append(row[position])
+                    position += 1
+                    continue
+                value, size, kind = row[position:position + 3]
+                position += 3
+                if kind in ("text", "blob") and size > PREVIEW_LIMIT:
+                    value = LargeValue(kind, size, value, self.table, self._headers[i],
+                                       self.key_column, key)
+                values.append(value)
+            converted.append(tuple(values))
+        return converted
+
+    def _position(self, index):
+        """Позиция столбца index в строке обёрнутого запроса"""
+        return sum(3 if i in self.columns else 1 for i in range(index))
+
@@ -1,11 +1,47 @@
+import json
+import logging
+import os
 import sys
+import sqlite3
+import time
+from collections import deque
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QAction, QTabWidget, QWidget,
-    QVBoxLayout, QHBoxLayout, QPushButton, QComboBox, QTableWidget,
-    QTableWidgetItem, QMessageBox, QFileDialog
+    QVBoxLayout, QHBoxLayout, QPushButton, QComboBox, QTableView,
+    QMessageBox, QFileDialog, QDockWidget, QPlainTextEdit, QProgressDialog, QCheckBox,
+    QLineEdit, QLabel, QListWidget, QListWidgetItem
 )
-from PyQt5.QtSql import QSqlDatabase, QSqlQuery
 from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QFontDatabase
+
+from column_browser import ColumnBrowser
+from column_stats import ColumnProfiler
+from connection_manager import ConnectionManager
+from database_watcher import DatabaseWatcher, reads_only_schema
+from large_value_viewer import LargeValueViewer
+from large_values import LargeValue, LargeValuePreview
+from full_text_search import FullTextIndexer, index_path, indexable_tables, open_index, search
+from open_options_dialog import OpenOptionsDialog
+from query_executor import QueryExecutor
+from query_profile import QueryProfile, explain_query_plan
+from result_cache import ResultCache, database_version
+from result_export import ResultExporter
+from result_model import QueryResultModel
+from schema_catalog import SchemaCatalog, quote_identifier
+from sql_console import SqlConsole, is_read_query, manages_transaction, split_statements
+
+# Бюджет памяти кэша результатов запросов
+RESULT_CACHE_BYTES = 64 * 1024 * 1024
+# Сколько последних профилей запросов хранится для экспорта
+PROFILE_HISTORY = 1000
+# Доля строк в режиме выборки статистики колонки
+COLUMN_STATS_SAMPLE = 0.01
+# Вкладка, на которой открывается строка, найденная поиском (Tab5)
+SEARCH_RESULT_TAB = 4
+# Вкладка SQL-консоли (после Tab1–Tab5)
+CONSOLE_TAB = 5
+
+logger = logging.getLogger(__name__)
 
 
 class MainWindow(QMainWindow):
@@ -15,8 +51,25 @@ class MainWindow(QMainWindow):
         self.setGeometry(100, 100, 800, 600)
 
         # Инициализация базы данных
-        self.db = None
+        self.connections = ConnectionManager()  # Открытые БД по именам
+        self.active_database = None  # Имя БД, с которой работают вкладки
         self.current_table = None  # Текущая таблица для запросов
+        self.executors = []  # Фоновые исполнители запросов, по одному на вкладку
+        self.database_path = None
+        self.probe_connection = None  # Соединение для проверки PRAGMA data_version
+        self.result_cache = ResultCache(RESULT_CACHE_BYTES)
+        self.catalogs = {}  # Схемы открытых БД в памяти, по именам
+        self.catalog = SchemaCatalog()  # Схема активной БД
+        self.profiles = deque(maxlen=PROFILE_HISTORY)  # Профили выполненных запросов
+        self.exporter = None
+        self.column_stats = {}  # (БД, таблица, колонка, версия БД, выборка) -> ColumnStats
+        self.column_profiler = None
+        self.indexer = None  # Фоновое обновление индекса полнотекстового поиска
+        self.search_connection = None  # Соединение с файлом индекса для поиска
+        self.watcher = DatabaseWatcher(self)  # Режим наблюдения за изменениями БД
+        self.watcher.changed.connect(self.on_database_changed)
+        self.tail_tasks = {}  # вкладка -> задача дописывания новых строк
+        self.deferred_change = None  # изменение, пришедшее во время дописывания
 
         # Центральный виджет и макет
         central_widget = QWidget()
@@ -35,6 +88,30 @@ class MainWindow(QMainWindow):
         close_conn_action.triggered.connect(self.close_connection)
         db_menu.addAction(close_conn_action)
 
+        cancel_action = QAction("Cancel query", self)
+        cancel_action.setShortcut("Esc")
+        cancel_action.triggered.connect(self.cancel_current_query)
+        db_menu.addAction(cancel_action)
+
+        # Необязательный режим: после подключения запросы всех вкладок запускаются сразу
+        self.prefetch_action = QAction("Prefetch all tabs on connect", self)
+        self.prefetch_action.setCheckable(True)
+        self.prefetch_action.toggled.connect(self.on_prefetch_toggled)
+        db_menu.addAction(self.prefetch_action)
+
+        self.watch_action = QAction("Watch for changes", self)
+        self.watch_action.setCheckable(True)
+        self.watch_action.toggled.connect(self.update_watch)
+        db_menu.addAction(self.watch_action)
+
+        export_action = QAction("Export results...", self)
+        export_action.triggered.connect(self.export_current_tab)
+        db_menu.addAction(export_action)
+
+        export_profiles_action = QAction("Export query profiles (JSON)...", self)
+        export_profiles_action.triggered.connect(self.export_profiles)
+        db_menu.addAction(export_profiles_action)
+
         # Виджет вкладок
         self.tab_widget = QTabWidget()
         main_layout.addWidget(self.tab_widget)
@@ -42,12 +119,39 @@ class MainWindow(QMainWindow):
         # Создаем вкладки
         self.create_tabs()
 
+        # Консоль произвольных запросов — шестая вкладка со своим исполнителем
+        self.console = SqlConsole()
+        self.console.run_requested.connect(self.run_console_query)
+        self.console.table_view.doubleClicked.connect(self.open_large_value)
+        self.tabs.append(self.console.table_view)
+        self.tab_widget.addTab(self.console, "SQL")
+        # (запрос, параметры), показанные на вкладках — только читающие запросы, их можно повторить
+        self.tab_queries = [None] * len(self.tabs)
+
+        # Постраничный просмотр выбранной колонки над таблицей Tab3
+        self.column_browser = ColumnBrowser()
+        self.column_browser.page_requested.connect(self.show_column_page)
+        self.column_browser.prefetch_requested.connect(
+            lambda sql, params: self.prefetch_query(sql, params, 2, self.column_browser.preview(),
+                                                    self.column_browser.prefetch_loaded))
+        self.tab_widget.widget(2).layout().insertWidget(0, self.column_browser)
+
         # Панель управления (кнопки и комбобокс)
         control_layout = QHBoxLayout()
+        self.databases_combo = QComboBox()
+        self.databases_combo.setToolTip("Активная база данных")
+        self.databases_combo.currentIndexChanged.connect(self.on_database_selected)
+        control_layout.addWidget(self.databases_combo)
+
         self.b1_btn = QPushButton("b1 'SELECT Column'")
         self.b1_btn.clicked.connect(self.execute_b1_query)
         control_layout.addWidget(self.b1_btn)
 
+        self.tables_combo = QComboBox()
+        self.tables_combo.addItem("Выберите таблицу...")
+        self.tables_combo.currentIndexChanged.connect(self.on_table_selected)
+        control_layout.addWidget(self.tables_combo)
+
         self.columns_combo = QComboBox()
         self.columns_combo.addItem("Выберите колонку...")
         self.columns_combo.currentIndexChanged.connect(self.on_column_selected)
@@ -63,6 +167,64 @@ class MainWindow(QMainWindow):
 
         main_layout.addLayout(control_layout)
 
+        # Боковая панель профиля запроса текущей вкладки
+        self.profile_view = QPlainTextEdit()
+        self.profile_view.setReadOnly(True)
+        self.profile_view.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        self.profile_dock = QDockWidget("Профиль запроса", self)
+        self.profile_dock.setWidget(self.profile_view)
+        self.addDockWidget(Qt.RightDockWidgetArea, self.profile_dock)
+        self.profile_dock.hide()
+        db_menu.addAction(self.profile_dock.toggleViewAction())
+        self.tab_widget.currentChanged.connect(self.update_profile_view)
+
+        # Боковая панель статистики выбранной колонки
+        stats_widget = QWidget()
+        stats_layout = QVBoxLayout(stats_widget)
+        stats_controls = QHBoxLayout()
+        self.stats_sample_check = QCheckBox(f"Выборка {COLUMN_STATS_SAMPLE:.0%}")
+        self.stats_sample_check.toggled.connect(self.profile_column)
+        stats_controls.addWidget(self.stats_sample_check)
+        self.stats_cancel_btn = QPushButton("Отмена")
+        self.stats_cancel_btn.setEnabled(False)
+        self.stats_cancel_btn.clicked.connect(self.cancel_column_profile)
+        stats_controls.addWidget(self.stats_cancel_btn)
+        stats_layout.addLayout(stats_controls)
+        self.stats_view = QPlainTextEdit()
+        self.stats_view.setReadOnly(True)
+        self.stats_view.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        stats_layout.addWidget(self.stats_view)
+        self.stats_dock = QDockWidget("Статистика колонки", self)
+        self.stats_dock.setWidget(stats_widget)
+        self.addDockWidget(Qt.RightDockWidgetArea, self.stats_dock)
+        self.stats_dock.hide()
+        db_menu.addAction(self.stats_dock.toggleViewAction())
+        self.stats_dock.visibilityChanged.connect(lambda visible: visible and self.profile_column())
+
+        # Боковая панель полнотекстового поиска по всем таблицам
+        search_widget = QWidget()
+        search_layout = QVBoxLayout(search_widget)
+        search_controls = QHBoxLayout()
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Найти во всех таблицах...")
+        self.search_edit.textChanged.connect(self.search_full_text)
+        search_controls.addWidget(self.search_edit)
+        rebuild_btn = QPushButton("Перестроить индекс")
+        rebuild_btn.clicked.connect(lambda: self.update_search_index(rebuild=True))
+        search_controls.addWidget(rebuild_btn)
+        search_layout.addLayout(search_controls)
+        self.search_status = QLabel()
+        search_layout.addWidget(self.search_status)
+        self.search_results = QListWidget()
+        self.search_results.itemActivated.connect(self.show_search_hit)
+        search_layout.addWidget(self.search_results)
+        self.search_dock = QDockWidget("Поиск", self)
+        self.search_dock.setWidget(search_widget)
+        self.addDockWidget(Qt.RightDockWidgetArea, self.search_dock)
+        self.search_dock.hide()
+        db_menu.addAction(self.search_dock.toggleViewAction())
+        self.search_dock.visibilityChanged.connect(lambda visible: visible and self.update_search_index())
+
         # Устанавливаем начальную вкладку (Tab1) пустой
         self.setup_tab1()
 
@@ -72,19 +234,18 @@ class MainWindow(QMainWindow):
         for i in range(1, 6):
             tab = QWidget()
             layout = QVBoxLayout(tab)
-            table = QTableWidget()
-            table.setColumnCount(0)
-            table.setRowCount(0)
+            table = QTableView()
+            table.setModel(QueryResultModel(parent=table))
+            table.doubleClicked.connect(self.open_large_value)
             layout.addWidget(table)
             self.tabs.append(table)
             self.tab_widget.addTab(tab, f"Tab{i}")
 
     def setup_tab1(self):
         """Загрузка данных в Tab1 по умолчанию"""
-        if not self.db or not self.db.isOpen():
+        if self.active_database is None:
             return
-        query = QSqlQuery("SELECT * FROM sqlite_master")
-        self.display_query_results(query, self.tabs[0])
+        self.display_query_results("SELECT * FROM sqlite_master", 0)
 
     def set_connection(self):
         """Установить соединение с БД"""
@@ -94,165 +255,753 @@ class MainWindow(QMainWindow):
         if not file_path:
             return
 
-        # Закрываем предыдущее соединение
-        if self.db and self.db.isOpen():
-            self.db.close()
-
-        # Подключение к новой БД
-        self.db = QSqlDatabase.addDatabase("QSQLITE")
-        self.db.setDatabaseName(file_path)
-        if not self.db.open():
-            QMessageBox.critical(self, "Ошибка", f"Не удалось подключиться: {self.db.lastError().text()}")
-            self.db = None
+        dialog = OpenOptionsDialog(file_path, self)
+        if not dialog.exec_():
             return
-
-        QMessageBox.information(self, "Успех", "Подключение установлено!")
+        if self.open_database(file_path, dialog.options()):
+            QMessageBox.information(self, "Успех", "Подключение установлено!")
+
+    def open_database(self, file_path, options=None):
+        """Открыть файл БД (в дополнение к уже открытым) и сделать его активным"""
+        name = self.connections.unique_name(file_path)
+        try:
+            self.connections.open(name, file_path, options)
+        except sqlite3.Error as error:
+            QMessageBox.critical(self, "Ошибка", f"Не удалось подключиться: {error}")
+            return False
+        logger.info("Открыта БД %s (%s)", name, self.connections.options(name).describe())
+
+        self.catalogs[name] = SchemaCatalog()
+        self.activate_database(name)
+        return True
+
+    def activate_database(self, name):
+        """Переключить вкладки на открытую БД name и заполнить Tab1 и списки таблиц/колонок"""
+        if self.active_database is not None:
+            self.watcher.stop()
+            self.cancel_column_profile()
+            self.close_search_index()
+            self.clear_tabs()
+            self.close_executors()
+
+        self.active_database = name
+        self.catalog = self.catalogs[name]
+        self.database_path = self.connections.path(name)
+        # Каждая вкладка выполняет запросы в своём потоке на своём соединении
+        self.executors = [QueryExecutor(self.connections, name, parent=self) for _ in self.tabs]
+        self.probe_connection = self.connections.connection(name)
+
+        self.update_databases_combo()
+        self.current_table = None
+        self.column_browser.clear()
         self.setup_tab1()
         self.load_columns_list()
+        if self.prefetch_action.isChecked():
+            self.prefetch_tabs()
+        if self.search_dock.isVisible():
+            self.update_search_index()
+        self.update_watch()
+
+    def prefetch_tabs(self):
+        """Запускает запросы Tab2–Tab5 одновременно.
+
+        У каждой вкладки свой поток и своё соединение, поэтому запросы читают БД
+        параллельно, а вкладки заполняются по мере прихода результатов.
+        """
+        if self.active_database is None:
+            return
+        self.execute_b1_query()
+        if self.current_table and self.columns_combo.count() > 1:
+            # Tab3 — первая колонка выбранной таблицы
+            self.columns_combo.setCurrentIndex(1)
+        self.execute_b2_query()
+        self.execute_b3_query()
+
+    def on_prefetch_toggled(self, checked):
+        if checked:
+            self.prefetch_tabs()
+
+    def update_databases_combo(self):
+        """Список открытых БД с режимом открытия; выбрана активная"""
+        names = self.connections.names()
+        self.databases_combo.blockSignals(True)
+        self.databases_combo.clear()
+        for name in names:
+            self.databases_combo.addItem(f"{name} [{self.connections.options(name).describe()}]", name)
+        if self.active_database in names:
+            self.databases_combo.setCurrentIndex(names.index(self.active_database))
+        self.databases_combo.blockSignals(False)
+
+    def on_database_selected(self, index):
+        name = self.databases_combo.itemData(index)
+        if name is not None and name != self.active_database:
+            self.activate_database(name)
 
     def close_connection(self):
-        """Закрыть соединение"""
-        if self.db and self.db.isOpen():
-            self.db.close()
-            self.db = None
-            QMessageBox.information(self, "Информация", "Соединение закрыто.")
-            # Очистка всех таблиц
-            for tab in self.tabs:
-                tab.setRowCount(0)
-                tab.setColumnCount(0)
-            self.columns_combo.clear()
-            self.columns_combo.addItem("Выберите колонку...")
+        """Закрыть соединение с активной БД (остальные открытые БД остаются)"""
+        if self.active_database is None:
+            return
+        # Очистка всех таблиц (модели держат открытые курсоры)
+        name = self.active_database
+        self.watcher.stop()
+        self.cancel_column_profile()
+        self.close_search_index()
+        self.clear_tabs()
+        self.close_executors()
+        self.column_stats = {key: stats for key, stats in self.column_stats.items() if key[0] != name}
+        # data_version сравним только в пределах одного соединения
+        self.result_cache.invalidate(name)
+        self.connections.close(name)
+        del self.catalogs[name]
+        self.active_database = None
+
+        remaining = self.connections.names()
+        if remaining:
+            self.activate_database(remaining[0])
+        else:
+            self.database_path = None
+            self.catalog = SchemaCatalog()
+            self.current_table = None
+            self.column_browser.clear()
+            self.search_results.clear()
+            self.search_status.clear()
+            self.update_databases_combo()
+            self.fill_combo(self.tables_combo, "Выберите таблицу...", [])
+            self.fill_combo(self.columns_combo, "Выберите колонку...", [])
+        QMessageBox.information(self, "Информация", f"Соединение с {name} закрыто.")
+
+    def close_executors(self):
+        """Прерывает фоновые запросы и останавливает потоки исполнителей"""
+        for executor in self.executors:
+            executor.close()
+        self.executors = []
+        self.probe_connection = None
+
+    def cancel_current_query(self):
+        """Прервать запрос, выполняющийся на текущей вкладке"""
+        index = self.tab_widget.currentIndex()
+        model = self.tabs[index].model()
+        if model.task is not None and model.is_loading():
+            model.task.cancel()
+
+    def closeEvent(self, event):
+        if self.exporter is not None:
+            self.exporter.cancel()
+            self.exporter.wait()
+        self.watcher.stop()
+        self.cancel_column_profile()
+        self.close_search_index()
+        self.clear_tabs()
+        self.close_executors()
+        self.connections.close_all()
+        super().closeEvent(event)
+
+    def update_watch(self):
+        """Включает или выключает наблюдение за активной БД по состоянию пункта меню"""
+        if self.watch_action.isChecked() and self.active_database is not None:
+            self.watcher.start(self.probe_connection, self.database_path)
+        else:
+            self.watcher.stop()
+
+    def on_database_changed(self, version, schema_changed):
+        """БД изменена другим соединением: дописываем новые строки, а где нельзя — перечитываем вкладку"""
+        if self.tail_tasks:
+            # Новые строки ещё дописываются — повторим, когда закончат
+            previous = self.deferred_change
+            self.deferred_change = (version, schema_changed or bool(previous and previous[1]))
+            return
+        logger.debug("БД изменилась: %r, схема %s", version, "изменилась" if schema_changed else "та же")
+        if schema_changed:
+            self.refresh_schema_catalog(version[1])
+
+        for tab_index, query in enumerate(self.tab_queries):
+            if query is None:
+                continue
+            if not schema_changed and reads_only_schema(query[0]):
+                continue
+            if not schema_changed and self.append_new_rows(tab_index):
+                continue
+            self.requery_tab(tab_index)
+
+    def append_new_rows(self, tab_index):
+        """Дописывает в модель вкладки строки с ключом больше последнего показанного"""
+        tail = self.column_browser.tail_query() if tab_index == 2 else None
+        model = self.tabs[tab_index].model()
+        if tail is None or not model.is_complete():
+            return False
+
+        executor = self.executors[tab_index]
+        task = executor.submit(*tail, preview=self.column_browser.preview())
+        self.tail_tasks[tab_index] = task
+        # Модель больше не совпадает с результатом исходного запроса страницы
+        model.cache_key = None
+
+        def on_rows_ready(rows, exhausted):
+            if self.tabs[tab_index].model() is not model:
+                task.release()
+                self.finish_tail(tab_index)
+                return
+            model.append_rows(rows)
+            if not exhausted:
+                task.fetch(executor.batch_size)
+                return
+            self.column_browser.rows_appended(model)
+            if rows:
+                self.statusBar().showMessage(f"Tab{tab_index + 1}: новых строк {len(rows)}", 5000)
+            self.finish_tail(tab_index)
+
+        task.rows_ready.connect(on_rows_ready)
+        task.failed.connect(lambda error: logger.warning("Не удалось дописать строки: %s", error))
+        task.failed.connect(lambda: self.finish_tail(tab_index))
+        task.cancelled.connect(lambda: self.finish_tail(tab_index))
+        return True
+
+    def finish_tail(self, tab_index):
+        self.tail_tasks.pop(tab_index, None)
+        if not self.tail_tasks and self.deferred_change is not None:
+            version, schema_changed = self.deferred_change
+            self.deferred_change = None
+            self.on_database_changed(version, schema_changed)
+
+    def requery_tab(self, tab_index):
+        """Перечитывает вкладку, сохраняя положение прокрутки"""
+        if tab_index == 2 and self.column_browser.table is not None:
+            self.column_browser.refresh()
+            return
+        sql, params = self.tab_queries[tab_index]
+        scroll_bar = self.tabs[tab_index].verticalScrollBar()
+        position = scroll_bar.value()
+        model = self.display_query_results(sql, tab_index, params)
+        if model is None:
+            return
+        if model.is_complete():
+            scroll_bar.setValue(position)
+        else:
+            model.first_rows_loaded.connect(lambda: scroll_bar.setValue(position))
+
+    def clear_tabs(self):
+        """Очищает все вкладки и закрывает их курсоры"""
+        self.tab_queries = [None] * len(self.tabs)
+        self.tail_tasks = {}
+        self.deferred_change = None
+        for table in self.tabs:
+            self.set_table_model(table, QueryResultModel(parent=table))
+
+    def set_table_model(self, table_view, model):
+        """Устанавливает новую модель в таблицу, освобождая предыдущую"""
+        old_model = table_view.model()
+        table_view.setModel(model)
+        if old_model is not None:
+            self.cache_result(old_model)
+            old_model.release()
+            old_model.deleteLater()
 
     def load_columns_list(self):
-        """Загружает список колонок из первой таблицы для комбобокса"""
-        if not self.db or not self.db.isOpen():
+        """Загружает каталог схемы и заполняет списки таблиц и колонок"""
+        if self.active_database is None:
             return
 
-        query = QSqlQuery("SELECT name FROM sqlite_master WHERE type='table'")
-        tables = []
-        while query.next():
-            tables.append(query.value(0))
-
+        self.refresh_schema_catalog()
+        tables = self.catalog.table_names()
+        self.fill_combo(self.tables_combo, "Выберите таблицу...", tables)
         if tables:
-            self.current_table = tables[0]
-            query = QSqlQuery(f"PRAGMA table_info({self.current_table})")
-            columns = []
-            while query.next():
-                col_name = query.value(1)  # имя столбца
-                if col_name:  # Проверяем, что имя не пустое
-                    columns.append(col_name)
-
-            self.columns_combo.clear()
-            self.columns_combo.addItem("Выберите колонку...")
-            self.columns_combo.addItems(columns)
+            # По умолчанию — первая таблица, как и раньше
+            self.tables_combo.setCurrentIndex(1)
+
+    def refresh_schema_catalog(self, schema_version=None):
+        """Перечитывает каталог, если изменилась PRAGMA schema_version"""
+        if self.probe_connection is None:
+            return
+        if not self.catalog.refresh(self.probe_connection, schema_version):
+            return
+
+        # Схема изменилась — обновляем списки, сохраняя выбор
+        current_table = self.current_table
+        current_column = self.columns_combo.currentText()
+        tables = self.catalog.table_names()
+        self.fill_combo(self.tables_combo, "Выберите таблицу...", tables)
+        if current_table in tables:
+            self.tables_combo.blockSignals(True)
+            self.tables_combo.setCurrentIndex(tables.index(current_table) + 1)
+            self.tables_combo.blockSignals(False)
+            columns = self.catalog.columns(current_table)
+            self.fill_combo(self.columns_combo, "Выберите колонку...", columns)
+            if current_column in columns:
+                self.columns_combo.blockSignals(True)
+                self.columns_combo.setCurrentIndex(columns.index(current_column) + 1)
+                self.columns_combo.blockSignals(False)
+        else:
+            self.current_table = None
+            self.fill_combo(self.columns_combo, "Выберите колонку...", [])
+
+    def fill_combo(self, combo, placeholder, items):
+        """Заполняет комбобокс без срабатывания обработчиков выбора"""
+        combo.blockSignals(True)
+        combo.clear()
+        combo.addItem(placeholder)
+        combo.addItems(items)
+        combo.blockSignals(False)
+
+    def on_table_selected(self):
+        """При выборе таблицы — показать её колонки (из каталога, без запросов к БД)"""
+        if self.tables_combo.currentIndex() <= 0:
+            self.current_table = None
+            self.fill_combo(self.columns_combo, "Выберите колонку...", [])
+            return
+        self.current_table = self.tables_combo.currentText()
+        self.fill_combo(self.columns_combo, "Выберите колонку...", self.catalog.columns(self.current_table))
 
     def execute_b1_query(self):
         """Выполнить запрос SELECT name FROM sqlite_master -> Tab2"""
-        if not self.db or not self.db.isOpen():
+        if self.active_database is None:
             QMessageBox.warning(self, "Предупреждение", "Сначала установите соединение!")
             return
 
-        query = QSqlQuery("SELECT name FROM sqlite_master")
-        self.display_query_results(query, self.tabs[1])  # Tab2
+        self.display_query_results("SELECT name FROM sqlite_master", 1)  # Tab2
 
     def on_column_selected(self):
         """При выборе колонки в комбобоксе — выполнить запрос для неё -> Tab3"""
         selected_col = self.columns_combo.currentText()
-        if selected_col == "Выберите колонку..." or not self.db or not self.db.isOpen() or not selected_col.strip():
+        if self.columns_combo.currentIndex() <= 0 or self.active_database is None or not selected_col.strip():
             return
 
         if not hasattr(self, 'current_table') or not self.current_table:
             QMessageBox.warning(self, "Предупреждение", "Не выбрана таблица для запроса.")
             return
 
-        query_str = f"SELECT {selected_col} FROM {self.current_table} LIMIT 10"
-        query = QSqlQuery(query_str)
-        self.display_query_results(query, self.tabs[2])  # Tab3
+        self.column_browser.set_column(self.catalog.table(self.current_table), selected_col)
+        self.profile_column()
+
+    def profile_column(self):
+        """Показывает статистику выбранной колонки: из кэша или одним проходом в фоне"""
+        if not self.stats_dock.isVisible():
+            return
+        column = self.columns_combo.currentText()
+        if self.active_database is None or not self.current_table or self.columns_combo.currentIndex() <= 0:
+            self.stats_view.setPlainText("Выберите таблицу и колонку.")
+            return
+
+        sample_fraction = COLUMN_STATS_SAMPLE if self.stats_sample_check.isChecked() else None
+        key = (self.active_database, self.current_table, column,
+               database_version(self.probe_connection), sample_fraction)
+        self.cancel_column_profile()
+        if key in self.column_stats:
+            self.stats_view.setPlainText(self.column_stats[key].to_text())
+            return
+
+        name = self.active_database
+        profiler = ColumnProfiler(lambda: self.connections.connect(name), self.current_table, column,
+                                  sample_fraction, parent=self)
+        self.column_profiler = profiler
+
+        def show(text):
+            # Сигналы прерванного сбора могут прийти уже после запуска следующего
+            if self.column_profiler is profiler:
+                self.stats_view.setPlainText(text)
+
+        show(f"{self.current_table}.{column}: сбор статистики...")
+        self.stats_cancel_btn.setEnabled(True)
+        profiler.progress.connect(lambda rows: show(f"{key[1]}.{key[2]}: просмотрено строк {rows}..."))
+        profiler.finished.connect(lambda stats: self.on_column_profiled(key, stats))
+        profiler.finished.connect(lambda stats: show(stats.to_text()))
+        profiler.failed.connect(lambda error: show(f"Ошибка: {error}"))
+        profiler.cancelled.connect(lambda: show("Сбор статистики отменён."))
+        for signal in (profiler.finished, profiler.failed, profiler.cancelled):
+            signal.connect(lambda *args: self.on_column_profile_done(profiler))
+        profiler.start()
+
+    def update_search_index(self, rebuild=False):
+        """Дописывает в индекс поиска новые строки всех таблиц (или перестраивает его) в фоне"""
+        if self.active_database is None:
+            return
+        if self.indexer is not None:
+            if not rebuild:
+                return
+            self.indexer.cancel()
+            self.indexer.wait()
+            self.indexer = None
+
+        self.refresh_schema_catalog()
+        name = self.active_database
+        path = index_path(self.database_path)
+        indexer = FullTextIndexer(lambda: self.connections.connect(name), path,
+                                  indexable_tables(self.catalog), rebuild, parent=self)
+        self.indexer = indexer
+
+        def show(text):
+            if self.indexer is indexer:
+                self.search_status.setText(text)
+
+        def on_done(*args):
+            indexer.wait()
+            indexer.deleteLater()
+            if self.indexer is indexer:
+                self.indexer = None
+                self.search_full_text()
+
+        show("Обновление индекса...")
+        indexer.progress.connect(lambda table, rows: show(f"Индексация {table}: {rows} строк..."))
+        indexer.finished.connect(lambda rows: show(f"Индекс обновлён, новых строк: {rows}"))
+        indexer.failed.connect(lambda error: show(f"Ошибка индексации: {error}"))
+        indexer.cancelled.connect(lambda: show("Индексация прервана"))
+        for signal in (indexer.finished, indexer.failed, indexer.cancelled):
+            signal.connect(on_done)
+        indexer.start()
+
+    def close_search_index(self):
+        """Прерывает индексацию и закрывает соединение с индексом активной БД"""
+        if self.indexer is not None:
+            indexer = self.indexer
+            self.indexer = None
+            indexer.cancel()
+            indexer.wait()
+        if self.search_connection is not None:
+            self.search_connection.close()
+            self.search_connection = None
+
+    def search_full_text(self):
+        """Ищет введённые слова по индексу и показывает совпадения (таблица, rowid, фрагмент)"""
+        self.search_results.clear()
+        text = self.search_edit.text()
+        if self.active_database is None or not text.strip():
+            return
+        try:
+            if self.search_connection is None:
+                self.search_connection = open_index(index_path(self.database_path))
+            started = time.perf_counter()
+            hits = search(self.search_connection, text)
+        except (sqlite3.Error, RuntimeError) as error:
+            self.search_status.setText(f"Ошибка поиска: {error}")
+            return
+        elapsed = (time.perf_counter() - started) * 1000
+        for table, rowid, snippet in hits:
+            item = QListWidgetItem(f"{table} #{rowid}: {' '.join(snippet.split())}")
+            item.setData(Qt.UserRole, (table, rowid))
+            self.search_results.addItem(item)
+        if self.indexer is None:
+            self.search_status.setText(f"Найдено: {len(hits)} за {elapsed:.1f} мс")
+
+    def show_search_hit(self, item):
+        """Открывает найденную строку на вкладке SEARCH_RESULT_TAB"""
+        table, rowid = item.data(Qt.UserRole)
+        columns = self.catalog.columns(table)
+        preview = LargeValuePreview(table, ["rowid"] + columns, range(1, len(columns) + 1), "rowid", 0)
+        # Столбцы — явным списком из каталога: «*» вернул бы и генерируемые столбцы,
+        # которых нет в pragma_table_info, и число столбцов не совпало бы с превью
+        select_list = ", ".join(["rowid"] + [quote_identifier(column) for column in columns])
+        self.display_query_results(f"SELECT {select_list} FROM {quote_identifier(table)} WHERE rowid = ?",
+                                   SEARCH_RESULT_TAB, (rowid,), preview)
+        self.tab_widget.setCurrentIndex(SEARCH_RESULT_TAB)
+
+    def open_large_value(self, index):
+        """Двойной щелчок по большому значению открывает его целиком в окне просмотра"""
+        model = index.model()
+        if not index.isValid() or model.is_placeholder():
+            return
+        value = model.row_values(index.row())[index.column()]
+        if not isinstance(value, LargeValue) or self.active_database is None:
+            return
+        if not value.can_load():
+            QMessageBox.information(self, "Информация",
+                                    "Значение получено без ключа строки, доступно только начало.")
+            return
+        name = self.active_database
+        viewer = LargeValueViewer(value, lambda: self.connections.connect(name), self)
+        viewer.show()
+
+    def on_column_profiled(self, key, stats):
+        """Кэширует статистику; прежние версии для той же колонки больше не нужны"""
+        self.column_stats = {cached_key: cached for cached_key, cached in self.column_stats.items()
+                             if cached_key[:3] != key[:3] or cached_key[4] != key[4]}
+        self.column_stats[key] = stats
+
+    def on_column_profile_done(self, profiler):
+        profiler.wait()
+        profiler.deleteLater()
+        if self.column_profiler is profiler:
+            self.column_profiler = None
+            self.stats_cancel_btn.setEnabled(False)
+
+    def cancel_column_profile(self):
+        """Прерывает сбор статистики колонки и дожидается остановки потока"""
+        profiler = self.column_profiler
+        if profiler is None:
+            return
+        self.column_profiler = None
+        self.stats_cancel_btn.setEnabled(False)
+        self.stats_view.setPlainText("Сбор статистики отменён.")
+        profiler.cancel()
+        profiler.wait()
+
+    def show_column_page(self, sql, params):
+        """Показывает страницу колонки в Tab3 и сообщает панели, когда она загружена"""
+        model = self.display_query_results(sql, 2, params, self.column_browser.preview())  # Tab3
+        if model is None:
+            return
+        if model.is_complete():
+            self.column_browser.page_loaded(model)
+            return
+
+        def on_loading_finished():
+            # Страница могла быть уже заменена следующей
+            if self.tabs[2].model() is model:
+                self.column_browser.page_loaded(model)
+
+        model.loading_finished.connect(on_loading_finished)
 
     def execute_b2_query(self):
         """Запрос для b2 -> Tab4"""
-        if not self.db or not self.db.isOpen():
+        if self.active_database is None:
             QMessageBox.warning(self, "Предупреждение", "Сначала установите соединение!")
             return
 
-        query = QSqlQuery("SELECT * FROM sqlite_master WHERE type='table' LIMIT 5")
-        self.display_query_results(query, self.tabs[3])  # Tab4
+        self.display_query_results("SELECT * FROM sqlite_master WHERE type='table' LIMIT 5", 3)  # Tab4
 
     def execute_b3_query(self):
         """Запрос для b3 -> Tab5"""
-        if not self.db or not self.db.isOpen():
+        if self.active_database is None:
             QMessageBox.warning(self, "Предупреждение", "Сначала установите соединение!")
             return
 
-        query = QSqlQuery("SELECT sql FROM sqlite_master WHERE type='table' LIMIT 3")
-        self.display_query_results(query, self.tabs[4])  # Tab5
-
-    def display_query_results(self, query, table_widget):
-        """Отображает результаты запроса в указанной таблице (с отладкой)"""
-        print(f"[DEBUG] Запрос: {query.lastQuery()}")
+        self.display_query_results("SELECT sql FROM sqlite_master WHERE type='table' LIMIT 3", 4)  # Tab5
+
+    def display_query_results(self, sql, tab_index, params=(), preview=None, read_only=True, statements=None):
+        """Выполняет запрос в фоне и показывает результат на вкладке (строки подгружаются по мере прокрутки).
+
+        preview — LargeValuePreview, если большие значения нужно читать только превью;
+        read_only=False — запрос изменяет БД: не кэшируется и не повторяется;
+        statements — операторы скрипта, выполняемые одной транзакцией (результат — последний).
+        """
+        logger.debug("Запрос: %s %r", sql, params)
+        if not self.executors:
+            return None
+
+        table_view = self.tabs[tab_index]
+        self.tab_queries[tab_index] = (sql, params) if read_only else None
+        version = database_version(self.probe_connection)
+        self.refresh_schema_catalog(version[1])
+        cached = self.result_cache.get(self.active_database, sql, params, version) if read_only else None
+
+        profile = QueryProfile(sql, params, tab_index, cached=cached is not None)
+        if statements is None:
+            profile.plan = explain_query_plan(self.probe_connection, sql, params)
+        else:
+            profile.plan = f"Скрипт: {len(statements)} операторов"
+        self.profiles.append(profile)
+
+        if cached is not None and cached.complete:
+            logger.debug("Результат взят из кэша")
+            started = time.perf_counter()
+            model = QueryResultModel(cached=cached, parent=table_view)
+            model.cache_key = (self.active_database, sql, params, version)
+            self.set_table_model(table_view, model)
+            profile.add("populate", time.perf_counter() - started)
+            profile.rows = model.loaded_row_count()
+            profile.status = "готово"
+            self.resize_columns(table_view, profile)
+            return model
+
+        # Из неполной записи кэша сразу показываем прочитанные строки, остальное догружаем
+        skip = len(cached.rows) if cached is not None else 0
+        if statements is not None:
+            # Скрипт, который сам управляет транзакциями, не оборачиваем в BEGIN/COMMIT
+            task = self.executors[tab_index].submit_script(statements, params, not manages_transaction(statements))
+        else:
+            task = self.executors[tab_index].submit(sql, params, skip=skip, preview=preview)
+        model = QueryResultModel(task, cached=cached, parent=table_view)
+        model.cache_key = (self.active_database, sql, params, version) if read_only else None
+        model.profile = profile
+        profile.rows = model.loaded_row_count()
+        model.loading_finished.connect(lambda: self.cache_result(model))
+        self.set_table_model(table_view, model)
+        if cached is not None:
+            self.resize_columns(table_view, profile)
+
+        if read_only:
+            task.columns_ready.connect(self.on_columns_ready)
+        else:
+            # Изменяющий запрос мог поменять схему (CREATE/DROP/ALTER)
+            model.loading_finished.connect(lambda: self.refresh_schema_catalog())
+        task.timing_ready.connect(profile.add)
+        task.failed.connect(self.on_query_failed)
+        task.failed.connect(lambda: self.finish_profile(profile, "ошибка"))
+        task.cancelled.connect(lambda: self.statusBar().showMessage("Запрос отменён", 5000))
+        task.cancelled.connect(lambda: self.finish_profile(profile, "отменён"))
+        model.first_rows_loaded.connect(lambda: self.resize_columns(table_view, profile))
+        model.first_rows_loaded.connect(lambda: self.finish_profile(profile, "прочитан частично"))
+        model.loading_finished.connect(lambda: self.finish_profile(profile, "готово"))
+        model.rowsInserted.connect(lambda *args: self.update_profile_view())
+        self.statusBar().showMessage(f"Выполняется запрос на вкладке Tab{tab_index + 1}...")
+        self.update_profile_view()
+        return model
+
+    def run_console_query(self, sql, params):
+        """Выполняет запрос или скрипт из SQL-консоли с привязанными параметрами"""
+        if self.active_database is None:
+            QMessageBox.warning(self, "Предупреждение", "Сначала установите соединение!")
+            return
+        statements = split_statements(sql)
+        if not statements:
+            return
+        if len(statements) == 1:
+            self.display_query_results(statements[0], CONSOLE_TAB, params,
+                                       read_only=is_read_query(statements[0]))
+        elif isinstance(params, tuple) and params:
+            self.console.status_label.setText(
+                "В скрипте из нескольких операторов используйте именованные параметры: {\"имя\": значение}")
+            return
+        else:
+            self.display_query_results(";\n".join(statements), CONSOLE_TAB, params,
+                                       read_only=False, statements=statements)
+        self.console.status_label.setText(f"Операторов: {len(statements)}")
+
+    def resize_columns(self, table_view, profile):
+        """Подгоняет ширину столбцов под видимые строки и записывает время в профиль"""
+        started = time.perf_counter()
+        table_view.resizeColumnsToContents()
+        profile.add("resize", time.perf_counter() - started)
+        self.update_profile_view()
+
+    def finish_profile(self, profile, status):
+        """Обновляет состояние профиля и показывает сводку в строке состояния"""
+        profile.status = status
+        self.statusBar().showMessage(profile.summary())
+        logger.debug("Профиль: %s", profile.summary())
+        self.update_profile_view()
+
+    def current_profile(self):
+        """Последний профиль запроса текущей вкладки"""
+        tab_index = self.tab_widget.currentIndex()
+        for profile in reversed(self.profiles):
+            if profile.tab_index == tab_index:
+                return profile
+        return None
+
+    def update_profile_view(self):
+        if not self.profile_dock.isVisible():
+            return
+        profile = self.current_profile()
+        self.profile_view.setPlainText(profile.to_text() if profile is not None else "")
+
+    def export_current_tab(self):
+        """Экспортирует результат запроса текущей вкладки в файл, читая его курсором в фоне"""
+        query = self.tab_queries[self.tab_widget.currentIndex()]
+        if query is None or not self.database_path:
+            QMessageBox.warning(self, "Предупреждение", "На этой вкладке нет результата запроса.")
+            return
+        if self.exporter is not None:
+            QMessageBox.warning(self, "Предупреждение", "Экспорт уже выполняется.")
+            return
 
-        if not query.exec_():
-            error_msg = query.lastError().text()
-            QMessageBox.critical(self, "Ошибка выполнения запроса", f"Не удалось выполнить запрос:\n{error_msg}")
-            print(f"[ERROR] Запрос не выполнился: {error_msg}")
+        filters = {"CSV (*.csv)": "csv", "JSON Lines (*.jsonl)": "jsonl", "Parquet (*.parquet)": "parquet"}
+        file_path, selected_filter = QFileDialog.getSaveFileName(
+            self, "Экспорт результата", "", ";;".join(filters)
+        )
+        if not file_path:
+            return
+        export_format = filters.get(selected_filter, "csv")
+        extension = "." + export_format
+        if not file_path.lower().endswith(extension):
+            file_path += extension
+
+        sql, params = query
+        name = self.active_database
+        self.exporter = ResultExporter(lambda: self.connections.connect(name), sql, params, file_path, export_format, parent=self)
+        progress = QProgressDialog("Экспорт...", "Отмена", 0, 0, self)
+        progress.setWindowTitle("Экспорт результата")
+        progress.setMinimumDuration(300)
+        progress.canceled.connect(self.exporter.cancel)
+        self.exporter.progress.connect(lambda rows: progress.setLabelText(f"Экспортировано строк: {rows}"))
+        self.exporter.finished.connect(
+            lambda rows: self.statusBar().showMessage(f"Экспортировано строк: {rows} → {file_path}", 10000))
+        self.exporter.failed.connect(
+            lambda error: QMessageBox.critical(self, "Ошибка экспорта", f"Не удалось выполнить экспорт:\n{error}"))
+        self.exporter.cancelled.connect(lambda: self.statusBar().showMessage("Экспорт отменён", 5000))
+        for signal in (self.exporter.finished, self.exporter.failed, self.exporter.cancelled):
+            signal.connect(progress.reset)
+            signal.connect(self.on_export_done)
+        self.exporter.start()
+
+    def on_export_done(self, *args):
+        if self.exporter is not None:
+            self.exporter.wait()
+            self.exporter.deleteLater()
+            self.exporter = None
+
+    def export_profiles(self):
+        """Сохраняет профили выполненных запросов в JSON"""
+        if not self.profiles:
+            QMessageBox.information(self, "Информация", "Запросы ещё не выполнялись.")
+            return
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "Экспорт профилей запросов", "query_profiles.json", "JSON Files (*.json)"
+        )
+        if not file_path:
             return
+        with open(file_path, "w", encoding="utf-8") as output:
+            json.dump([profile.to_dict() for profile in self.profiles], output, ensure_ascii=False, indent=2)
+        self.statusBar().showMessage(f"Профили сохранены: {file_path}", 5000)
 
-        # Проверяем, есть ли столбцы
-        record = query.record()
-        col_count = record.count()
-        print(f"[DEBUG] Количество столбцов: {col_count}")
+    def prefetch_query(self, sql, params, tab_index, preview=None, on_done=None):
+        """Выполняет запрос в фоне и кладёт весь результат в кэш, не показывая его.
 
-        if col_count == 0:
-            QMessageBox.warning(self, "Предупреждение", "Запрос не вернул столбцов.")
-            table_widget.setColumnCount(0)
-            table_widget.setRowCount(0)
+        on_done(sql, params, число строк) вызывается, когда результат прочитан целиком.
+        """
+        if not self.executors:
+            return
+        version = database_version(self.probe_connection)
+        cached = self.result_cache.get(self.active_database, sql, params, version)
+        if cached is not None:
+            if on_done is not None and cached.complete:
+                on_done(sql, params, len(cached.rows))
             return
 
-        # Получаем названия столбцов
+        database = self.active_database
+        executor = self.executors[tab_index]
+        task = executor.submit(sql, params, preview=preview)
         headers = []
-        for i in range(col_count):
-            field_name = record.fieldName(i)
-            if field_name is None or field_name == "":
-                field_name = f"Column_{i + 1}"
-            headers.append(field_name)
-            print(f"[DEBUG] Столбец {i}: {field_name}")
-
-        # Устанавливаем заголовки
-        table_widget.setColumnCount(col_count)
-        table_widget.setHorizontalHeaderLabels(headers)
-
-        # Очищаем таблицу
-        table_widget.setRowCount(0)
-
-        # Считаем строки
-        row_index = 0
-        while query.next():
-            print(f"[DEBUG] Обработка строки {row_index + 1}")
-            table_widget.insertRow(row_index)
-            for col in range(col_count):
-                value = query.value(col)
-                if value is None:
-                    value = "NULL"
-                else:
-                    value = str(value)
-                item = QTableWidgetItem(value)
-                table_widget.setItem(row_index, col, item)
-            row_index += 1
-
-        # Если данных нет — показываем сообщение
-        if row_index == 0:
-            print("[DEBUG] Нет данных в результате")
-            table_widget.setRowCount(1)
-            item = QTableWidgetItem("Нет данных")
-            item.setTextAlignment(Qt.AlignCenter)
-            table_widget.setItem(0, 0, item)
-            for col in range(1, col_count):
-                table_widget.setItem(0, col, QTableWidgetItem(""))
-
-        table_widget.resizeColumnsToContents()
+        rows = []
+
+        def on_rows_ready(batch, exhausted):
+            rows.extend(batch)
+            if not exhausted:
+                task.fetch(executor.batch_size)
+            else:
+                if headers:
+                    self.result_cache.put(database, sql, params, version, headers, rows, True)
+                # Ответ для уже закрытой БД не нужен
+                if on_done is not None and database == self.active_database:
+                    on_done(sql, params, len(rows))
+
+        task.columns_ready.connect(headers.extend)
+        task.rows_ready.connect(on_rows_ready)
+
+    def cache_result(self, model):
+        """Сохраняет прочитанные строки модели в кэш результатов"""
+        if model.cache_key is None or not model.is_complete() and not model.loaded_row_count():
+            return
+        headers, rows = model.snapshot()
+        if not headers:
+            return
+        database, sql, params, version = model.cache_key
+        self.result_cache.put(database, sql, params, version, headers, rows, model.is_complete())
+
+    def on_columns_ready(self, headers):
+        """Проверяем, есть ли столбцы в результате"""
+        logger.debug("Количество столбцов: %d", len(headers))
+        if not headers:
+            QMessageBox.warning(self, "Предупреждение", "Запрос не вернул столбцов.")
+
+    def on_query_failed(self, error_msg):
+        self.statusBar().clearMessage()
+        QMessageBox.critical(self, "Ошибка выполнения запроса", f"Не удалось выполнить запрос:\n{error_msg}")
+        logger.error("Запрос не выполнился: %s", error_msg)
 
 
 if __name__ == "__main__":
+    # Отладочный вывод включается переменной окружения, например LR3_LOG_LEVEL=DEBUG
+    logging.basicConfig(level=os.environ.get("LR3_LOG_LEVEL", "WARNING"),
+                        format="[%(levelname)s] %(message)s")
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
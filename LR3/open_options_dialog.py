@@ -0,0 +1,60 @@
+from PyQt5.QtWidgets import QDialog, QFormLayout, QLabel, QCheckBox, QSpinBox, QDialogButtonBox
+
+from connection_manager import OpenOptions
+
+
+class OpenOptionsDialog(QDialog):
+    """Выбор режима открытия БД: только чтение, immutable, WAL, mmap, кэш страниц"""
+
+    def __init__(self, path, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Параметры подключения")
+
+        layout = QFormLayout(self)
+
+        # Какой файл открывается: параметры относятся только к нему
+        file_label = QLabel(path)
+        file_label.setWordWrap(True)
+        layout.addRow("Файл:", file_label)
+
+        self.read_only_check = QCheckBox("Только чтение (mode=ro)")
+        layout.addRow(self.read_only_check)
+
+        self.immutable_check = QCheckBox("Неизменяемый снимок (immutable=1)")
+        self.immutable_check.toggled.connect(self.on_immutable_toggled)
+        layout.addRow(self.immutable_check)
+
+        self.wal_check = QCheckBox("Журнал WAL")
+        self.read_only_check.toggled.connect(lambda checked: self.wal_check.setEnabled(not checked))
+        layout.addRow(self.wal_check)
+
+        self.mmap_spin = QSpinBox()
+        self.mmap_spin.setRange(0, 1024 * 1024)
+        self.mmap_spin.setSuffix(" МБ")
+        self.mmap_spin.setSpecialValueText("не использовать")
+        layout.addRow("mmap_size:", self.mmap_spin)
+
+        self.cache_spin = QSpinBox()
+        self.cache_spin.setRange(0, 64 * 1024)
+        self.cache_spin.setSuffix(" МБ")
+        self.cache_spin.setSpecialValueText("по умолчанию")
+        layout.addRow("cache_size:", self.cache_spin)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addRow(buttons)
+
+    def on_immutable_toggled(self, checked):
+        if checked:
+            self.read_only_check.setChecked(True)
+        self.read_only_check.setEnabled(not checked)
+
+    def options(self):
+        return OpenOptions(
+            read_only=self.read_only_check.isChecked(),
+            immutable=self.immutable_check.isChecked(),
+            wal=self.wal_check.isChecked() and self.wal_check.isEnabled(),
+            mmap_size=self.mmap_spin.value() * 1024 * 1024,
+            cache_size_kb=self.cache_spin.value() * 1024 or None,
+        )
@@ -0,0 +1,354 @@
+import sqlite3
+import threading
+import time
+from itertools import count
+
+from PyQt5.QtCore import QObject, QThread, pyqtSignal, pyqtSlot
+
+
+def column_headers(description):
+    """Имена столбцов по cursor.description (пустые имена заменяются на Column_N)"""
+    headers = []
+    for i, column in enumerate(description or ()):
+        name = column[0]
+        if name is None or name == "":
+            name = f"Column_{i + 1}"
+        headers.append(name)
+    return headers
+
+
+class QueryTask(QObject):
+    """Запрос, выполняемый в фоновом потоке. Строки приходят порциями через сигналы"""
+
+    columns_ready = pyqtSignal(object)    # список имён столбцов
+    rows_ready = pyqtSignal(object, bool)  # порция строк, курсор исчерпан
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+    timing_ready = pyqtSignal(str, float)  # этап (prepare, execute, fetch), секунды
+
+    def __init__(self, executor, task_id, sql, params):
+        super().__init__()
+        self.executor = executor
+        self.task_id = task_id
+        self.sql = sql
+        self.params = params
+        self.done = False
+
+    def fetch(self, batch_size):
+        """Запросить у потока ещё batch_size строк"""
+        if not self.done:
+            self.executor._fetch_requested.emit(self.task_id, batch_size)
+
+    def cancel(self):
+        """Прервать выполнение запроса"""
+        if not self.done:
+            self.executor.cancel(self.task_id)
+
+    def release(self):
+        """Закрыть курсор запроса, если он ещё открыт"""
+        if not self.done:
+            self.executor.release(self.task_id)
+
+
+class _QueryWorker(QObject):
+    """Выполняет запросы на собственном соединении внутри рабочего потока"""
+
+    columns_ready = pyqtSignal(int, object)
+    rows_ready = pyqtSignal(int, object, bool)
+    failed = pyqtSignal(int, str)
+    cancelled = pyqtSignal(int)
+    timing_ready = pyqtSignal(int, str, float)
+
+    def __init__(self, connections, database_name):
+        super().__init__()
+        self.connections = connections
+        self.database_name = database_name
+        self.connection = None
+        self.cursors = {}
+        self.previews = {}  # задача -> LargeValuePreview
+        # Доступ из GUI-потока: отмена задач и прерывание текущего оператора
+        self.lock = threading.Lock()
+        self.cancelled_ids = set()
+        self.current_id = None
+        self.step_started = None  # момент первого шага оператора (после подготовки)
+        self.open_error = "Соединение с базой данных не открыто"
+
+    @pyqtSlot()
+    def open(self):
+        try:
+            # Собственное соединение рабочего потока из менеджера подключений
+            self.connection = self.connections.connection(self.database_name)
+        except (sqlite3.Error, KeyError) as error:
+            self.open_error = str(error)
+            return
+        # Трассировка вызывается в начале выполнения оператора, т.е. сразу после
+        # sqlite3_prepare — это позволяет отделить подготовку от выполнения
+        self.connection.set_trace_callback(self._on_trace)
+
+    def _on_trace(self, statement):
+        if self.step_started is None:
+            self.step_started = time.perf_counter()
+
+    @pyqtSlot()
+    def close(self):
+        for cursor in self.cursors.values():
+            cursor.close()
+        self.cursors.clear()
+        if self.connection is not None:
+            self.connection.set_trace_callback(None)
+            self.connections.release(self.database_name)
+            self.connection = None
+
+    def interrupt(self, task_id):
+        """Вызывается из GUI-потока: помечает задачу отменённой и прерывает SQLite"""
+        with self.lock:
+            self.cancelled_ids.add(task_id)
+            if self.current_id == task_id and self.connection is not None:
+                self.connection.interrupt()
+
+    def _begin(self, task_id):
+        with self.lock:
+            if task_id in self.cancelled_ids:
+                return False
+            self.current_id = task_id
+            return True
+
+    def _end(self):
+        with self.lock:
+            self.current_id = None
+
+    def _fail(self, task_id, error):
+        self._drop(task_id)
+        with self.lock:
+            was_cancelled = task_id in self.cancelled_ids
+        if was_cancelled:
+            self.cancelled.emit(task_id)
+        else:
+            self.failed.emit(task_id, str(error))
+
+    def _drop(self, task_id):
+        self.previews.pop(task_id, None)
+        cursor = self.cursors.pop(task_id, None)
+        if cursor is not None:
+            cursor.close()
+
+    @pyqtSlot(int, str, object, int, int, object)
+    def execute(self, task_id, sql, params, batch_size, skip, preview):
+        if self.connection is None:
+            self.failed.emit(task_id, self.open_error)
+            return
+        if not self._begin(task_id):
+            self.cancelled.emit(task_id)
+            return
+        try:
+            if preview is not None:
+                sql = preview.wrap(sql)
+                self.previews[task_id] = preview
+            self.step_started = None
+            started = time.perf_counter()
+            cursor = self.connection.execute(sql, params)
+            executed = time.perf_counter()
+            step_started = self.step_started or executed
+            self.timing_ready.emit(task_id, "prepare", step_started - started)
+            self.timing_ready.emit(task_id, "execute", executed - step_started)
+            self.cursors[task_id] = cursor
+            # Строки, которые у вкладки уже есть (например, из кэша), пропускаем
+            while skip > 0 and cursor.description is not None:
+                skipped = len(cursor.fetchmany(min(skip, 4096)))
+                if not skipped:
+                    break
+                skip -= skipped
+            headers = column_headers(cursor.description)
+            if preview is not None:
+                headers = preview.headers(headers)
+            self.columns_ready.emit(task_id, headers)
+            self._send_batch(task_id, cursor, batch_size)
+        except sqlite3.Error as error:
+            self._fail(task_id, error)
+        finally:
+            self._end()
+
+    @pyqtSlot(int, object, object, bool, int)
+    def execute_script(self, task_id, statements, params, transaction, batch_size):
+        """Выполняет операторы по очереди (при transaction — в одной транзакции).
+
+        Результат скрипта — курсор последнего оператора; он читается порциями и
+        после COMMIT, как обычный запрос.
+        """
+        if self.connection is None:
+            self.failed.emit(task_id, self.open_error)
+            return
+        if not self._begin(task_id):
+            self.cancelled.emit(task_id)
+            return
+        try:
+            started = time.perf_counter()
+            cursor = None
+            if transaction:
+                self.connection.execute("BEGIN")
+            try:
+                for statement in statements:
+                    if cursor is not None:
+                        cursor.close()
+                    cursor = self.connection.execute(statement, params)
+                if transaction:
+                    self.connection.execute("COMMIT")
+            except sqlite3.Error:
+                if self.connection.in_transaction:
+                    self.connection.execute("ROLLBACK")
+                raise
+            self.timing_ready.emit(task_id, "execute", time.perf_counter() - started)
+            self.cursors[task_id] = cursor
+            self.columns_ready.emit(task_id, column_headers(cursor.description))
+            self._send_batch(task_id, cursor, batch_size)
+        except sqlite3.Error as error:
+            self._fail(task_id, error)
+        finally:
+            self._end()
+
+    @pyqtSlot(int, int)
+    def fetch(self, task_id, batch_size):
+        cursor = self.cursors.get(task_id)
+        if cursor is None:
+            return
+        if not self._begin(task_id):
+            self._drop(task_id)
+            self.cancelled.emit(task_id)
+            return
+        try:
+            self._send_batch(task_id, cursor, batch_size)
+        except sqlite3.Error as error:
+            self._fail(task_id, error)
+        finally:
+            self._end()
+
+    @pyqtSlot(int)
+    def release(self, task_id):
+        self._drop(task_id)
+        with self.lock:
+            self.cancelled_ids.discard(task_id)
+
+    def _send_batch(self, task_id, cursor, batch_size):
+        if cursor.description is None:
+            rows = []
+        else:
+            started = time.perf_counter()
+            rows = cursor.fetchmany(batch_size)
+            self.timing_ready.emit(task_id, "fetch", time.perf_counter() - started)
+        exhausted = len(rows) < batch_size
+        preview = self.previews.get(task_id)
+        if preview is not None:
+            rows = preview.rows(rows)
+        if exhausted:
+            self._drop(task_id)
+        self.rows_ready.emit(task_id, rows, exhausted)
+
+
+class QueryExecutor(QObject):
+    """Исполнитель запросов: отдельный поток со своим соединением с БД из ConnectionManager"""
+
+    _execute_requested = pyqtSignal(int, str, object, int, int, object)
+    _script_requested = pyqtSignal(int, object, object, bool, int)
+    _fetch_requested = pyqtSignal(int, int)
+    _release_requested = pyqtSignal(int)
+    _close_requested = pyqtSignal()
+
+    _ids = count(1)
+
+    def __init__(self, connections, database_name, batch_size=256, parent=None):
+        super().__init__(parent)
+        self.batch_size = batch_size
+        self.tasks = {}
+
+        self.thread = QThread()
+        self.worker = _QueryWorker(connections, database_name)
+        self.worker.moveToThread(self.thread)
+        self.thread.started.connect(self.worker.open)
+
+        self._execute_requested.connect(self.worker.execute)
+        self._script_requested.connect(self.worker.execute_script)
+        self._fetch_requested.connect(self.worker.fetch)
+        self._release_requested.connect(self.worker.release)
+        self._close_requested.connect(self.worker.close)
+
+        self.worker.columns_ready.connect(self._on_columns_ready)
+        self.worker.rows_ready.connect(self._on_rows_ready)
+        self.worker.failed.connect(self._on_failed)
+        self.worker.cancelled.connect(self._on_cancelled)
+        self.worker.timing_ready.connect(self._on_timing_ready)
+
+        self.thread.start()
+
+    def submit(self, sql, params=(), skip=0, preview=None):
+        """Поставить запрос в очередь потока и вернуть QueryTask.
+
+        skip — сколько первых строк результата пропустить (они уже есть у вызывающего);
+        preview — LargeValuePreview: большие значения приходят как превью.
+        """
+        task = QueryTask(self, next(self._ids), sql, params)
+        self.tasks[task.task_id] = task
+        self._execute_requested.emit(task.task_id, sql, params, self.batch_size, skip, preview)
+        return task
+
+    def submit_script(self, statements, params=(), transaction=True):
+        """Поставить в очередь скрипт из нескольких операторов; результат — последний оператор"""
+        task = QueryTask(self, next(self._ids), ";\n".join(statements), params)
+        self.tasks[task.task_id] = task
+        self._script_requested.emit(task.task_id, list(statements), params, transaction, self.batch_size)
+        return task
+
+    def cancel(self, task_id=None):
+        """Прервать задачу (по умолчанию — все незавершённые задачи)"""
+        task_ids = [task_id] if task_id is not None else list(self.tasks)
+        for current in task_ids:
+            self.worker.interrupt(current)
+
+    def release(self, task_id):
+        """Прервать задачу и закрыть её курсор, не дожидаясь ответа потока"""
+        self.worker.interrupt(task_id)
+        self._finish(task_id)
+        self._release_requested.emit(task_id)
+
+    def is_busy(self):
+        return any(not task.done for task in self.tasks.values())
+
+    def close(self):
+        """Прервать все запросы, закрыть соединение и остановить поток"""
+        self.cancel()
+        for task in self.tasks.values():
+            task.done = True
+        self.tasks.clear()
+        self._close_requested.emit()
+        self.thread.quit()
+        self.thread.wait()
+
+    def _finish(self, task_id):
+        task = self.tasks.pop(task_id, None)
+        if task is not None:
+            task.done = True
+        return task
+
+    def _on_timing_ready(self, task_id, phase, seconds):
+        task = self.tasks.get(task_id)
+        if task is not None:
+            task.timing_ready.emit(phase, seconds)
+
+    def _on_columns_ready(self, task_id, headers):
+        task = self.tasks.get(task_id)
+        if task is not None:
+            task.columns_ready.emit(headers)
+
+    def _on_rows_ready(self, task_id, rows, exhausted):
+        task = self._finish(task_id) if exhausted else self.tasks.get(task_id)
+        if task is not None:
+            task.rows_ready.emit(rows, exhausted)
+
+    def _on_failed(self, task_id, message):
+        task = self._finish(task_id)
+        if task is not None:
+            task.failed.emit(message)
+
+    def _on_cancelled(self, task_id):
+        task = self._finish(task_id)
+        if task is not None:
+            task.cancelled.emit()
@@ -0,0 +1,104 @@
+import sqlite3
+import time
+
+# Этапы выполнения запроса в порядке вывода
+PHASES = (
+    ("prepare_s", "Подготовка"),
+    ("execute_s", "Выполнение"),
+    ("fetch_s", "Выборка"),
+    ("populate_s", "Модель"),
+    ("resize_s", "Ширина столбцов"),
+)
+
+
+def explain_query_plan(connection, sql, params=()):
+    """Строки EXPLAIN QUERY PLAN: (id, parent, detail) или текст ошибки"""
+    try:
+        rows = connection.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    except sqlite3.Error as error:
+        return str(error)
+    return [(row[0], row[1], row[-1]) for row in rows]
+
+
+def plain_param(value):
+    """Параметр запроса для JSON: числа, строки и NULL как есть, остальное — repr"""
+    return value if isinstance(value, (int, float, str)) or value is None else repr(value)
+
+
+def format_plan(plan):
+    """План запроса в виде дерева с отступами"""
+    if isinstance(plan, str):
+        return plan
+    depth = {0: -1}
+    lines = []
+    for node_id, parent_id, detail in plan:
+        depth[node_id] = depth.get(parent_id, -1) + 1
+        lines.append("  " * depth[node_id] + detail)
+    return "\n".join(lines) if lines else "(пустой план)"
+
+
+class QueryProfile:
+    """Замеры одного запроса: подготовка, выполнение, выборка, заполнение модели, ширина столбцов"""
+
+    def __init__(self, sql, params, tab_index, cached=False):
+        self.sql = sql
+        self.params = dict(params) if isinstance(params, dict) else tuple(params)
+        self.tab_index = tab_index
+        self.cached = cached
+        self.started_at = time.time()
+        self.prepare_s = 0.0
+        self.execute_s = 0.0
+        self.fetch_s = 0.0
+        self.populate_s = 0.0
+        self.resize_s = 0.0
+        self.rows = 0
+        self.plan = []
+        self.status = "выполняется"
+
+    def add(self, phase, seconds):
+        """Прибавить время к этапу (prepare, execute, fetch, populate, resize)"""
+        attribute = f"{phase}_s"
+        setattr(self, attribute, getattr(self, attribute) + seconds)
+
+    def total_s(self):
+        return sum(getattr(self, attribute) for attribute, _ in PHASES)
+
+    def summary(self):
+        """Короткая строка для строки состояния"""
+        source = " из кэша" if self.cached else ""
+        return (f"Tab{self.tab_index + 1}: {self.rows} строк{source}, "
+                f"{self.total_s() * 1000:.1f} мс ({self.status})")
+
+    def to_text(self):
+        started = time.strftime("%H:%M:%S", time.localtime(self.started_at))
+        lines = [f"Tab{self.tab_index + 1} · {started} · {self.status}", self.sql]
+        if self.params:
+            lines.append(f"Параметры: {self.params!r}")
+        lines.append(f"Строк: {self.rows}" + (" (из кэша)" if self.cached else ""))
+        lines.append("")
+        for attribute, title in PHASES:
+            lines.append(f"{title + ':':<17}{getattr(self, attribute) * 1000:10.2f} мс")
+        lines.append(f"{'Всего:':<17}{self.total_s() * 1000:10.2f} мс")
+        lines.append("")
+        lines.append("EXPLAIN QUERY PLAN")
+        lines.append(format_plan(self.plan))
+        return "\n".join(lines)
+
+    def to_dict(self):
+        result = {
+            "tab": self.tab_index + 1,
+            "sql": self.sql,
+            "params": ({name: plain_param(value) for name, value in self.params.items()}
+                       if isinstance(self.params, dict) else [plain_param(value) for value in self.params]),
+            "started_at": self.started_at,
+            "status": self.status,
+            "cached": self.cached,
+            "rows": self.rows,
+        }
+        for attribute, _ in PHASES:
+            result[attribute] = round(getattr(self, attribute), 6)
+        result["total_s"] = round(self.total_s(), 6)
+        result["plan"] = self.plan if isinstance(self.plan, str) else [
+            {"id": node_id, "parent": parent_id, "detail": detail} for node_id, parent_id, detail in self.plan
+        ]
+        return result
@@ -0,0 +1,110 @@
+import sys
+from collections import OrderedDict
+
+
+def database_version(connection):
+    """Версия содержимого и схемы БД: (PRAGMA data_version, PRAGMA schema_version)"""
+    data_version = connection.execute("PRAGMA data_version").fetchone()[0]
+    schema_version = connection.execute("PRAGMA schema_version").fetchone()[0]
+    return data_version, schema_version
+
+
+def estimate_rows_size(rows, sample_size=100):
+    """Приблизительный объём строк в памяти (оценка по выборке первых строк)"""
+    if not rows:
+        return 0
+    sample = rows[:sample_size]
+    sample_bytes = sum(
+        sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row)
+        for row in sample
+    )
+    return sample_bytes * len(rows) // len(sample)
+
+
+def params_key(params):
+    """Параметры запроса в виде ключа: позиционные — кортеж, именованные — отсортированные пары.
+
+    None — если параметры нельзя сделать ключом (нехешируемые значения): такой запрос не кэшируется.
+    """
+    try:
+        key = tuple(sorted(params.items())) if isinstance(params, dict) else tuple(params)
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+class CachedResult:
+    """Сохранённый результат запроса (целиком или первые прочитанные строки)"""
+
+    def __init__(self, version, headers, rows, complete):
+        self.version = version
+        self.headers = headers
+        self.rows = rows
+        self.complete = complete
+        self.size = estimate_rows_size(rows)
+
+
+class ResultCache:
+    """LRU-кэш результатов запросов с ограничением по памяти.
+
+    Ключ — имя подключения (ConnectionManager), текст запроса и параметры.
+    Запись действительна, пока не изменились data_version и schema_version
+    базы данных. data_version сравнима только в пределах одного соединения,
+    поэтому ключ — подключение, а не путь: один файл, открытый под двумя
+    именами, проверяется каждым своим соединением и кэшируется отдельно.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, database, sql, params, version):
+        """Вернуть актуальную запись или None (устаревшие записи этой БД удаляются)"""
+        key = (database, sql, params_key(params))
+        if key[2] is None:
+            return None
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.version != version:
+            # Файл изменился — всё, что закэшировано для этой БД, устарело
+            self.invalidate(database, keep_version=version)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, database, sql, params, version, headers, rows, complete):
+        """Сохранить результат, вытесняя давно не использованные записи"""
+        key = (database, sql, params_key(params))
+        if key[2] is None:
+            return
+        # Старая запись под тем же ключом устарела, даже если новая не поместится
+        old_entry = self._entries.pop(key, None)
+        if old_entry is not None:
+            self.total_bytes -= old_entry.size
+
+        entry = CachedResult(version, list(headers), rows, complete)
+        if entry.size > self.max_bytes:
+            return
+        self._entries[key] = entry
+        self.total_bytes += entry.size
+
+        while self.total_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.total_bytes -= evicted.size
+
+    def invalidate(self, database=None, keep_version=None):
+        """Удалить записи подключения database (или все записи), кроме записей версии keep_version"""
+        for key in list(self._entries):
+            entry = self._entries[key]
+            if database is not None and key[0] != database:
+                continue
+            if keep_version is not None and entry.version == keep_version:
+                continue
+            del self._entries[key]
+            self.total_bytes -= entry.size
@@ -0,0 +1,267 @@
+import csv
+import json
+import os
+import sqlite3
+import threading
+
+from PyQt5.QtCore import Qt, QObject, QThread, pyqtSignal, pyqtSlot
+
+from query_executor import column_headers
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Parquet доступен только при установленном pyarrow
+    pyarrow = None
+
+# Строк в одной порции: память экспорта не зависит от размера результата
+EXPORT_BATCH_SIZE = 10000
+
+
+def plain_value(value):
+    """Значение для текстовых форматов: BLOB записывается в hex"""
+    if isinstance(value, bytes):
+        return value.hex()
+    return value
+
+
+class CsvWriter:
+    def __init__(self, path, headers):
+        self.file = open(path, "w", encoding="utf-8", newline="")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(headers)
+
+    def write_batch(self, rows):
+        self.writer.writerows(
+            ["" if value is None else plain_value(value) for value in row] for row in rows
+        )
+
+    def close(self):
+        self.file.close()
+
+
+class JsonLinesWriter:
+    def __init__(self, path, headers):
+        self.file = open(path, "w", encoding="utf-8")
+        self.headers = headers
+
+    def write_batch(self, rows):
+        headers = self.headers
+        self.file.writelines(
+            json.dumps(dict(zip(headers, map(plain_value, row))), ensure_ascii=False) + "\n"
+            for row in rows
+        )
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetSchemaChanged(Exception):
+    """Значения порции не подходят под типы столбцов, выбранные по первой порции"""
+
+    def __init__(self, columns):
+        super().__init__(", ".join(columns))
+        self.columns = columns
+
+
+class ParquetWriter:
+    """Колоночный файл: каждая порция строк пишется отдельной группой строк Parquet.
+
+    Типы столбцов определяются по первой порции (SQLite не требует одного типа
+    в столбце, поэтому столбцы со смешанными значениями пишутся как строки).
+    Схему файла после первой порции изменить нельзя: если в следующей порции
+    столбцу попадётся значение другого типа, write_batch бросает
+    ParquetSchemaChanged, и экспорт повторяется с этими столбцами в
+    string_columns — они сразу пишутся строками.
+    """
+
+    def __init__(self, path, headers, string_columns=()):
+        if pyarrow is None:
+            raise RuntimeError("Для экспорта в Parquet установите pyarrow: pip install pyarrow")
+        self.path = path
+        self.headers = headers
+        self.string_columns = set(string_columns)
+        self.schema = None
+        self.writer = None
+
+    def _column_type(self, values):
+        kinds = {type(value) for value in values if value is not None}
+        if not kinds:
+            # Одни NULL — тип неизвестен, строка подойдёт для любых следующих значений
+            return pyarrow.string()
+        if kinds <= {int}:
+            return pyarrow.int64()
+        if kinds <= {int, float}:
+            return pyarrow.float64()
+        if kinds == {bytes}:
+            return pyarrow.binary()
+        return pyarrow.string()
+
+    @staticmethod
+    def _fits(field_type, values):
+        if field_type == pyarrow.string():
+            return True
+        allowed = {
+            pyarrow.int64(): (int,),
+            pyarrow.float64(): (int, float),
+            pyarrow.binary(): (bytes,),
+        }[field_type]
+        return all(value is None or type(value) in allowed for value in values)
+
+    def write_batch(self, rows):
+        columns = list(zip(*rows)) if rows else [()] * len(self.headers)
+        if self.schema is None:
+            self.schema = pyarrow.schema([
+                (name, pyarrow.string() if name in self.string_columns else self._column_type(values))
+                for name, values in zip(self.headers, columns)
+            ])
+            self.writer = pyarrow.parquet.ParquetWriter(self.path, self.schema)
+
+        changed = [field.name for field, values in zip(self.schema, columns) if not self._fits(field.type, values)]
+        if changed:
+            raise ParquetSchemaChanged(changed)
+
+        arrays = []
+        for field, values in zip(self.schema, columns):
+            if field.type == pyarrow.string():
+                # BLOB в строковом столбце — в hex, как в CSV и JSONL
+                values = [None if value is None else str(plain_value(value)) for value in values]
+            arrays.append(pyarrow.array(values, type=field.type))
+        self.writer.write_table(pyarrow.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        if self.writer is None and self.headers:
+            # Пустой результат — файл только со схемой
+            self.write_batch([])
+        if self.writer is not None:
+            self.writer.close()
+
+
+EXPORT_FORMATS = {
+    "csv": CsvWriter,
+    "jsonl": JsonLinesWriter,
+    "parquet": ParquetWriter,
+}
+
+
+class _ExportWorker(QObject):
+    """Читает результат курсором порциями и сразу пишет их в файл"""
+
+    progress = pyqtSignal(int)  # строк записано
+    finished = pyqtSignal(int)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, connect, sql, params, path, export_format):
+        super().__init__()
+        self.connect = connect
+        self.sql = sql
+        self.params = params
+        self.path = path
+        self.export_format = export_format
+        self.lock = threading.Lock()
+        self.connection = None
+        self.cancel_requested = False
+
+    def cancel(self):
+        """Вызывается из GUI-потока"""
+        with self.lock:
+            self.cancel_requested = True
+            if self.connection is not None:
+                self.connection.interrupt()
+
+    @pyqtSlot()
+    def run(self):
+        string_columns = set()
+        while True:
+            try:
+                written = self.export(string_columns)
+            except ParquetSchemaChanged as error:
+                # Схему Parquet не изменить на ходу — пишем файл заново, эти столбцы строками
+                string_columns.update(error.columns)
+                self.remove_output()
+                continue
+            except (sqlite3.Error, OSError, RuntimeError, ValueError, TypeError) as error:
+                if self.cancel_requested:
+                    self.cancelled.emit()
+                else:
+                    # Недописанный файл не должен выглядеть как результат экспорта
+                    self.remove_output()
+                    self.failed.emit(str(error))
+                return
+            break
+        if self.cancel_requested:
+            self.cancelled.emit()
+        else:
+            self.finished.emit(written)
+
+    def export(self, string_columns):
+        """Один проход: выполняет запрос и пишет результат в файл; возвращает число строк"""
+        written = 0
+        writer = None
+        connection = self.connect()
+        with self.lock:
+            self.connection = connection
+        try:
+            cursor = connection.execute(self.sql, self.params)
+            headers = column_headers(cursor.description)
+            if self.export_format == "parquet":
+                writer = ParquetWriter(self.path, headers, string_columns)
+            else:
+                writer = EXPORT_FORMATS[self.export_format](self.path, headers)
+            while not self.cancel_requested:
+                rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+                if not rows:
+                    break
+                writer.write_batch(rows)
+                written += len(rows)
+                self.progress.emit(written)
+        finally:
+            with self.lock:
+                self.connection = None
+            connection.close()
+            if writer is not None:
+                writer.close()
+        return written
+
+    def remove_output(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class ResultExporter(QObject):
+    """Экспорт результата запроса в CSV/JSONL/Parquet в отдельном потоке"""
+
+    progress = pyqtSignal(int)
+    finished = pyqtSignal(int)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, connect, sql, params, path, export_format, parent=None):
+        """connect — функция, возвращающая новое соединение с БД для рабочего потока"""
+        super().__init__(parent)
+        self.path = path
+        self.thread = QThread()
+        self.worker = _ExportWorker(connect, sql, params, path, export_format)
+        self.worker.moveToThread(self.thread)
+        self.thread.started.connect(self.worker.run)
+
+        self.worker.progress.connect(self.progress)
+        self.worker.finished.connect(self.finished)
+        self.worker.failed.connect(self.failed)
+        self.worker.cancelled.connect(self.cancelled)
+        # quit() потокобезопасен: вызываем его прямо из рабочего потока, чтобы
+        # wait() в обработчике finished не ждал события, стоящего в очереди
+        for signal in (self.worker.finished, self.worker.failed, self.worker.cancelled):
+            signal.connect(self.thread.quit, Qt.DirectConnection)
+
+    def start(self):
+        self.thread.start()
+
+    def cancel(self):
+        self.worker.cancel()
+
+    def wait(self):
+        self.thread.wait()
@@ -0,0 +1,186 @@
+import time
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QVariant, pyqtSignal
+
+from large_values import LargeValue, format_value
+
+
+class QueryResultModel(QAbstractTableModel):
+    """Модель результатов запроса с ленивой подгрузкой строк из фонового курсора"""
+
+    EMPTY_TEXT = "Нет данных"
+
+    # Первая порция строк получена (удобно для подгонки ширины столбцов)
+    first_rows_loaded = pyqtSignal()
+    # Курсор исчерпан, результат прочитан целиком
+    loading_finished = pyqtSignal()
+
+    def __init__(self, task=None, batch_size=256, cached=None, parent=None):
+        super().__init__(parent)
+        self._task = task
+        self._batch_size = batch_size
+        self._headers = []
+        self._rows = []
+        self._exhausted = True
+        self._pending = False
+        self._aborted = False  # запрос прерван или завершился ошибкой
+        # (путь к БД, запрос, параметры, версия БД) — если результат можно кэшировать
+        self.cache_key = None
+        self.profile = None  # QueryProfile, в который записывается время заполнения модели
+
+        if cached is not None:
+            # Результат из кэша: строки доступны сразу, остальное (если есть) догружает task
+            self._headers = list(cached.headers)
+            self._rows = list(cached.rows)
+
+        if task is not None:
+            self._exhausted = False
+            # Первую порцию поток отправляет сам сразу после выполнения запроса
+            self._pending = True
+            task.columns_ready.connect(self._on_columns_ready)
+            task.rows_ready.connect(self._on_rows_ready)
+            task.failed.connect(self._stop)
+            task.cancelled.connect(self._stop)
+
+    @property
+    def task(self):
+        return self._task
+
+    def headers(self):
+        return list(self._headers)
+
+    def is_complete(self):
+        """Прочитан ли результат запроса целиком"""
+        return self._exhausted and not self._aborted
+
+    def row_values(self, row):
+        """Исходные значения строки row (без преобразования в текст)"""
+        return self._rows[row]
+
+    def snapshot(self):
+        """Заголовки и уже прочитанные строки (для кэша результатов)"""
+        return self._headers, list(self._rows)
+
+    def is_placeholder(self):
+        """Показывается ли строка-заглушка «Нет данных» вместо результата"""
+        return self._exhausted and not self._rows and bool(self._headers)
+
+    def is_loading(self):
+        """Ожидается ли очередная порция строк от потока"""
+        return self._pending
+
+    def loaded_row_count(self):
+        """Количество строк, уже полученных из курсора"""
+        return len(self._rows)
+
+    def append_rows(self, rows):
+        """Дописывает строки в конец полностью прочитанного результата (режим наблюдения)"""
+        if not rows:
+            return
+        if self.is_placeholder():
+            self.beginResetModel()
+            self._rows.extend(rows)
+            self.endResetModel()
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self._rows.extend(rows)
+        self.endInsertRows()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        if self.is_placeholder():
+            return 1
+        return len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return QVariant()
+
+        if self.is_placeholder():
+            if role == Qt.DisplayRole:
+                return self.EMPTY_TEXT if index.column() == 0 else ""
+            if role == Qt.TextAlignmentRole and index.column() == 0:
+                return Qt.AlignCenter
+            return QVariant()
+
+        if role == Qt.DisplayRole:
+            # Преобразуем в строку только видимые ячейки, а не весь результат
+            return format_value(self._rows[index.row()][index.column()])
+        if role == Qt.ToolTipRole:
+            value = self._rows[index.row()][index.column()]
+            if isinstance(value, LargeValue) and value.can_load():
+                return "Двойной щелчок — открыть значение целиком"
+        return QVariant()
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return QVariant()
+        if orientation == Qt.Horizontal:
+            if 0 <= section < len(self._headers):
+                return self._headers[section]
+            return QVariant()
+        return str(section + 1)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return not self._exhausted and not self._pending
+
+    def fetchMore(self, parent=QModelIndex()):
+        """Запрашивает у фонового потока очередную порцию строк"""
+        if not self.canFetchMore(parent):
+            return
+        self._pending = True
+        self._task.fetch(self._batch_size)
+
+    def release(self):
+        """Закрывает курсор (перед сменой модели или закрытием соединения)"""
+        if self._task is not None and not self._exhausted:
+            self._task.release()
+            self._aborted = True
+        self._exhausted = True
+        self._pending = False
+
+    def _on_columns_ready(self, headers):
+        self.beginResetModel()
+        self._headers = list(headers)
+        self.endResetModel()
+
+    def _on_rows_ready(self, rows, exhausted):
+        started = time.perf_counter()
+        first_batch = not self._rows
+        self._pending = False
+        if exhausted:
+            self._exhausted = True
+
+        if rows:
+            first = len(self._rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+            self._rows.extend(rows)
+            self.endInsertRows()
+        elif self.is_placeholder():
+            self.beginResetModel()
+            self.endResetModel()
+
+        if self.profile is not None:
+            self.profile.add("populate", time.perf_counter() - started)
+            self.profile.rows = len(self._rows)
+
+        if first_batch:
+            self.first_rows_loaded.emit()
+        if exhausted:
+            self.loading_finished.emit()
+
+    def _stop(self, *args):
+        self.beginResetModel()
+        self._pending = False
+        self._exhausted = True
+        self._aborted = True
+        self.endResetModel()
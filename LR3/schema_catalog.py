@@ -0,0 +1,168 @@
+import re
+
+
+WITHOUT_ROWID_RE = re.compile(r"\)\s*WITHOUT\s+ROWID\s*;?\s*$", re.IGNORECASE)
+
+
+def quote_identifier(name):
+    """Экранирует имя таблицы или столбца для подстановки в SQL"""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+class ColumnInfo:
+    """Столбец таблицы (строка PRAGMA table_info)"""
+
+    def __init__(self, cid, name, type_name, not_null, default, pk):
+        self.cid = cid
+        self.name = name
+        self.type_name = type_name
+        self.not_null = bool(not_null)
+        self.default = default
+        self.pk = pk
+
+
+class IndexInfo:
+    """Индекс таблицы и его столбцы"""
+
+    def __init__(self, name, unique, origin, partial):
+        self.name = name
+        self.unique = bool(unique)
+        self.origin = origin
+        self.partial = bool(partial)
+        self.columns = []
+
+
+class ForeignKeyInfo:
+    """Внешний ключ: столбцы from_columns ссылаются на table(to_columns)"""
+
+    def __init__(self, fk_id, table):
+        self.fk_id = fk_id
+        self.table = table
+        self.from_columns = []
+        self.to_columns = []
+
+
+class TableInfo:
+    """Таблица или представление со столбцами, индексами и внешними ключами"""
+
+    def __init__(self, name, kind, sql):
+        self.name = name
+        self.kind = kind  # 'table' или 'view'
+        self.sql = sql or ""
+        self.columns = []
+        self.indexes = []
+        self.foreign_keys = []
+
+    @property
+    def has_rowid(self):
+        return self.kind == "table" and not WITHOUT_ROWID_RE.search(self.sql)
+
+    def column_names(self):
+        return [column.name for column in self.columns]
+
+    def column(self, name):
+        for column in self.columns:
+            if column.name == name:
+                return column
+        return None
+
+
+class SchemaCatalog:
+    """Каталог схемы всей БД в памяти.
+
+    Загружается несколькими запросами к табличным PRAGMA-функциям сразу для всех
+    таблиц и перечитывается только при изменении PRAGMA schema_version.
+    """
+
+    def __init__(self):
+        self.schema_version = None
+        self.tables = {}
+        self._column_index = {}  # имя столбца -> имена таблиц, где он есть
+
+    def clear(self):
+        self.schema_version = None
+        self.tables = {}
+        self._column_index = {}
+
+    def refresh(self, connection, schema_version=None):
+        """Перечитать схему, если она изменилась. Возвращает True, если каталог обновлён"""
+        if schema_version is None:
+            schema_version = connection.execute("PRAGMA schema_version").fetchone()[0]
+        if schema_version == self.schema_version:
+            return False
+        self._load(connection)
+        self.schema_version = schema_version
+        return True
+
+    def table_names(self):
+        return list(self.tables)
+
+    def table(self, name):
+        return self.tables.get(name)
+
+    def columns(self, table_name):
+        table = self.tables.get(table_name)
+        return table.column_names() if table is not None else []
+
+    def tables_with_column(self, column_name):
+        return list(self._column_index.get(column_name, ()))
+
+    def _load(self, connection):
+        tables = {}
+        for name, kind, sql in connection.execute(
+            "SELECT name, type, sql FROM sqlite_master "
+            "WHERE type IN ('table', 'view') AND name NOT LIKE 'sqlite\\_%' ESCAPE '\\' "
+            "ORDER BY type, rowid"
+        ):
+            tables[name] = TableInfo(name, kind, sql)
+
+        for table_name, cid, name, type_name, not_null, default, pk in connection.execute(
+            "SELECT m.name, p.cid, p.name, p.type, p.\"notnull\", p.dflt_value, p.pk "
+            "FROM sqlite_master AS m JOIN pragma_table_info(m.name) AS p "
+            "WHERE m.type IN ('table', 'view') ORDER BY m.name, p.cid"
+        ):
+            table = tables.get(table_name)
+            if table is not None and name:
+                table.columns.append(ColumnInfo(cid, name, type_name, not_null, default, pk))
+
+        indexes = {}
+        for table_name, index_name, unique, origin, partial, column_name in connection.execute(
+            "SELECT m.name, il.name, il.\"unique\", il.origin, il.partial, ii.name "
+            "FROM sqlite_master AS m JOIN pragma_index_list(m.name) AS il "
+            "JOIN pragma_index_info(il.name) AS ii "
+            "WHERE m.type = 'table' ORDER BY m.name, il.name, ii.seqno"
+        ):
+            table = tables.get(table_name)
+            if table is None:
+                continue
+            index = indexes.get((table_name, index_name))
+            if index is None:
+                index = IndexInfo(index_name, unique, origin, partial)
+                indexes[(table_name, index_name)] = index
+                table.indexes.append(index)
+            index.columns.append(column_name)
+
+        foreign_keys = {}
+        for table_name, fk_id, ref_table, from_column, to_column in connection.execute(
+            "SELECT m.name, fk.id, fk.\"table\", fk.\"from\", fk.\"to\" "
+            "FROM sqlite_master AS m JOIN pragma_foreign_key_list(m.name) AS fk "
+            "WHERE m.type = 'table' ORDER BY m.name, fk.id, fk.seq"
+        ):
+            table = tables.get(table_name)
+            if table is None:
+                continue
+            foreign_key = foreign_keys.get((table_name, fk_id))
+            if foreign_key is None:
+                foreign_key = ForeignKeyInfo(fk_id, ref_table)
+                foreign_keys[(table_name, fk_id)] = foreign_key
+                table.foreign_keys.append(foreign_key)
+            foreign_key.from_columns.append(from_column)
+            foreign_key.to_columns.append(to_column)
+
+        column_index = {}
+        for table in tables.values():
+            for column in table.columns:
+                column_index.setdefault(column.name, []).append(table.name)
+
+        self.tables = tables
+        self._column_index = column_index
@@ -0,0 +1,147 @@
+import json
+import re
+import sqlite3
+
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QPlainTextEdit, QLineEdit, QPushButton, QComboBox,
+    QTableView, QLabel, QShortcut
+)
+from PyQt5.QtCore import pyqtSignal
+from PyQt5.QtGui import QFontDatabase, QKeySequence
+
+from result_model import QueryResultModel
+
+# Сколько запросов хранит история консоли
+HISTORY_SIZE = 50
+
+_READ_QUERY_RE = re.compile(r"^\s*(SELECT|VALUES|EXPLAIN|WITH)\b", re.IGNORECASE)
+_WRITE_KEYWORD_RE = re.compile(r"\b(INSERT|UPDATE|DELETE|REPLACE)\b", re.IGNORECASE)
+_TRANSACTION_RE = re.compile(r"^\s*(BEGIN|COMMIT|END|ROLLBACK|SAVEPOINT|RELEASE)\b", re.IGNORECASE)
+
+
+def split_statements(sql):
+    """Делит скрипт на отдельные операторы (точка с запятой внутри строк не режет оператор)"""
+    statements = []
+    buffer = ""
+    for piece in sql.split(";"):
+        buffer += piece + ";"
+        if sqlite3.complete_statement(buffer):
+            if buffer.strip(" \t\r\n;"):
+                statements.append(buffer.strip())
+            buffer = ""
+    if buffer.strip(" \t\r\n;"):
+        # Последний оператор без точки с запятой
+        statements.append(buffer.strip().rstrip(";"))
+    return statements
+
+
+def is_read_query(sql):
+    """Только ли читает запрос: такой результат можно кэшировать, перечитывать и экспортировать"""
+    return bool(_READ_QUERY_RE.match(sql)) and not _WRITE_KEYWORD_RE.search(sql)
+
+
+def manages_transaction(statements):
+    """Управляет ли скрипт транзакцией сам (BEGIN/COMMIT/SAVEPOINT...)"""
+    return any(_TRANSACTION_RE.match(statement) for statement in statements)
+
+
+def parse_params(text):
+    """Параметры из JSON: массив — для «?», объект — для «:имя»"""
+    text = text.strip()
+    if not text:
+        return ()
+    params = json.loads(text)
+    if isinstance(params, list):
+        values = params
+    elif isinstance(params, dict):
+        values = params.values()
+    else:
+        raise ValueError("Параметры задаются JSON-массивом или объектом")
+    # SQLite привязывает только скаляры; вложенные массивы и объекты — ошибка ввода
+    for value in values:
+        if value is not None and not isinstance(value, (int, float, str)):
+            raise ValueError(f"Недопустимое значение параметра: {json.dumps(value, ensure_ascii=False)}")
+    return tuple(params) if isinstance(params, list) else params
+
+
+class SqlConsole(QWidget):
+    """Вкладка произвольных SQL-запросов с привязкой параметров и историей.
+
+    Значения передаются только через параметры (?, :имя), а не подстановкой в
+    текст запроса. Выполнение — в MainWindow (сигнал run_requested).
+    """
+
+    run_requested = pyqtSignal(str, object)  # текст запроса, параметры
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.history = []  # [(запрос, параметры в JSON)]
+
+        layout = QVBoxLayout(self)
+
+        self.editor = QPlainTextEdit()
+        self.editor.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        self.editor.setPlaceholderText("SELECT * FROM users WHERE age > ? LIMIT 10;  -- Ctrl+Enter — выполнить")
+        layout.addWidget(self.editor, 1)
+
+        controls = QHBoxLayout()
+        self.params_edit = QLineEdit()
+        self.params_edit.setPlaceholderText('Параметры (JSON): [30] или {"age": 30}')
+        self.params_edit.returnPressed.connect(self.run)
+        controls.addWidget(self.params_edit, 1)
+
+        self.run_btn = QPushButton("Выполнить")
+        self.run_btn.clicked.connect(self.run)
+        controls.addWidget(self.run_btn)
+
+        self.history_combo = QComboBox()
+        self.history_combo.addItem("История...")
+        self.history_combo.activated.connect(self.restore_history)
+        controls.addWidget(self.history_combo, 1)
+        layout.addLayout(controls)
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+
+        self.table_view = QTableView()
+        self.table_view.setModel(QueryResultModel(parent=self.table_view))
+        layout.addWidget(self.table_view, 2)
+
+        QShortcut(QKeySequence("Ctrl+Return"), self, activated=self.run)
+
+    def run(self):
+        sql = self.editor.toPlainText().strip()
+        if not sql:
+            return
+        try:
+            params = parse_params(self.params_edit.text())
+        except ValueError as error:
+            self.status_label.setText(f"Ошибка в параметрах: {error}")
+            return
+        self.add_history(sql, self.params_edit.text().strip())
+        self.run_requested.emit(sql, params)
+
+    def add_history(self, sql, params_text):
+        entry = (sql, params_text)
+        if entry in self.history:
+            self.history.remove(entry)
+        self.history.insert(0, entry)
+        del self.history[HISTORY_SIZE:]
+
+        self.history_combo.blockSignals(True)
+        self.history_combo.clear()
+        self.history_combo.addItem("История...")
+        for query, params in self.history:
+            title = " ".join(query.split())
+            if params:
+                title += f"  ← {params}"
+            self.history_combo.addItem(title[:120])
+        self.history_combo.blockSignals(False)
+
+    def restore_history(self, index):
+        if index <= 0:
+            return
+        sql, params_text = self.history[index - 1]
+        self.editor.setPlainText(sql)
+        self.params_edit.setText(params_text)
+        self.history_combo.setCurrentIndex(0)